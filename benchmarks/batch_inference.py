@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, INFERENCE_WINDOW, model_path, legacy_model_path, find_model_path
+from datetime import datetime, timedelta
+import argparse
+import random
+import tempfile
+import time
+import warnings
+
+SYNTHETIC_PREFIX = 'Bench Station'
+
+def create_stations(db, count, seed=42):
+    """Add synthetic stations with a few aligned readings each; returns their names"""
+    names = [f"{SYNTHETIC_PREFIX} {number:04d}" for number in range(1, count + 1)]
+    if not names:
+        return names
+    
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        cursor.executemany(
+            "INSERT INTO cities (city_name, state) VALUES (%s, 'Benchmark') ON CONFLICT (city_name) DO NOTHING;",
+            [(name,) for name in names]
+        )
+        connection.commit()
+        cursor.close()
+    db.refresh_cities()
+    
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    readings = []
+    for name in names:
+        for step in range(INFERENCE_WINDOW):
+            pm25 = rng.uniform(30, 180)
+            readings.append({
+                'city': name,
+                'timestamp': now - timedelta(hours=step),
+                'aqi': int(pm25 * 2), 'pm25': pm25, 'pm10': pm25 * 1.6,
+                'no2': rng.uniform(10, 60), 'so2': rng.uniform(5, 30),
+                'co': rng.uniform(0.5, 3), 'o3': rng.uniform(20, 80),
+                'temperature': rng.uniform(15, 40), 'humidity': rng.randint(20, 90),
+                'wind_speed': rng.uniform(0, 10), 'pressure': rng.randint(1000, 1020)
+            })
+    db.insert_readings_batch(readings, source='benchmark')
+    
+    return names
+
+def remove_stations(db):
+    """Delete every synthetic station and its data"""
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT city_id FROM cities WHERE city_name LIKE %s;", (f"{SYNTHETIC_PREFIX}%",))
+        city_ids = [row[0] for row in cursor.fetchall()]
+        
+        for table in ('latest_readings', 'air_quality', 'weather', 'air_quality_hourly', 'air_quality_daily', 'cities'):
+            cursor.execute(f"DELETE FROM {table} WHERE city_id = ANY(%s);", (city_ids,))
+        
+        connection.commit()
+        cursor.close()
+    db.refresh_cities()
+
+def link_models(models_dir, real_cities, stations):
+    """Give each synthetic station one of the real cities' models via a symlink"""
+    def link(city, name):
+        source = find_model_path(city)
+        target = legacy_model_path if source.endswith('.pkl') else model_path
+        os.symlink(os.path.abspath(source), target(name, models_dir))
+    
+    for index, station in enumerate(stations):
+        link(real_cities[index % len(real_cities)], station)
+    for city in real_cities:
+        link(city, city)
+
+def best_of(runs, function):
+    """Fastest wall time of `runs` calls, in seconds"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    """Compare the per-city prediction loop with batched inference"""
+    parser = argparse.ArgumentParser(description="Benchmark per-city vs batched AQI inference")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 100, 1000], help="numbers of cities")
+    parser.add_argument('--runs', type=int, default=3, help="runs per measurement (best is kept)")
+    args = parser.parse_args()
+    
+    # Fitted with feature names, predicted with arrays
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    predictor = AQIPredictor()
+    db = predictor.db
+    real_cities = [city for city in db.get_city_names() if find_model_path(city)]
+    
+    if not real_cities:
+        print("❌ No saved models in data/models; train them first")
+        return
+    
+    remove_stations(db)
+    stations = create_stations(db, max(args.sizes) - len(real_cities))
+    
+    try:
+        with tempfile.TemporaryDirectory() as models_dir:
+            link_models(models_dir, real_cities, stations)
+            predictor = AQIPredictor(models_dir=models_dir)
+            
+            print("=" * 70)
+            print("⚡ BATCH INFERENCE BENCHMARK")
+            print("=" * 70)
+            print(f"{len(real_cities)} distinct models, stations share them via symlinks")
+            print(f"{'Cities':>8} {'Loop (s)':>12} {'Batch (s)':>12} {'Speedup':>10} {'Per city (ms)':>15}")
+            print("-" * 70)
+            
+            for size in args.sizes:
+                cities = (real_cities + stations)[:size]
+                # Warm the model registry so neither side pays for unpickling
+                predictor.predict_batch(cities)
+                
+                loop = best_of(args.runs, lambda: [predictor.predict_next_aqi(city) for city in cities])
+                batch = best_of(args.runs, lambda: predictor.predict_batch(cities))
+                
+                print(f"{size:>8} {loop:>12.3f} {batch:>12.3f} {loop / batch:>9.1f}x {batch * 1000 / size:>15.3f}")
+            
+            print("=" * 70)
+    finally:
+        remove_stations(db)
+
+if __name__ == "__main__":
+    main()
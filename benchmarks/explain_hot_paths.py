@@ -0,0 +1,179 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.db_operations import DatabaseOperations
+import argparse
+import json
+import re
+
+# Hot read paths, plus the old DATE_TRUNC join for comparison
+QUERIES = {
+    'predictor join (time_bucket)': """
+        SELECT aq.timestamp, aq.aqi, w.temperature, w.humidity
+        FROM (
+            SELECT * FROM air_quality
+            WHERE city_id = %(city_id)s
+            ORDER BY timestamp ASC
+            LIMIT 1000
+        ) aq
+        JOIN LATERAL (
+            SELECT temperature, humidity FROM weather
+            WHERE weather.city_id = aq.city_id
+                AND weather.time_bucket = aq.time_bucket
+                AND weather.timestamp >= aq.time_bucket
+                AND weather.timestamp < aq.time_bucket + INTERVAL '1 second'
+            LIMIT 1
+        ) w ON TRUE
+        ORDER BY aq.timestamp ASC;
+    """,
+    'predictor join (DATE_TRUNC, old)': """
+        SELECT aq.timestamp, aq.aqi, w.temperature, w.humidity
+        FROM air_quality aq
+        JOIN weather w ON aq.city_id = w.city_id
+            AND DATE_TRUNC('second', aq.timestamp) = DATE_TRUNC('second', w.timestamp)
+        WHERE aq.city_id = %(city_id)s
+        ORDER BY aq.timestamp ASC
+        LIMIT 1000;
+    """,
+    'heatmap join (time_bucket)': """
+        SELECT aq.aqi, aq.pm25, w.temperature, w.humidity
+        FROM air_quality aq
+        JOIN weather w ON aq.city_id = w.city_id AND aq.time_bucket = w.time_bucket
+        LIMIT 100;
+    """,
+    'latest weather for a city': """
+        SELECT * FROM weather
+        WHERE city_id = %(city_id)s
+        ORDER BY timestamp DESC
+        LIMIT 1;
+    """,
+    'weather for a city, last 7 days': """
+        SELECT timestamp, temperature FROM weather
+        WHERE city_id = %(city_id)s
+          AND timestamp >= %(latest)s - INTERVAL '7 days';
+    """,
+    'current AQI, all cities (latest_readings)': """
+        SELECT c.city_name, lr.aqi, lr.pm25, lr.temperature
+        FROM latest_readings lr
+        JOIN cities c ON lr.city_id = c.city_id
+        ORDER BY lr.aqi DESC;
+    """,
+    'all cities, last 24 hours': """
+        SELECT city_id, AVG(aqi) FROM air_quality
+        WHERE timestamp >= %(latest)s - INTERVAL '24 hours'
+        GROUP BY city_id;
+    """,
+    'daily AQI for a city, 1 year (raw)': """
+        SELECT DATE_TRUNC('day', timestamp), MIN(aqi), MAX(aqi), AVG(aqi), COUNT(*)
+        FROM air_quality
+        WHERE city_id = %(city_id)s
+          AND timestamp >= %(latest)s - INTERVAL '365 days'
+        GROUP BY 1
+        ORDER BY 1;
+    """,
+    'daily AQI for a city, 1 year (rollup)': """
+        SELECT bucket, min_value, max_value, mean_value, sample_count
+        FROM air_quality_daily
+        WHERE city_id = %(city_id)s AND metric = 'aqi'
+          AND bucket >= %(latest)s - INTERVAL '365 days'
+        ORDER BY bucket;
+    """,
+    'hourly AQI for a city, 30 days (rollup)': """
+        SELECT bucket, min_value, max_value, mean_value, p95_value
+        FROM air_quality_hourly
+        WHERE city_id = %(city_id)s AND metric = 'aqi'
+          AND bucket >= %(latest)s - INTERVAL '30 days'
+        ORDER BY bucket;
+    """,
+}
+
+# Too slow to execute on a large table; only planned
+PLAN_ONLY = {'predictor join (DATE_TRUNC, old)'}
+
+# Sequential scans reading fewer rows than this (e.g. empty partitions) are fine
+SEQ_SCAN_ROW_LIMIT = 1000
+
+def plan_nodes(node):
+    """Yield every node of a JSON plan tree"""
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+def explain(cursor, query, params, analyze=True):
+    """Run EXPLAIN and summarize the scans used"""
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    cursor.execute(f"EXPLAIN ({options}) {query}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    plan = plan[0]
+    
+    # Group partition scans under their parent table
+    scans = {}
+    seq_scans = []
+    for node in plan_nodes(plan['Plan']):
+        if 'Relation Name' not in node:
+            continue
+        
+        table = re.sub(r'_(y\d{4}m\d{2}|default)$', '', node['Relation Name'])
+        key = f"{node['Node Type']} on {table}"
+        scans[key] = scans.get(key, 0) + 1
+        
+        if node['Node Type'] == 'Seq Scan':
+            loops = node.get('Actual Loops', 1)
+            rows = node.get('Actual Rows', node['Plan Rows']) * loops \
+                + node.get('Rows Removed by Filter', 0) * loops
+            if rows >= SEQ_SCAN_ROW_LIMIT:
+                seq_scans.append(node['Relation Name'])
+    
+    return {
+        'scans': [f"{key} ({count} partitions)" if count > 1 else key for key, count in scans.items()],
+        'seq_scans': seq_scans,
+        'execution_ms': plan.get('Execution Time'),
+        'plan': plan
+    }
+
+def main():
+    """Print the access path and timing of each hot query"""
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot query paths")
+    parser.add_argument('--city', default='Delhi', help="city used by per-city queries")
+    parser.add_argument('--no-analyze', action='store_true', help="plan only, don't execute")
+    parser.add_argument('--verbose', action='store_true', help="print full JSON plans")
+    args = parser.parse_args()
+    
+    db = DatabaseOperations()
+    params = {'city_id': db.get_city_id(args.city)}
+    
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT MAX(timestamp) FROM air_quality;")
+        params['latest'] = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM air_quality;")
+        air_quality_rows = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM weather;")
+        weather_rows = cursor.fetchone()[0]
+        
+        print("=" * 70)
+        print("🔎 EXPLAIN BENCHMARK")
+        print("=" * 70)
+        print(f"air_quality: {air_quality_rows:,} rows | weather: {weather_rows:,} rows")
+        print("=" * 70)
+        
+        for name, query in QUERIES.items():
+            analyze = not args.no_analyze and name not in PLAN_ONLY
+            result = explain(cursor, query, params, analyze=analyze)
+            timing = f"{result['execution_ms']:.1f} ms" if result['execution_ms'] is not None else "not executed"
+            flag = "⚠️ " if result['seq_scans'] else "✓ "
+            
+            print(f"\n{flag}{name}: {timing}")
+            for scan in result['scans']:
+                print(f"    {scan}")
+            if args.verbose:
+                print(json.dumps(result['plan'], indent=2, default=str))
+        
+        connection.rollback()
+        cursor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor
+from src.preprocessing.features import FeatureStore
+import argparse
+import tempfile
+import time
+import warnings
+
+def timed(function):
+    """(result, seconds) of one call"""
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def main():
+    """Compare per-city feature building with the one-pass cross-city pipeline"""
+    parser = argparse.ArgumentParser(description="Benchmark per-city vs cross-city feature building")
+    parser.add_argument('--limit', type=int, default=2160, help="newest readings per city (2160 = 90 days hourly)")
+    args = parser.parse_args()
+    
+    # pandas warns about plain DBAPI connections
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    predictor = AQIPredictor()
+    cities = predictor.db.get_city_names()
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = FeatureStore(predictor.db, cache_dir=cache_dir)
+        
+        frames, loop_seconds = timed(lambda: [predictor.prepare_data(city, limit=args.limit, newest=True)
+                                              for city in cities])
+        frames = [frame for frame in frames if frame is not None]
+        loop_bytes = sum(frame.memory_usage(deep=True).sum() for frame in frames)
+        loop_rows = sum(len(frame) for frame in frames)
+        
+        df, build_seconds = timed(lambda: store.get_features(limit=args.limit))
+        _, cached_seconds = timed(lambda: store.get_features(limit=args.limit))
+        _, watermark_seconds = timed(store.watermark)
+        
+        print("=" * 70)
+        print("🧮 FEATURE PIPELINE BENCHMARK")
+        print("=" * 70)
+        print(f"{len(cities)} cities, newest {args.limit:,} readings each")
+        print(f"{'Pipeline':<34} {'Rows':>8} {'Time (s)':>10} {'Bytes/row':>10}")
+        print("-" * 70)
+        print(f"{'per-city queries + pandas':<34} {loop_rows:>8,} {loop_seconds:>10.3f} {loop_bytes / loop_rows:>10.0f}")
+        print(f"{'one query, groupby pass':<34} {len(df):>8,} {build_seconds:>10.3f} "
+              f"{df.memory_usage(deep=True).sum() / len(df):>10.0f}")
+        print(f"{'disk cache hit':<34} {len(df):>8,} {cached_seconds:>10.3f}")
+        print("-" * 70)
+        print(f"Cache check (watermark query): {watermark_seconds * 1000:.1f} ms")
+        print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, build_artifact, fit_model, split_data, model_path, save_artifact
+from src.models.compaction import as_flat, to_float32, prune_trees, distill, compare_variants
+from src.models.model_store import load_flat, read_metadata
+import argparse
+import tempfile
+import time
+import warnings
+import numpy as np
+
+def load_ms(path, runs):
+    """Best time to load a saved artifact"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        load_flat(path)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def main():
+    """Compare full and compact model variants for every city"""
+    parser = argparse.ArgumentParser(description="Benchmark compact model variants")
+    parser.add_argument('--distill-trees', type=int, default=50, help="stages of the distilled model")
+    parser.add_argument('--runs', type=int, default=20, help="loads per variant (best is kept)")
+    args = parser.parse_args()
+    
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    predictor = AQIPredictor()
+    results = {}
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for city in predictor.db.get_city_names():
+            df = predictor.prepare_data(city, limit=200, newest=True)
+            if df is None or len(df) < 10:
+                continue
+            
+            X_train, X_test, _, y_test = split_data(df)
+            fit = fit_model(df)
+            full = as_flat(fit['model'])
+            # Prune on the older half of the test rows and score on the newer half
+            half = len(y_test) // 2
+            variants = {
+                'full': full,
+                'float32': to_float32(full),
+                'pruned float32': to_float32(prune_trees(full, X_test.iloc[:half], y_test.iloc[:half])),
+                'distilled float32': to_float32(distill(full, X_train, args.distill_trees))
+            }
+            
+            artifact = build_artifact(city, fit, df)
+            for entry in compare_variants(variants, X_test.iloc[half:], y_test.iloc[half:]):
+                path = model_path(f"{city}_{entry['variant'].replace(' ', '_')}", directory)
+                save_artifact(dict(artifact, model=variants[entry['variant']]), path)
+                entry['disk_bytes'] = os.path.getsize(path) + os.path.getsize(
+                    os.path.join(directory, read_metadata(path)['nodes']))
+                entry['load_ms'] = load_ms(path, args.runs)
+                results.setdefault(entry['variant'], []).append(entry)
+    
+    if not results:
+        print("❌ No city has enough data to train")
+        return
+    
+    cities = len(results['full'])
+    print("=" * 78)
+    print("🗜️  MODEL COMPACTION BENCHMARK")
+    print("=" * 78)
+    print(f"{cities} cities, means per model; deltas against the full forest")
+    print(f"{'Variant':<18} {'Trees':>6} {'Disk (KB)':>10} {'Size':>6} {'Load (ms)':>10} "
+          f"{'Latency (ms)':>13} {'MAE':>6} {'ΔMAE':>6}")
+    print("-" * 78)
+    for variant, entries in results.items():
+        mean = lambda key: np.mean([entry[key] for entry in entries])
+        print(f"{variant:<18} {mean('trees'):>6.0f} {mean('disk_bytes') / 1024:>10.1f} "
+              f"{mean('size_ratio'):>6.0%} {mean('load_ms'):>10.2f} {mean('latency_ms'):>13.2f} "
+              f"{mean('mae'):>6.2f} {mean('mae_delta'):>+6.2f}")
+    print("=" * 78)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import FEATURE_COLUMNS, model_path, legacy_model_path, save_artifact
+from src.models.model_store import load_artifact, read_metadata
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import multiprocessing
+import tempfile
+import time
+import warnings
+import numpy as np
+
+def memory_kb():
+    """Private (anonymous) and file-backed resident memory of this process, in KiB"""
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('RssAnon:', 'RssFile:')):
+                key, value = line.split(':')
+                values[key] = int(value.split()[0])
+    return values['RssAnon'], values['RssFile']
+
+def artifact_bytes(path):
+    """Size on disk of an artifact, including its node file"""
+    size = os.path.getsize(path)
+    if not path.endswith('.pkl'):
+        size += os.path.getsize(os.path.join(os.path.dirname(path), read_metadata(path)['nodes']))
+    return size
+
+def measure(paths):
+    """Load every model and predict one row with each; run in a fresh process"""
+    warnings.filterwarnings('ignore')
+    row = np.zeros((1, len(FEATURE_COLUMNS)))
+    
+    anon_before, file_before = memory_kb()
+    started = time.perf_counter()
+    artifacts = [load_artifact(path) for path in paths]
+    load_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    for artifact in artifacts:
+        artifact['model'].predict(row)
+    predict_seconds = time.perf_counter() - started
+    anon_after, file_after = memory_kb()
+    
+    return {
+        'load_seconds': load_seconds,
+        'predict_seconds': predict_seconds,
+        'anon_kb': anon_after - anon_before,
+        'file_kb': file_after - file_before
+    }
+
+def run_fresh(paths, runs):
+    """Measure `runs` times, each in a newly spawned process; best time, mean memory"""
+    results = []
+    for _ in range(runs):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results.append(pool.submit(measure, paths).result())
+    
+    return {
+        'load_seconds': min(result['load_seconds'] for result in results),
+        'predict_seconds': min(result['predict_seconds'] for result in results),
+        'anon_kb': np.mean([result['anon_kb'] for result in results]),
+        'file_kb': np.mean([result['file_kb'] for result in results])
+    }
+
+def main():
+    """Compare cold loading of pickled and flat, memory-mapped model artifacts"""
+    parser = argparse.ArgumentParser(description="Benchmark pickled vs flat model artifacts")
+    parser.add_argument('--models-dir', default='data/models', help="directory with legacy .pkl models")
+    parser.add_argument('--runs', type=int, default=3, help="fresh processes per format (best time is kept)")
+    args = parser.parse_args()
+    
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    sources = sorted(name for name in os.listdir(args.models_dir) if name.endswith('.pkl'))
+    if not sources:
+        print(f"❌ No pickled models in {args.models_dir}")
+        return
+    
+    with tempfile.TemporaryDirectory() as directory:
+        formats = {'pickle': [], 'flat (mmap)': []}
+        for name in sources:
+            artifact = load_artifact(os.path.join(args.models_dir, name))
+            city = artifact['city']
+            for label, path in (('pickle', legacy_model_path(city, directory)),
+                                ('flat (mmap)', model_path(city, directory))):
+                save_artifact(artifact, path)
+                formats[label].append(path)
+        
+        print("=" * 70)
+        print("📦 MODEL LOADING BENCHMARK")
+        print("=" * 70)
+        print(f"{len(sources)} models, each format loaded in fresh processes")
+        print(f"{'Format':<12} {'Disk':>10} {'Load':>11} {'1st predict':>12} "
+              f"{'Private RSS':>12} {'Shared RSS':>11}")
+        print(f"{'':<12} {'(KB/model)':>10} {'(ms/model)':>11} {'(ms/model)':>12} {'(KB/model)':>12} {'(KB/model)':>11}")
+        print("-" * 70)
+        
+        for label, paths in formats.items():
+            disk_kb = sum(artifact_bytes(path) for path in paths) / 1024
+            result = run_fresh(paths, args.runs)
+            count = len(paths)
+            print(f"{label:<12} {disk_kb / count:>10.0f} {result['load_seconds'] * 1000 / count:>11.2f} "
+                  f"{result['predict_seconds'] * 1000 / count:>12.2f} {result['anon_kb'] / count:>12.0f} "
+                  f"{result['file_kb'] / count:>11.0f}")
+        
+        print("=" * 70)
+        print("Shared RSS is page cache mapped from the .npy files: every process")
+        print("serving the same model maps the same physical pages.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, FEATURE_COLUMNS, legacy_model_path
+from src.models.model_store import as_flat, load_artifact
+import argparse
+import time
+import warnings
+import numpy as np
+
+def per_call_ms(function, runs):
+    """Median wall time of one call, in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return np.median(timings) * 1000
+
+def main():
+    """Compare sklearn's predict with the vectorized flat evaluator"""
+    parser = argparse.ArgumentParser(description="Benchmark single-row and batch tree evaluation")
+    parser.add_argument('--runs', type=int, default=200, help="calls per measurement (median is kept)")
+    args = parser.parse_args()
+    
+    # Saved with an older scikit-learn; fitted with feature names, predicted with arrays
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    predictor = AQIPredictor()
+    models, rows = {}, {}
+    for city in predictor.db.get_city_names():
+        if os.path.exists(legacy_model_path(city)):
+            df = predictor.prepare_data(city, limit=200, newest=True)
+            models[city] = load_artifact(legacy_model_path(city))['model']
+            rows[city] = df[FEATURE_COLUMNS].to_numpy(float)
+    
+    if not models:
+        print("❌ No pickled sklearn models in data/models")
+        return
+    
+    flats = {city: as_flat(model) for city, model in models.items()}
+    city = next(iter(models))
+    for name in models:
+        assert np.allclose(flats[name].predict(rows[name]), models[name].predict(rows[name]))
+    
+    cases = {
+        'one row (API call)': (
+            lambda: models[city].predict(rows[city][:1]),
+            lambda: flats[city].predict(rows[city][:1])
+        ),
+        f'monitoring cycle ({len(models)} models x 1 row)': (
+            lambda: [models[name].predict(rows[name][:1]) for name in models],
+            lambda: [flats[name].predict(rows[name][:1]) for name in models]
+        ),
+        '100 rows, one model': (
+            lambda: models[city].predict(rows[city][:100]),
+            lambda: flats[city].predict(rows[city][:100])
+        )
+    }
+    
+    print("=" * 70)
+    print("🌲 TREE EVALUATOR BENCHMARK")
+    print("=" * 70)
+    print(f"{models[city].n_estimators} trees, max_depth {models[city].max_depth}, "
+          f"sklearn n_jobs={models[city].n_jobs}; predictions checked equal")
+    print(f"{'Case':<36} {'sklearn (ms)':>12} {'flat (ms)':>10} {'Speedup':>9}")
+    print("-" * 70)
+    for case, (sklearn_call, flat_call) in cases.items():
+        runs = max(10, args.runs // 10) if 'cycle' in case else args.runs
+        sklearn_ms = per_call_ms(sklearn_call, runs)
+        flat_ms = per_call_ms(flat_call, runs)
+        print(f"{case:<36} {sklearn_ms:>12.3f} {flat_ms:>10.3f} {sklearn_ms / flat_ms:>8.1f}x")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,19 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from src.database.db_operations import DatabaseOperations
+from src.database.rollups import RollupManager
 from src.models.aqi_predictor import AQIPredictor
 from datetime import datetime
 import psycopg2
+from psycopg2.extras import execute_values
 
 class AlertSystem:
     """Generate and manage air quality alerts"""
     
-    def __init__(self):
+    def __init__(self, predictor=None):
         self.db = DatabaseOperations()
-        self.predictor = AQIPredictor()
+        self.predictor = predictor or AQIPredictor()
+        self.rollups = RollupManager(db=self.db)
         
         # Alert thresholds
         self.WARNING_THRESHOLD = 150  # Moderate
@@ -72,28 +75,56 @@ class AlertSystem:
     def save_alert_to_db(self, city_name, alert_type, severity, aqi_value, message):
         """Save alert to database"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
             city_id = self.db.get_city_id(city_name)
             
-            insert_query = """
-                INSERT INTO alerts 
-                (city_id, alert_type, severity, aqi_value, message, sent_at)
-                VALUES (%s, %s, %s, %s, %s, %s);
-            """
+            with self.db.connection() as connection:
+                cursor = connection.cursor()
+                
+                insert_query = """
+                    INSERT INTO alerts 
+                    (city_id, alert_type, severity, aqi_value, message, sent_at)
+                    VALUES (%s, %s, %s, %s, %s, %s);
+                """
+                
+                cursor.execute(insert_query, (
+                    city_id, alert_type, severity, aqi_value, message, datetime.now()
+                ))
+                
+                connection.commit()
+                cursor.close()
             
-            cursor.execute(insert_query, (
-                city_id, alert_type, severity, aqi_value, message, datetime.now()
-            ))
+            return True
+        except Exception as e:
+            print(f"Error saving alert: {e}")
+            return False
+    
+    def save_alerts_to_db(self, alerts):
+        """Save many alerts in one insert"""
+        if not alerts:
+            return True
+        
+        try:
+            rows = [
+                (self.db.get_city_id(alert['city']), alert['alert_type'], alert['severity'],
+                 alert['aqi'], alert['health_message'], alert['timestamp'])
+                for alert in alerts
+            ]
             
-            connection.commit()
-            cursor.close()
-            connection.close()
+            with self.db.connection() as connection:
+                cursor = connection.cursor()
+                
+                execute_values(cursor, """
+                    INSERT INTO alerts 
+                    (city_id, alert_type, severity, aqi_value, message, sent_at)
+                    VALUES %s;
+                """, rows)
+                
+                connection.commit()
+                cursor.close()
             
             return True
         except Exception as e:
-            print(f"Error saving alert: {e}")
+            print(f"Error saving alerts: {e}")
             return False
     
     def check_city_alerts(self, city_name):
@@ -103,6 +134,38 @@ class AlertSystem:
         if not latest:
             return None
         
+        alert = self.build_alert(city_name, latest)
+        
+        if alert:
+            # Save to database
+            self.save_alert_to_db(
+                city_name, 
+                alert['alert_type'], 
+                alert['severity'], 
+                alert['aqi'], 
+                alert['health_message']
+            )
+        
+        return alert
+    
+    def check_all_alerts(self, readings=None):
+        """Check every city from one latest-readings query and save the alerts together"""
+        if readings is None:
+            readings = self.db.get_latest_readings()
+        
+        alerts = []
+        for latest in readings:
+            if latest['aqi'] is None:
+                continue
+            alert = self.build_alert(latest['city_name'], latest)
+            if alert:
+                alerts.append(alert)
+        
+        self.save_alerts_to_db(alerts)
+        return alerts
+    
+    def build_alert(self, city_name, latest):
+        """Build an alert from a latest reading, or None below the warning threshold"""
         aqi = latest['aqi']
         category, severity = self.get_aqi_category(aqi)
         
@@ -128,20 +191,11 @@ class AlertSystem:
             else:
                 alert['alert_type'] = 'WARNING'
             
-            # Save to database
-            self.save_alert_to_db(
-                city_name, 
-                alert['alert_type'], 
-                severity, 
-                aqi, 
-                alert['health_message']
-            )
-            
             return alert
         
         return None
     
-    def generate_all_alerts(self):
+    def generate_all_alerts(self, readings=None):
         """Generate alerts for all cities"""
         print("=" * 80)
         print("🚨 AIR QUALITY ALERT SYSTEM")
@@ -150,13 +204,7 @@ class AlertSystem:
         print("=" * 80)
         print()
         
-        cities = self.db.get_all_cities()
-        alerts = []
-        
-        for city in cities:
-            alert = self.check_city_alerts(city['city_name'])
-            if alert:
-                alerts.append(alert)
+        alerts = self.check_all_alerts(readings)
         
         if not alerts:
             print("✅ NO ALERTS - All cities have acceptable air quality levels!")
@@ -207,11 +255,10 @@ class AlertSystem:
         print(f"{'City':<15} {'AQI':<8} {'Category':<15} {'Status':<12} {'Alert Level'}")
         print("-" * 80)
         
-        cities = self.db.get_all_cities()
+        readings = self.db.get_latest_readings()
         
-        for city in cities:
-            latest = self.db.get_latest_aqi(city['city_name'])
-            if latest:
+        for latest in readings:
+            if latest['aqi'] is not None:
                 aqi = latest['aqi']
                 category, severity = self.get_aqi_category(aqi)
                 
@@ -228,14 +275,26 @@ class AlertSystem:
                     status = "🆘 Severe"
                     alert_level = "Severe Alert"
                 
-                print(f"{city['city_name']:<15} {aqi:<8} {category:<15} {status:<12} {alert_level}")
+                print(f"{latest['city_name']:<15} {aqi:<8} {category:<15} {status:<12} {alert_level}")
+        
+        print("=" * 80)
+        
+        # Last 24 hours, from the hourly rollups
+        print("\n📈 LAST 24 HOURS")
+        print("-" * 80)
+        print(f"{'City':<15} {'Mean':<8} {'Min':<8} {'Max':<8} {'Samples'}")
+        print("-" * 80)
+        
+        for summary in self.rollups.summarize_cities(hours=24):
+            print(f"{summary['city_name']:<15} {summary['mean']:<8.0f} {summary['min']:<8.0f} "
+                  f"{summary['max']:<8.0f} {summary['count']}")
         
         print("=" * 80)
         
         # Generate alerts
         print("\n🚨 ACTIVE ALERTS")
         print("=" * 80)
-        alerts = self.generate_all_alerts()
+        alerts = self.generate_all_alerts(readings)
         
         # Predictions
         print("\n🔮 AQI PREDICTIONS (Next Period)")
@@ -243,17 +302,20 @@ class AlertSystem:
         print(f"{'City':<15} {'Current':<10} {'Predicted':<12} {'Change':<10} {'Trend'}")
         print("-" * 80)
         
-        for city in cities:
-            try:
-                self.predictor.load_model(city['city_name'])
-                prediction = self.predictor.predict_next_aqi(city['city_name'])
-                
-                if prediction:
-                    trend = "↑ Worsening" if prediction['change'] > 5 else "↓ Improving" if prediction['change'] < -5 else "→ Stable"
-                    change_str = f"{prediction['change']:+d}"
-                    print(f"{city['city_name']:<15} {prediction['current_aqi']:<10} {prediction['predicted_aqi']:<12} {change_str:<10} {trend}")
-            except:
-                print(f"{city['city_name']:<15} {'N/A':<10} {'N/A':<12} {'N/A':<10} N/A")
+        try:
+            predictions = {row['city']: row for row in self.predictor.predict_batch().to_dict('records')}
+        except Exception:
+            predictions = {}
+        
+        for city in self.db.get_city_names():
+            prediction = predictions.get(city)
+            
+            if prediction:
+                trend = "↑ Worsening" if prediction['change'] > 5 else "↓ Improving" if prediction['change'] < -5 else "→ Stable"
+                change_str = f"{prediction['change']:+d}"
+                print(f"{city:<15} {prediction['current_aqi']:<10} {prediction['predicted_aqi']:<12} {change_str:<10} {trend}")
+            else:
+                print(f"{city:<15} {'N/A':<10} {'N/A':<12} {'N/A':<10} N/A")
         
         print("=" * 80)
         print("\n✅ REPORT GENERATED SUCCESSFULLY")
@@ -3,6 +3,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.database.db_operations import DatabaseOperations
+from psycopg2.extras import RealDictCursor
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -20,14 +21,11 @@ class DataAnalyzer:
         print(f"{'City':<15} {'AQI':<8} {'Category':<15} {'PM2.5':<10} {'PM10':<10}")
         print("-" * 70)
         
-        cities = self.db.get_all_cities()
-        
-        for city in cities:
-            latest = self.db.get_latest_aqi(city['city_name'])
-            if latest:
+        for latest in self.db.get_latest_readings():
+            if latest['aqi'] is not None:
                 aqi = latest['aqi']
                 category = self.get_aqi_category(aqi)
-                print(f"{city['city_name']:<15} {aqi:<8} {category:<15} {latest['pm25']:<10.1f} {latest['pm10']:<10.1f}")
+                print(f"{latest['city_name']:<15} {aqi:<8} {category:<15} {latest['pm25']:<10.1f} {latest['pm10']:<10.1f}")
         
         print("=" * 70)
     
@@ -54,109 +52,114 @@ class DataAnalyzer:
         print(f"{'City':<15} {'Temp(°C)':<12} {'Humidity(%)':<15} {'Wind(m/s)':<12}")
         print("-" * 70)
         
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        
-        query = """
-            SELECT c.city_name, w.temperature, w.humidity, w.wind_speed
-            FROM weather w
-            JOIN cities c ON w.city_id = c.city_id
-            WHERE w.timestamp = (
-                SELECT MAX(timestamp) 
-                FROM weather w2 
-                WHERE w2.city_id = w.city_id
-            )
-            ORDER BY c.city_name;
-        """
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        for row in results:
-            city, temp, humidity, wind = row
-            print(f"{city:<15} {temp:<12.1f} {humidity:<15} {wind:<12.1f}")
-        
-        cursor.close()
-        connection.close()
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            
+            query = """
+                SELECT c.city_name, lr.temperature, lr.humidity, lr.wind_speed
+                FROM latest_readings lr
+                JOIN cities c ON lr.city_id = c.city_id
+                WHERE lr.weather_timestamp IS NOT NULL
+                ORDER BY c.city_name;
+            """
+            
+            cursor.execute(query)
+            results = cursor.fetchall()
+            
+            for row in results:
+                city, temp, humidity, wind = row
+                print(f"{city:<15} {temp:<12.1f} {humidity:<15} {wind:<12.1f}")
+            
+            cursor.close()
         
         print("=" * 70)
     
-    def get_pollution_statistics(self):
-        """Get pollution statistics"""
-        print("\n" + "=" * 70)
-        print("📈 POLLUTION STATISTICS")
-        print("=" * 70)
-        
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        
-        # Most polluted city
-        query = """
-            SELECT c.city_name, aq.aqi
-            FROM air_quality aq
-            JOIN cities c ON aq.city_id = c.city_id
-            WHERE aq.timestamp = (
-                SELECT MAX(timestamp) 
-                FROM air_quality aq2 
-                WHERE aq2.city_id = aq.city_id
-            )
-            ORDER BY aq.aqi DESC
-            LIMIT 1;
-        """
-        cursor.execute(query)
-        most_polluted = cursor.fetchone()
-        
-        # Least polluted city
-        query = """
-            SELECT c.city_name, aq.aqi
-            FROM air_quality aq
-            JOIN cities c ON aq.city_id = c.city_id
-            WHERE aq.timestamp = (
-                SELECT MAX(timestamp) 
-                FROM air_quality aq2 
-                WHERE aq2.city_id = aq.city_id
-            )
-            ORDER BY aq.aqi ASC
-            LIMIT 1;
-        """
-        cursor.execute(query)
-        least_polluted = cursor.fetchone()
+    def get_pollution_statistics(self, show=True):
+        """Get pollution statistics for the latest readings in one query
         
-        # Average AQI
-        query = """
-            SELECT AVG(aq.aqi)
-            FROM air_quality aq
-            WHERE aq.timestamp = (
-                SELECT MAX(timestamp) 
-                FROM air_quality aq2 
-                WHERE aq2.city_id = aq.city_id
-            );
+        Returns a dict with the most and least polluted cities, mean,
+        median and 90th/95th percentile AQI, the count above 200 and the
+        number of cities per AQI category. Prints a summary if `show`.
         """
-        cursor.execute(query)
-        avg_aqi = cursor.fetchone()[0]
-        
-        # Cities with dangerous AQI (>200)
         query = """
-            SELECT COUNT(DISTINCT c.city_name)
-            FROM air_quality aq
-            JOIN cities c ON aq.city_id = c.city_id
-            WHERE aq.aqi > 200
-            AND aq.timestamp = (
-                SELECT MAX(timestamp) 
-                FROM air_quality aq2 
-                WHERE aq2.city_id = aq.city_id
-            );
+            SELECT
+                COUNT(lr.aqi) AS city_count,
+                MAX(lr.aqi_timestamp) AS as_of,
+                (ARRAY_AGG(c.city_name ORDER BY lr.aqi DESC) FILTER (WHERE lr.aqi IS NOT NULL))[1]
+                    AS most_polluted_city,
+                MAX(lr.aqi) AS max_aqi,
+                (ARRAY_AGG(c.city_name ORDER BY lr.aqi ASC) FILTER (WHERE lr.aqi IS NOT NULL))[1]
+                    AS least_polluted_city,
+                MIN(lr.aqi) AS min_aqi,
+                AVG(lr.aqi) AS average_aqi,
+                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY lr.aqi) AS median_aqi,
+                PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY lr.aqi) AS p90_aqi,
+                PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY lr.aqi) AS p95_aqi,
+                COUNT(*) FILTER (WHERE lr.aqi > 200) AS dangerous_count,
+                COUNT(*) FILTER (WHERE lr.aqi <= 50) AS good,
+                COUNT(*) FILTER (WHERE lr.aqi > 50 AND lr.aqi <= 100) AS satisfactory,
+                COUNT(*) FILTER (WHERE lr.aqi > 100 AND lr.aqi <= 200) AS moderate,
+                COUNT(*) FILTER (WHERE lr.aqi > 200 AND lr.aqi <= 300) AS poor,
+                COUNT(*) FILTER (WHERE lr.aqi > 300 AND lr.aqi <= 400) AS very_poor,
+                COUNT(*) FILTER (WHERE lr.aqi > 400) AS severe
+            FROM latest_readings lr
+            JOIN cities c ON lr.city_id = c.city_id;
         """
-        cursor.execute(query)
-        dangerous_count = cursor.fetchone()[0]
         
-        cursor.close()
-        connection.close()
+        with self.db.connection() as connection:
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(query)
+            row = cursor.fetchone()
+            cursor.close()
+        
+        def as_float(value):
+            return float(value) if value is not None else None
+        
+        stats = {
+            'city_count': row['city_count'],
+            'as_of': row['as_of'],
+            'most_polluted': {'city': row['most_polluted_city'], 'aqi': row['max_aqi']},
+            'least_polluted': {'city': row['least_polluted_city'], 'aqi': row['min_aqi']},
+            'average_aqi': as_float(row['average_aqi']),
+            'median_aqi': as_float(row['median_aqi']),
+            'p90_aqi': as_float(row['p90_aqi']),
+            'p95_aqi': as_float(row['p95_aqi']),
+            'dangerous_count': row['dangerous_count'],
+            'categories': {
+                'Good': row['good'],
+                'Satisfactory': row['satisfactory'],
+                'Moderate': row['moderate'],
+                'Poor': row['poor'],
+                'Very Poor': row['very_poor'],
+                'Severe': row['severe']
+            }
+        }
+        
+        if show:
+            self.print_pollution_statistics(stats)
+        
+        return stats
+    
+    def print_pollution_statistics(self, stats):
+        """Print statistics returned by get_pollution_statistics"""
+        print("\n" + "=" * 70)
+        print("📈 POLLUTION STATISTICS")
+        print("=" * 70)
         
-        print(f"🔴 Most Polluted: {most_polluted[0]} (AQI: {most_polluted[1]})")
-        print(f"🟢 Least Polluted: {least_polluted[0]} (AQI: {least_polluted[1]})")
-        print(f"📊 Average AQI: {avg_aqi:.1f}")
-        print(f"⚠️  Cities with Dangerous AQI (>200): {dangerous_count}")
+        if not stats['city_count']:
+            print("No air quality data available")
+            print("=" * 70)
+            return
+        
+        most, least = stats['most_polluted'], stats['least_polluted']
+        print(f"🔴 Most Polluted: {most['city']} (AQI: {most['aqi']})")
+        print(f"🟢 Least Polluted: {least['city']} (AQI: {least['aqi']})")
+        print(f"📊 Average AQI: {stats['average_aqi']:.1f}")
+        print(f"📊 Median AQI: {stats['median_aqi']:.1f} | P90: {stats['p90_aqi']:.1f} | P95: {stats['p95_aqi']:.1f}")
+        print(f"⚠️  Cities with Dangerous AQI (>200): {stats['dangerous_count']}")
+        print("-" * 70)
+        for category, count in stats['categories'].items():
+            print(f"{category:<15} {count:>3} {'█' * count}")
         print("=" * 70)
     
     def show_health_alerts(self):
@@ -165,17 +168,15 @@ class DataAnalyzer:
         print("🚨 HEALTH ALERTS")
         print("=" * 70)
         
-        cities = self.db.get_all_cities()
         alerts_found = False
         
-        for city in cities:
-            latest = self.db.get_latest_aqi(city['city_name'])
-            if latest and latest['aqi'] > 200:
+        for latest in self.db.get_latest_readings():
+            if latest['aqi'] is not None and latest['aqi'] > 200:
                 alerts_found = True
                 category = self.get_aqi_category(latest['aqi'])
                 advice = self.get_health_advice(latest['aqi'])
                 
-                print(f"\n⚠️  ALERT: {city['city_name']}")
+                print(f"\n⚠️  ALERT: {latest['city_name']}")
                 print(f"   AQI: {latest['aqi']} ({category})")
                 print(f"   {advice}")
         
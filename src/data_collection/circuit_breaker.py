@@ -0,0 +1,170 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import random
+import threading
+import time
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker for one upstream service
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused without touching the network. The open period grows
+    exponentially (with jitter) each time the circuit re-trips, and never
+    ends before an upstream Retry-After. Once it expires the circuit is
+    half-open: a single probe call decides whether it closes again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name, failure_threshold=3, base_backoff=30, max_backoff=900,
+                 jitter=0.2, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.clock = clock
+        
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._consecutive_trips = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        
+        self.stats_counters = {
+            'trips': 0,
+            'successes': 0,
+            'failures': 0,
+            'rejected': 0
+        }
+    
+    @property
+    def state(self):
+        """Current state; an expired open circuit reports half-open"""
+        with self._lock:
+            return self._current_state()
+    
+    def _current_state(self):
+        if self._state == self.OPEN and self.clock() >= self._open_until:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+    
+    def retry_in(self):
+        """Seconds until the circuit allows a probe (0 if not open)"""
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - self.clock())
+    
+    def allow_request(self):
+        """Return True if a call may go to the upstream now"""
+        with self._lock:
+            state = self._current_state()
+            
+            if state == self.CLOSED:
+                return True
+            
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            
+            self.stats_counters['rejected'] += 1
+            return False
+    
+    def record_success(self):
+        """A call succeeded: close the circuit and reset the backoff"""
+        with self._lock:
+            self.stats_counters['successes'] += 1
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._consecutive_trips = 0
+            self._probe_in_flight = False
+    
+    def release_probe(self):
+        """A call ended without saying anything about the upstream (a local
+        error); free the half-open probe slot so another call can probe"""
+        with self._lock:
+            if self._current_state() == self.HALF_OPEN:
+                self._probe_in_flight = False
+    
+    def record_failure(self, retry_after=None):
+        """A call failed; trip the circuit at the threshold or on a failed probe"""
+        with self._lock:
+            self.stats_counters['failures'] += 1
+            self._consecutive_failures += 1
+            state = self._current_state()
+            
+            if state == self.OPEN:
+                # Late failures from calls already in flight don't re-trip
+                if retry_after is not None:
+                    self._open_until = max(self._open_until, self.clock() + retry_after)
+                return
+            
+            if state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold \
+                    or retry_after is not None:
+                self._trip(retry_after)
+    
+    def _trip(self, retry_after=None):
+        """Open the circuit (lock held)"""
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** self._consecutive_trips)
+        backoff *= 1 + random.uniform(-self.jitter, self.jitter)
+        
+        if retry_after is not None:
+            backoff = max(backoff, retry_after)
+        
+        self._state = self.OPEN
+        self._open_until = self.clock() + backoff
+        self._consecutive_trips += 1
+        self._probe_in_flight = False
+        self.stats_counters['trips'] += 1
+    
+    def stats(self):
+        """Return state, trip count and call counters for operators"""
+        with self._lock:
+            state = self._current_state()
+            stats = dict(self.stats_counters)
+            stats.update({
+                'name': self.name,
+                'state': state,
+                'consecutive_failures': self._consecutive_failures,
+                'retry_in': max(0.0, self._open_until - self.clock()) if state == self.OPEN else 0.0
+            })
+        return stats
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name, **options):
+    """Return the process-wide breaker for an upstream, creating it once"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **options)
+        return _breakers[name]
+
+def all_breaker_stats():
+    """Stats for every upstream breaker in the process"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.stats() for breaker in breakers]
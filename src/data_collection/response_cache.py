@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+
+class ResponseCache:
+    """TTL cache for upstream responses, with an optional on-disk layer
+    
+    Entries younger than `ttl` seconds are served as fresh hits. Older
+    entries are kept for up to `max_stale` seconds so they can stand in
+    while the upstream is unavailable. With `path` set, entries are
+    persisted as JSON so a restarted process can reuse recent responses.
+    """
+    
+    def __init__(self, ttl=600, path=None, max_stale=21600, clock=time.time):
+        self.ttl = ttl
+        self.path = path
+        self.max_stale = max_stale
+        self.clock = clock
+        
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (stored_at, value)
+        self._dirty = False
+        
+        self.counters = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'stores': 0}
+        
+        if self.path:
+            self._load()
+    
+    def _load(self):
+        """Read persisted entries, ignoring a missing or corrupt file"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        now = self.clock()
+        for key, entry in data.items():
+            if now - entry['stored_at'] <= self.max_stale:
+                self._entries[key] = (entry['stored_at'], entry['value'])
+    
+    def get(self, key):
+        """Return a fresh value or None; counts a hit or a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] <= self.ttl:
+                self.counters['hits'] += 1
+                return entry[1]
+            
+            self.counters['misses'] += 1
+            return None
+    
+    def get_stale(self, key):
+        """Return a value up to `max_stale` seconds old, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] <= self.max_stale:
+                self.counters['stale_hits'] += 1
+                return entry[1]
+            return None
+    
+    def age(self, key):
+        """Seconds since a key was stored, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return self.clock() - entry[0] if entry is not None else None
+    
+    def put(self, key, value):
+        """Store a value; call flush() to persist it"""
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._dirty = True
+            self.counters['stores'] += 1
+    
+    def flush(self):
+        """Write entries to disk atomically if anything changed"""
+        if not self.path:
+            return
+        
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                key: {'stored_at': stored_at, 'value': value}
+                for key, (stored_at, value) in self._entries.items()
+            }
+            self._dirty = False
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+    
+    def stats(self):
+        """Return hit/miss counters and hit rate"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+        
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
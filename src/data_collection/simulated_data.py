@@ -1,118 +1,216 @@
-import random
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
 from datetime import datetime
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.database.db_operations import DatabaseOperations
-import psycopg2
+
+# Typical annual-mean conditions; unknown cities fall back to the defaults
+BASE_TEMPERATURES = {
+    'Delhi': 28, 'Mumbai': 32, 'Kolkata': 30,
+    'Chennai': 34, 'Bangalore': 26, 'Hyderabad': 29,
+    'Pune': 27, 'Ahmedabad': 31
+}
+BASE_AQI = {
+    'Delhi': 280, 'Mumbai': 155, 'Kolkata': 195,
+    'Chennai': 130, 'Bangalore': 110, 'Hyderabad': 145,
+    'Pune': 120, 'Ahmedabad': 175
+}
+DEFAULT_TEMPERATURE = 29
+DEFAULT_AQI = 150
+
+# AR(1) noise processes: name -> (correlation time in hours, stationary std dev)
+NOISE_PROCESSES = {
+    'temperature': (12.0, 1.5),
+    'humidity': (8.0, 6.0),
+    'wind_speed': (6.0, 2.5),
+    'pressure': (24.0, 2.0),
+    'pollution': (18.0, 0.12),
+    'no2': (4.0, 0.15),
+    'so2': (12.0, 0.2),
+    'co': (6.0, 0.2),
+    'o3': (6.0, 0.15)
+}
+
+WEATHER_KEYS = ('city', 'temperature', 'humidity', 'wind_speed', 'pressure')
+AQI_KEYS = ('city', 'aqi', 'pm25', 'pm10', 'no2', 'so2', 'co', 'o3')
 
 class SimulatedDataCollector:
     """Simulate air quality and weather data for testing"""
     
-    def __init__(self):
+    def __init__(self, seed=None):
         self.db = DatabaseOperations()
-        self.cities = [
-            'Delhi', 'Mumbai', 'Kolkata', 'Chennai',
-            'Bangalore', 'Hyderabad', 'Pune', 'Ahmedabad'
-        ]
+        self.rng = np.random.default_rng(seed)
+        self._noise_state = None
+        self._pending = {}   # city -> [weather, aqi] halves of a tick not yet handed out
+    
+    @property
+    def cities(self):
+        """Cities to simulate, taken from the city registry"""
+        return self.db.get_city_names()
+    
+    def _ar_noise(self, n_steps, cities, step_hours):
+        """Draw autocorrelated noise for every process, shape (steps, cities)
+        
+        The last value of each process is kept so consecutive calls (live
+        ticks or backfill chunks) continue the same series.
+        """
+        state = self._noise_state
+        if state is None or state['cities'] != tuple(cities):
+            state = None
+        
+        noise = {}
+        last_values = {}
+        
+        for name, (tau, sigma) in NOISE_PROCESSES.items():
+            phi = np.exp(-step_hours / tau)
+            
+            if state is not None:
+                previous = state['values'][name]
+            else:
+                previous = self.rng.normal(0, sigma, len(cities))
+            
+            shocks = self.rng.normal(0, sigma * np.sqrt(1 - phi ** 2), (n_steps, len(cities)))
+            values, _ = lfilter([1.0], [1.0, -phi], shocks, axis=0, zi=(phi * previous)[None, :])
+            
+            noise[name] = values
+            last_values[name] = values[-1]
+        
+        self._noise_state = {'cities': tuple(cities), 'values': last_values}
+        return noise
+    
+    def simulate(self, timestamps, cities=None):
+        """Generate readings for every (timestamp, city) pair at once
+        
+        Models diurnal and seasonal cycles, autocorrelated noise and the
+        weather/pollutant coupling (wind disperses, winter inversions trap).
+        Returns a long DataFrame ordered by timestamp, then city.
+        """
+        cities = list(cities) if cities is not None else self.cities
+        times = pd.DatetimeIndex(pd.to_datetime(list(timestamps)))
+        n_steps, n_cities = len(times), len(cities)
+        
+        if n_steps > 1:
+            step_hours = float(np.median(np.diff(times.asi8))) / 3.6e12
+        else:
+            step_hours = 1.0
+        step_hours = max(step_hours, 1e-3)
+        
+        noise = self._ar_noise(n_steps, cities, step_hours)
+        
+        # Calendar terms, shape (steps, 1) so they broadcast across cities
+        hour = (times.hour + times.minute / 60).to_numpy(dtype=float)[:, None]
+        day_of_year = times.dayofyear.to_numpy(dtype=float)[:, None]
+        
+        hot_season = np.cos(2 * np.pi * (day_of_year - 135) / 365.25)   # +1 mid-May
+        winter = np.cos(2 * np.pi * (day_of_year - 15) / 365.25)        # +1 mid-January
+        monsoon = np.exp(-((day_of_year - 210) / 35) ** 2)              # peaks late July
+        afternoon = np.cos(2 * np.pi * (hour - 15) / 24)                # +1 at 15:00
+        traffic = np.exp(-((hour - 9) / 2) ** 2) + np.exp(-((hour - 20) / 2.5) ** 2)
+        
+        base_temperature = np.array([BASE_TEMPERATURES.get(c, DEFAULT_TEMPERATURE) for c in cities], dtype=float)
+        base_aqi = np.array([BASE_AQI.get(c, DEFAULT_AQI) for c in cities], dtype=float)
+        
+        # Weather
+        temperature = base_temperature + 5 * hot_season + 4 * afternoon + noise['temperature']
+        humidity = np.clip(55 + 25 * monsoon - 12 * afternoon + noise['humidity'], 15, 100)
+        wind_speed = np.clip(10 + 4 * afternoon + 3 * monsoon + noise['wind_speed'], 0.5, None)
+        pressure = 1012 - 5 * hot_season + noise['pressure']
+        
+        # Pollution: higher in winter and at rush hour, lower with wind and rain,
+        # lower in the afternoon when the mixing layer is deepest
+        wind_anomaly = wind_speed - 10
+        log_aqi = (
+            np.log(base_aqi)
+            + 0.3 * winter - 0.25 * monsoon
+            + 0.12 * traffic - 0.1 * afternoon
+            - 0.035 * wind_anomaly
+            + noise['pollution']
+        )
+        aqi = np.clip(np.exp(log_aqi), 10, 500).round()
+        
+        shape = (n_steps, n_cities)
+        pm25 = np.clip(aqi * 0.5 + self.rng.normal(0, 4, shape), 1, None)
+        pm10 = np.clip(aqi * 0.7 + self.rng.normal(0, 6, shape), 1, None)
+        no2 = 45 * np.exp(0.35 * traffic - 0.02 * wind_anomaly + noise['no2'])
+        so2 = 17 * np.exp(0.15 * winter + noise['so2'])
+        co = 1.5 * np.exp(0.3 * winter + 0.3 * traffic - 0.02 * wind_anomaly + noise['co'])
+        o3 = 60 * np.exp(0.35 * afternoon + 0.01 * (temperature - base_temperature) + noise['o3'])
+        
+        return pd.DataFrame({
+            'timestamp': np.repeat(times.to_numpy(), n_cities),
+            'city': np.tile(np.array(cities, dtype=object), n_steps),
+            'aqi': aqi.ravel().astype(np.int64),
+            'pm25': pm25.ravel().round(2),
+            'pm10': pm10.ravel().round(2),
+            'no2': no2.ravel().round(2),
+            'so2': so2.ravel().round(2),
+            'co': co.ravel().round(2),
+            'o3': o3.ravel().round(2),
+            'temperature': temperature.ravel().round(2),
+            'humidity': humidity.ravel().round().astype(np.int64),
+            'wind_speed': wind_speed.ravel().round(2),
+            'pressure': pressure.ravel().round(2)
+        })
+    
+    def generate_reading(self, city, timestamp):
+        """Generate one combined weather + AQI reading"""
+        reading = self.simulate([timestamp], [city]).iloc[0].to_dict()
+        reading['timestamp'] = timestamp
+        return reading
+    
+    def generate_readings(self, city, timestamp=None):
+        """(weather, aqi) records split from one simulated reading"""
+        reading = self.generate_reading(city, timestamp or datetime.now())
+        return {key: reading[key] for key in WEATHER_KEYS}, {key: reading[key] for key in AQI_KEYS}
+    
+    def _next_half(self, city, index):
+        """Weather (0) or AQI (1) half of a tick
+        
+        The other half is kept for its own call, so a weather + AQI pair
+        comes from one simulate() step and keeps their coupling.
+        """
+        pending = self._pending.pop(city, None)
+        if pending is None or pending[index] is None:
+            pending = list(self.generate_readings(city))
+        
+        half, pending[index] = pending[index], None
+        if any(pending):
+            self._pending[city] = pending
+        return half
     
     def generate_weather_data(self, city):
         """Generate realistic weather data"""
-        base_temps = {
-            'Delhi': 28, 'Mumbai': 32, 'Kolkata': 30,
-            'Chennai': 34, 'Bangalore': 26, 'Hyderabad': 29,
-            'Pune': 27, 'Ahmedabad': 31
-        }
-        
-        return {
-            'city': city,
-            'temperature': base_temps[city] + random.uniform(-3, 3),
-            'humidity': random.randint(40, 80),
-            'wind_speed': random.uniform(5, 20),
-            'pressure': random.uniform(1010, 1020)
-        }
+        return self._next_half(city, 0)
     
     def generate_aqi_data(self, city):
         """Generate realistic AQI data"""
-        base_aqi = {
-            'Delhi': 280, 'Mumbai': 155, 'Kolkata': 195,
-            'Chennai': 130, 'Bangalore': 110, 'Hyderabad': 145,
-            'Pune': 120, 'Ahmedabad': 175
-        }
-        
-        aqi = base_aqi[city] + random.randint(-20, 20)
-        pm25 = aqi * 0.5 + random.uniform(-10, 10)
-        pm10 = aqi * 0.7 + random.uniform(-15, 15)
-        
-        return {
-            'city': city,
-            'aqi': aqi,
-            'pm25': pm25,
-            'pm10': pm10,
-            'no2': random.uniform(30, 60),
-            'so2': random.uniform(10, 25),
-            'co': random.uniform(0.8, 2.5),
-            'o3': random.uniform(40, 80)
-        }
+        return self._next_half(city, 1)
     
     def insert_data_with_matching_timestamp(self, city, timestamp):
         """Insert both weather and AQI data with the same timestamp"""
-        try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            city_id = self.db.get_city_id(city)
-            
-            if not city_id:
-                print(f"City {city} not found")
-                return False
-            
-            # Generate data
-            weather = self.generate_weather_data(city)
-            aqi = self.generate_aqi_data(city)
-            
-            # Insert weather data
-            weather_query = """
-                INSERT INTO weather 
-                (city_id, timestamp, temperature, humidity, wind_speed, pressure)
-                VALUES (%s, %s, %s, %s, %s, %s);
-            """
-            cursor.execute(weather_query, (
-                city_id, timestamp, weather['temperature'], 
-                weather['humidity'], weather['wind_speed'], weather['pressure']
-            ))
-            
-            # Insert AQI data with same timestamp
-            aqi_query = """
-                INSERT INTO air_quality 
-                (city_id, timestamp, aqi, pm25, pm10, no2, so2, co, o3, data_source)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (city_id, timestamp) DO NOTHING;
-            """
-            cursor.execute(aqi_query, (
-                city_id, timestamp, int(aqi['aqi']), aqi['pm25'], 
-                aqi['pm10'], aqi['no2'], aqi['so2'], aqi['co'], 
-                aqi['o3'], 'simulated'
-            ))
-            
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error: {e}")
+        if not self.db.get_city_id(city):
+            print(f"City {city} not found")
             return False
+        
+        result = self.db.insert_readings_batch(
+            self.simulate([timestamp], [city]), source='simulated'
+        )
+        return result is not None
     
     def collect_all_data(self):
-        """Collect simulated data for all cities"""
+        """Collect simulated data for all cities as a single batch"""
         timestamp = datetime.now()
         
-        for city in self.cities:
-            success = self.insert_data_with_matching_timestamp(city, timestamp)
-            if not success:
-                print(f"❌ Failed for {city}")
+        readings = self.simulate([timestamp])
+        result = self.db.insert_readings_batch(readings, source='simulated')
+        
+        if result is None:
+            print(f"❌ Failed to store batch of {len(readings)} readings")
+        
+        return result
 
 if __name__ == "__main__":
     collector = SimulatedDataCollector()
@@ -123,4 +221,4 @@ if __name__ == "__main__":
     
     collector.collect_all_data()
     
-    print("✅ Data collection complete!")
\ No newline at end of file
+    print("✅ Data collection complete!")
@@ -0,0 +1,134 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+
+class StubWeatherServer:
+    """Local stand-in for OpenWeatherMap's /data/2.5/weather endpoint
+    
+    Serves deterministic, plausible observations per city so collectors can
+    be exercised and benchmarked offline. `latency` (seconds) and
+    `failure_rate` simulate a slow or flaky upstream; failed responses carry
+    `retry_after` as a Retry-After header when set.
+    """
+    
+    path = '/data/2.5/weather'
+    
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, status_code=503,
+                 retry_after=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'   # keep-alive, like the real API
+            
+            def do_GET(self):
+                stub.handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        """Base URL to pass to WeatherCollector"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+    
+    def observation(self, query):
+        """Build a response body for a query (by name or coordinates)"""
+        name = query.get('q', [''])[0].split(',')[0]
+        key = name or f"{query.get('lat', ['0'])[0]},{query.get('lon', ['0'])[0]}"
+        seed = zlib.crc32(key.encode())
+        
+        # Stable per city, drifting slowly over the day
+        drift = (time.time() % 86400) / 86400
+        return {
+            'coord': {'lat': float(query.get('lat', [0])[0]), 'lon': float(query.get('lon', [0])[0])},
+            'weather': [{'id': 721, 'main': 'Haze', 'description': 'haze', 'icon': '50d'}],
+            'main': {
+                'temp': round(20 + seed % 15 + 3 * drift, 2),
+                'feels_like': round(21 + seed % 15, 2),
+                'pressure': 1005 + seed % 15,
+                'humidity': 35 + seed % 50
+            },
+            'wind': {'speed': round(2 + (seed % 80) / 10, 2), 'deg': seed % 360},
+            'dt': int(time.time()),
+            'name': name or 'Stub Station',
+            'cod': 200
+        }
+    
+    def handle(self, request):
+        """Serve one GET request"""
+        with self._lock:
+            self.requests_served += 1
+        
+        if self.latency:
+            time.sleep(self.latency)
+        
+        parsed = urlparse(request.path)
+        query = parse_qs(parsed.query)
+        
+        if parsed.path != self.path:
+            status, body = 404, {'cod': '404', 'message': 'Internal error'}
+        elif 'appid' not in query:
+            status, body = 401, {'cod': 401, 'message': 'Invalid API key.'}
+        elif self.failure_rate and random.random() < self.failure_rate:
+            status, body = self.status_code, {'cod': self.status_code, 'message': 'Service unavailable'}
+        else:
+            status, body = 200, self.observation(query)
+        
+        payload = json.dumps(body).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json; charset=utf-8')
+        if status != 200 and self.retry_after is not None:
+            request.send_header('Retry-After', str(self.retry_after))
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+    
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Shut the server down"""
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local OpenWeatherMap stub")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds of delay per request")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of requests that fail")
+    args = parser.parse_args()
+    
+    stub = StubWeatherServer(port=args.port, latency=args.latency, failure_rate=args.failure_rate)
+    print(f"🌤️  Stub weather API at {stub.url}")
+    print(f"Set OPENWEATHER_BASE_URL={stub.url} to use it")
+    
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
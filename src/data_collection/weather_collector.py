@@ -1,59 +1,259 @@
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
 import os
+import threading
 from dotenv import load_dotenv
 from datetime import datetime
+import time
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.database.db_operations import DatabaseOperations
+from src.data_collection.circuit_breaker import CircuitBreaker, get_circuit_breaker, parse_retry_after
+from src.data_collection.response_cache import ResponseCache
 
 load_dotenv('config/.env')
 
 class WeatherCollector:
     """Collect weather data from OpenWeatherMap API"""
     
-    def __init__(self):
+    def __init__(self, base_url=None, max_workers=None, cycle_deadline=None):
         self.api_key = os.getenv('OPENWEATHER_API_KEY')
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        self.base_url = base_url or os.getenv(
+            'OPENWEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5/weather"
+        )
         self.db = DatabaseOperations()
         
-        self.cities = [
-            'Delhi', 'Mumbai', 'Kolkata', 'Chennai',
-            'Bangalore', 'Hyderabad', 'Pune', 'Ahmedabad'
-        ]
+        self.max_workers = max_workers or int(os.getenv('WEATHER_MAX_WORKERS', 8))
+        self.request_timeout = float(os.getenv('WEATHER_REQUEST_TIMEOUT', 10))
+        self.cycle_deadline = cycle_deadline or float(os.getenv('WEATHER_CYCLE_DEADLINE', 30))
+        
+        # One keep-alive session shared by all worker threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Observations change slowly; reuse recent responses instead of refetching
+        self.cache = ResponseCache(
+            ttl=float(os.getenv('WEATHER_CACHE_TTL', 600)),
+            path=os.getenv('WEATHER_CACHE_PATH') or None,
+            max_stale=float(os.getenv('WEATHER_CACHE_MAX_STALE', 21600))
+        )
+        
+        self.latencies = {}   # city -> seconds taken by the last fetch
+        self.dropped = []     # cities abandoned at the last cycle deadline
+        
+        # Bumped when a cycle starts and when it ends; fetches still running
+        # from an earlier cycle see a different value and discard their results
+        self.cycle = 0
+        self._cycle_lock = threading.Lock()
+        
+        # One breaker per upstream host, shared by every collector in the process
+        self.breaker = get_circuit_breaker(
+            urlparse(self.base_url).netloc,
+            failure_threshold=int(os.getenv('WEATHER_BREAKER_THRESHOLD', 3)),
+            base_backoff=float(os.getenv('WEATHER_BREAKER_BACKOFF', 30)),
+            max_backoff=float(os.getenv('WEATHER_BREAKER_MAX_BACKOFF', 900))
+        )
+    
+    @property
+    def cities(self):
+        """Cities to collect, taken from the city registry"""
+        return self.db.get_city_names()
+    
+    def build_params(self, city):
+        """Build the query parameters for a city"""
+        params = {
+            'appid': self.api_key,
+            'units': 'metric'  # For Celsius
+        }
+        
+        # Prefer coordinates from the cities table; names can be ambiguous
+        city_row = self.db.city_registry.get(city)
+        if city_row and city_row.get('latitude') is not None:
+            params['lat'] = float(city_row['latitude'])
+            params['lon'] = float(city_row['longitude'])
+        else:
+            params['q'] = f'{city},IN'
+        
+        return params
+    
+    def parse_weather(self, city, data, source='api'):
+        """Turn an API response body into a weather reading"""
+        return {
+            'city': city,
+            'temperature': data['main']['temp'],
+            'humidity': data['main']['humidity'],
+            'pressure': data['main']['pressure'],
+            'wind_speed': data['wind']['speed'],
+            'wind_direction': data['wind'].get('deg', 0),
+            'description': data['weather'][0]['description'],
+            'timestamp': datetime.now(),
+            'source': source
+        }
+    
+    def from_cache(self, city, stale=False):
+        """Serve a city from the response cache, or None"""
+        data = self.cache.get_stale(city) if stale else self.cache.get(city)
+        if data is None:
+            return None
+        
+        weather = self.parse_weather(city, data, source='stale' if stale else 'cache')
+        weather['cache_age'] = self.cache.age(city)
+        return weather
+    
+    def record_latency(self, city, latency, cycle=None):
+        """Store a fetch's latency unless its cycle has already ended"""
+        with self._cycle_lock:
+            if cycle is None or cycle == self.cycle:
+                self.latencies[city] = latency
     
-    def fetch_weather(self, city):
-        """Fetch weather data for a specific city"""
+    def fetch_weather(self, city, params=None, use_cache=True, cycle=None, deadline=None):
+        """Fetch weather data for a specific city
+        
+        Fresh cached responses are returned without a request. If the
+        upstream is unavailable, a stale cached response is used instead.
+        Fetches made for a `fetch_all` cycle pass its `cycle` and
+        `deadline`; results arriving after the cycle ended are discarded.
+        """
+        if use_cache:
+            weather = self.from_cache(city)
+            if weather:
+                self.record_latency(city, 0.0, cycle)
+                return weather
+        
+        if not self.breaker.allow_request():
+            # Circuit open: fail fast instead of waiting on a dead upstream
+            self.record_latency(city, None, cycle)
+            return self.from_cache(city, stale=True)
+        
+        started = time.perf_counter()
+        recorded = False
         try:
-            params = {
-                'q': f'{city},IN',
-                'appid': self.api_key,
-                'units': 'metric'  # For Celsius
-            }
+            if params is None:
+                params = self.build_params(city)
+            
+            # Never wait past the cycle deadline
+            timeout = self.request_timeout
+            if deadline is not None:
+                timeout = max(min(timeout, deadline - time.perf_counter()), 0.001)
+            
+            response = self.session.get(self.base_url, params=params, timeout=timeout)
+            
+            # Rate limits and server errors count against the upstream;
+            # other client errors (bad city, bad key) don't
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure(parse_retry_after(response.headers.get('Retry-After')))
+            else:
+                self.breaker.record_success()
+            recorded = True
             
-            response = requests.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
-            
-            weather_info = {
-                'city': city,
-                'temperature': data['main']['temp'],
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'wind_speed': data['wind']['speed'],
-                'wind_direction': data['wind'].get('deg', 0),
-                'description': data['weather'][0]['description'],
-                'timestamp': datetime.now()
-            }
+            weather_info = self.parse_weather(city, data)
+            with self._cycle_lock:
+                if cycle is None or cycle == self.cycle:
+                    self.cache.put(city, data)
+            if cycle is None:
+                # fetch_all flushes once per cycle; a standalone fetch persists itself
+                self.cache.flush()
             
             return weather_info
-            
+        
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self.breaker.record_failure()
+            recorded = True
+            print(f"❌ Error fetching weather for {city}: {e}")
+            return self.from_cache(city, stale=True)
+        except requests.exceptions.HTTPError as e:
+            print(f"❌ Error fetching weather for {city}: {e}")
+            if e.response is not None and (e.response.status_code == 429 or e.response.status_code >= 500):
+                return self.from_cache(city, stale=True)
+            return None
         except requests.exceptions.RequestException as e:
             print(f"❌ Error fetching weather for {city}: {e}")
             return None
         except KeyError as e:
             print(f"❌ Error parsing weather data for {city}: {e}")
             return None
+        finally:
+            # Errors that say nothing about the upstream (bad params, bad
+            # payload, anything unexpected) must not hold the probe slot
+            if not recorded:
+                self.breaker.release_probe()
+            self.record_latency(city, time.perf_counter() - started, cycle)
+    
+    def fetch_all(self, cities):
+        """Fetch many cities concurrently within the cycle deadline
+        
+        Returns {city: weather or None}. Fresh cache hits skip the network;
+        cities still in flight when the deadline passes are dropped and
+        listed in `self.dropped`.
+        """
+        with self._cycle_lock:
+            self.cycle += 1
+            cycle = self.cycle
+        
+        results = {city: None for city in cities}
+        self.dropped = []
+        
+        pending = []
+        for city in cities:
+            results[city] = self.from_cache(city)
+            if results[city]:
+                self.latencies[city] = 0.0
+            else:
+                pending.append(city)
+        cities = pending
+        
+        if self.breaker.state == CircuitBreaker.OPEN:
+            for city in cities:
+                self.latencies[city] = None
+                results[city] = self.from_cache(city, stale=True)
+            return results
+        
+        # Resolve parameters up front so worker threads only do HTTP
+        params = {city: self.build_params(city) for city in cities}
+        
+        # A half-open circuit gets one probe before the rest of the cycle
+        if self.breaker.state == CircuitBreaker.HALF_OPEN and cities:
+            probe, cities = cities[0], cities[1:]
+            results[probe] = self.fetch_weather(probe, params[probe], use_cache=False, cycle=cycle)
+            
+            if self.breaker.state != CircuitBreaker.CLOSED:
+                for city in cities:
+                    results[city] = self.from_cache(city, stale=True)
+                return results
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='weather')
+        deadline = time.perf_counter() + self.cycle_deadline
+        futures = {
+            executor.submit(self.fetch_weather, city, params[city], False, cycle, deadline): city
+            for city in cities
+        }
+        
+        done, not_done = wait(futures, timeout=self.cycle_deadline)
+        
+        # End the cycle: stragglers can no longer touch latencies or the cache
+        with self._cycle_lock:
+            self.cycle += 1
+        
+        for future in done:
+            results[futures[future]] = future.result()
+        
+        self.dropped = sorted(futures[future] for future in not_done)
+        for city in self.dropped:
+            self.latencies[city] = None
+            results[city] = self.from_cache(city, stale=True)
+        
+        # Don't wait for stragglers; their requests time out at the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        self.cache.flush()
+        return results
     
     def collect_all_cities(self):
         """Collect weather data for all cities"""
@@ -65,37 +265,60 @@ class WeatherCollector:
         
         collected = 0
         failed = 0
+        cities = self.cities
+        readings = []
         
-        for city in self.cities:
-            print(f"Fetching weather for {city}...", end=" ")
+        if self.breaker.state == CircuitBreaker.OPEN:
+            print(f"⚡ Circuit open for {self.breaker.name} "
+                  f"(retry in {self.breaker.retry_in():.0f}s) - serving cache only")
+            print()
+        
+        started = time.perf_counter()
+        results = self.fetch_all(cities)
+        elapsed = time.perf_counter() - started
+        
+        for city in cities:
+            weather = results[city]
+            latency = self.latencies.get(city)
+            latency_str = f"{latency * 1000:.0f} ms" if latency is not None else "dropped"
             
-            weather = self.fetch_weather(city)
+            print(f"Fetching weather for {city}...", end=" ")
             
-            if weather:
-                # Store in database
-                success = self.db.insert_weather_data(
-                    city_name=city,
-                    temperature=weather['temperature'],
-                    humidity=weather['humidity'],
-                    wind_speed=weather['wind_speed'],
-                    pressure=weather['pressure']
-                )
-                
-                if success:
-                    print(f"✓ {weather['temperature']}°C, {weather['humidity']}% humidity")
-                    collected += 1
-                else:
-                    print("❌ Failed to store in database")
-                    failed += 1
+            if weather and weather['source'] == 'api':
+                print(f"✓ {weather['temperature']}°C, {weather['humidity']}% humidity ({latency_str})")
+                readings.append(weather)
+            elif weather and weather['source'] == 'cache':
+                # Already stored when it was fetched
+                print(f"✓ {weather['temperature']}°C (cached {weather['cache_age']:.0f}s ago)")
+                collected += 1
+            elif weather:
+                # Stale observations are usable but not new data
+                print(f"⚠️  {weather['temperature']}°C (stale, {weather['cache_age']:.0f}s old)")
+                failed += 1
             else:
-                print("❌ Failed to fetch")
+                print(f"❌ Failed to fetch ({latency_str})")
                 failed += 1
         
+        # Store the whole cycle in one transaction
+        if readings:
+            result = self.db.insert_readings_batch(readings)
+            
+            if result:
+                collected += result['weather']['inserted']
+                failed += len(readings) - result['weather']['inserted']
+            else:
+                print("❌ Failed to store in database")
+                failed += len(readings)
+        
         print()
         print("=" * 60)
         print(f"✅ Collection Complete!")
-        print(f"   Collected: {collected}/{len(self.cities)}")
-        print(f"   Failed: {failed}/{len(self.cities)}")
+        print(f"   Collected: {collected}/{len(cities)}")
+        print(f"   Failed: {failed}/{len(cities)}")
+        print(f"   Fetch time: {elapsed:.2f}s ({self.max_workers} workers)")
+        cache_stats = self.cache.stats()
+        print(f"   Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['stale_hits']} stale")
         print("=" * 60)
         
         return collected, failed
@@ -0,0 +1,98 @@
+from psycopg2.extras import RealDictCursor
+import threading
+import time
+
+
+class CityRegistry:
+    """In-process cache of the cities table with O(1) name <-> id lookups"""
+    
+    def __init__(self, pool, ttl=3600, miss_refresh_interval=30):
+        self.pool = pool
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        
+        self._lock = threading.Lock()
+        self._rows = []
+        self._by_name = {}
+        self._by_id = {}
+        self._loaded_at = None
+        self._last_miss_refresh = 0.0
+        
+        self.stats = {'loads': 0, 'hits': 0, 'misses': 0}
+    
+    def refresh(self):
+        """Reload all cities from the database"""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("SELECT * FROM cities ORDER BY city_name;")
+            rows = [dict(row) for row in cursor.fetchall()]
+            cursor.close()
+        
+        by_name = {row['city_name']: row for row in rows}
+        by_id = {row['city_id']: row for row in rows}
+        
+        with self._lock:
+            self._rows = rows
+            self._by_name = by_name
+            self._by_id = by_id
+            self._loaded_at = time.monotonic()
+            self.stats['loads'] += 1
+    
+    def _ensure_loaded(self):
+        """Load on first use and reload once the TTL has expired"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or (self.ttl is not None and time.monotonic() - loaded_at > self.ttl):
+            self.refresh()
+    
+    def _lookup(self, index_name, key):
+        """Look a key up, refreshing once (rate limited) if it is unknown"""
+        self._ensure_loaded()
+        row = getattr(self, index_name).get(key)
+        
+        if row is None and time.monotonic() - self._last_miss_refresh > self.miss_refresh_interval:
+            # A city may have been added since the last load
+            self._last_miss_refresh = time.monotonic()
+            self.refresh()
+            row = getattr(self, index_name).get(key)
+        
+        self.stats['hits' if row is not None else 'misses'] += 1
+        return row
+    
+    def get_id(self, city_name):
+        """Return city_id for a city name, or None if unknown"""
+        row = self._lookup('_by_name', city_name)
+        return row['city_id'] if row else None
+    
+    def get_name(self, city_id):
+        """Return city name for a city_id, or None if unknown"""
+        row = self._lookup('_by_id', city_id)
+        return row['city_name'] if row else None
+    
+    def get(self, city_name):
+        """Return the full cities row for a city name"""
+        row = self._lookup('_by_name', city_name)
+        return dict(row) if row else None
+    
+    def all(self):
+        """Return all city rows ordered by name"""
+        self._ensure_loaded()
+        return [dict(row) for row in self._rows]
+    
+    def names(self):
+        """Return all city names ordered by name"""
+        self._ensure_loaded()
+        return [row['city_name'] for row in self._rows]
+
+
+_shared_registries = {}
+_shared_registries_lock = threading.Lock()
+
+
+def get_shared_registry(pool, **options):
+    """Return the process-wide registry bound to a connection pool"""
+    with _shared_registries_lock:
+        registry = _shared_registries.get(id(pool))
+        if registry is None or registry.pool is not pool:
+            registry = CityRegistry(pool, **options)
+            _shared_registries[id(pool)] = registry
+        return registry
@@ -0,0 +1,246 @@
+import psycopg2
+from psycopg2 import extensions
+from contextlib import contextmanager
+import threading
+import time
+import os
+
+
+class PoolError(Exception):
+    """Raised when a connection cannot be checked out of the pool"""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of PostgreSQL connections"""
+    
+    def __init__(self, connection_params, min_size=1, max_size=10, timeout=30,
+                 health_check_interval=60, max_idle=300):
+        self.connection_params = connection_params
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle = max_idle
+        
+        self._idle = []      # (connection, last_used) pairs, most recent last
+        self._size = 0       # open connections, idle + checked out
+        self._closed = False
+        self._condition = threading.Condition()
+        
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_check_failures': 0
+        }
+    
+    def _connect(self):
+        """Open a new server connection"""
+        connection = psycopg2.connect(**self.connection_params)
+        with self._condition:
+            self._stats['connections_created'] += 1
+        return connection
+    
+    def _close(self, connection):
+        """Close a connection and release its slot"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        
+        with self._condition:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._condition.notify()
+    
+    def _is_healthy(self, connection, last_used):
+        """Check that an idle connection is still usable"""
+        if connection.closed:
+            return False
+        
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+    
+    def _trim_idle(self):
+        """Close connections above min_size that sat idle too long (lock held)"""
+        now = time.monotonic()
+        expired = []
+        
+        while len(self._idle) > 0 and self._size - len(expired) > self.min_size:
+            connection, last_used = self._idle[0]
+            if now - last_used < self.max_idle:
+                break
+            expired.append(self._idle.pop(0)[0])
+        
+        return expired
+    
+    def getconn(self):
+        """Check a connection out of the pool, waiting up to `timeout` seconds"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection, last_used = None, None
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolError(
+                        f"No connection available after {self.timeout}s "
+                        f"(max_size={self.max_size})"
+                    )
+                
+                waited = True
+                self._condition.wait(remaining)
+        
+        try:
+            if connection is not None and not self._is_healthy(connection, last_used):
+                with self._condition:
+                    self._stats['health_check_failures'] += 1
+                    self._stats['connections_discarded'] += 1
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                connection = None
+            
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        
+        wait_time = time.monotonic() - start
+        with self._condition:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+            self._stats['total_wait_time'] += wait_time
+            self._stats['max_wait_time'] = max(self._stats['max_wait_time'], wait_time)
+        
+        return connection
+    
+    def putconn(self, connection, discard=False):
+        """Return a connection to the pool, discarding it if it is broken"""
+        if not discard and not connection.closed:
+            try:
+                status = connection.info.transaction_status
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                if connection.autocommit:
+                    connection.autocommit = False
+            except psycopg2.Error:
+                discard = True
+        
+        if discard or connection.closed:
+            self._close(connection)
+            return
+        
+        with self._condition:
+            if self._closed:
+                expired = [connection]
+            else:
+                self._idle.append((connection, time.monotonic()))
+                expired = self._trim_idle()
+            self._condition.notify()
+        
+        for stale in expired:
+            self._close(stale)
+    
+    @contextmanager
+    def connection(self):
+        """Context-managed checkout; uncommitted work is rolled back on return"""
+        connection = self.getconn()
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+    
+    def warm_up(self):
+        """Open connections until min_size are available"""
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            
+            with self._condition:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+    
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['min_size'] = self.min_size
+            stats['max_size'] = self.max_size
+        
+        checkouts = stats['checkouts']
+        stats['avg_wait_time'] = stats['total_wait_time'] / checkouts if checkouts else 0.0
+        return stats
+    
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle = []
+            self._condition.notify_all()
+        
+        for connection in idle:
+            self._close(connection)
+
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+
+def get_shared_pool(connection_params, **options):
+    """Return the process-wide pool for these connection parameters"""
+    # Keyed by pid as well so forked workers never share parent sockets
+    key = (os.getpid(),) + tuple(sorted((k, str(v)) for k, v in connection_params.items()))
+    
+    with _shared_pools_lock:
+        pool = _shared_pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(connection_params, **options)
+            _shared_pools[key] = pool
+        return pool
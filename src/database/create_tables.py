@@ -1,6 +1,9 @@
 import psycopg2
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.database.migrations import apply_migrations
 
 # Load environment variables
 load_dotenv('config/.env')
@@ -127,6 +130,10 @@ def create_database_tables():
         print("\n✅ All tables created successfully!")
         print(f"✅ {len(cities_data)} cities added to database")
         
+        # Bring the schema up to the latest version
+        print("\nApplying migrations...")
+        apply_migrations(connection)
+        
         # Close connection
         cursor.close()
         connection.close()
@@ -1,11 +1,82 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 import os
+import io
+import sys
 from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.database.connection_pool import get_shared_pool
+from src.database.city_registry import get_shared_registry
 
 load_dotenv('config/.env')
 
+AIR_QUALITY_FIELDS = ('aqi', 'pm25', 'pm10', 'no2', 'so2', 'co', 'o3')
+WEATHER_FIELDS = ('temperature', 'humidity', 'wind_speed', 'pressure')
+
+# Writers hold this advisory lock shared while inserting into air_quality;
+# RollupManager takes it exclusively to find the ids no open transaction
+# can still add rows below
+READINGS_WRITE_LOCK_ID = 420018
+
+# Weather is keyed on (city_id, timestamp): a rerun overwrites changed values
+# and leaves identical rows untouched. Partitioned tables can't return xmax,
+# so inserts are told apart by created_at, which only a new row gets set to
+# the current transaction's start time.
+WEATHER_UPSERT = """
+    ON CONFLICT (city_id, timestamp) DO UPDATE SET
+        temperature = EXCLUDED.temperature,
+        humidity = EXCLUDED.humidity,
+        wind_speed = EXCLUDED.wind_speed,
+        pressure = EXCLUDED.pressure
+    WHERE (weather.temperature, weather.humidity, weather.wind_speed, weather.pressure)
+        IS DISTINCT FROM (EXCLUDED.temperature, EXCLUDED.humidity, EXCLUDED.wind_speed, EXCLUDED.pressure)
+    RETURNING (created_at = CURRENT_TIMESTAMP) AS inserted
+"""
+
+# latest_readings holds the newest air quality and weather values per city.
+# Writers move it forward only; older or duplicate air quality rows never
+# replace what is there, while a weather upsert for the same timestamp does.
+LATEST_AIR_QUALITY_COLUMNS = ('city_id', 'aqi_timestamp') + AIR_QUALITY_FIELDS + ('data_source',)
+LATEST_AIR_QUALITY_UPSERT = """
+    ON CONFLICT (city_id) DO UPDATE SET
+        aqi_timestamp = EXCLUDED.aqi_timestamp,
+        aqi = EXCLUDED.aqi,
+        pm25 = EXCLUDED.pm25,
+        pm10 = EXCLUDED.pm10,
+        no2 = EXCLUDED.no2,
+        so2 = EXCLUDED.so2,
+        co = EXCLUDED.co,
+        o3 = EXCLUDED.o3,
+        data_source = EXCLUDED.data_source,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE latest_readings.aqi_timestamp IS NULL
+        OR EXCLUDED.aqi_timestamp > latest_readings.aqi_timestamp
+"""
+
+LATEST_WEATHER_COLUMNS = ('city_id', 'weather_timestamp') + WEATHER_FIELDS
+LATEST_WEATHER_UPSERT = """
+    ON CONFLICT (city_id) DO UPDATE SET
+        weather_timestamp = EXCLUDED.weather_timestamp,
+        temperature = EXCLUDED.temperature,
+        humidity = EXCLUDED.humidity,
+        wind_speed = EXCLUDED.wind_speed,
+        pressure = EXCLUDED.pressure,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE latest_readings.weather_timestamp IS NULL
+        OR EXCLUDED.weather_timestamp >= latest_readings.weather_timestamp
+"""
+
+def _to_db_value(value):
+    """Convert numpy/pandas scalars and NaN to plain Python values"""
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
 class DatabaseOperations:
     """Handle all database operations"""
     
@@ -17,66 +88,69 @@ class DatabaseOperations:
             'user': os.getenv('DB_USER'),
             'password': os.getenv('DB_PASSWORD')
         }
+        
+        # Every DatabaseOperations in the process shares one bounded pool
+        self.pool = get_shared_pool(
+            self.connection_params,
+            min_size=int(os.getenv('DB_POOL_MIN', 1)),
+            max_size=int(os.getenv('DB_POOL_MAX', 10)),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+            health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 60))
+        )
+        
+        # Cities rarely change, so name <-> id lookups are served from memory
+        self.city_registry = get_shared_registry(
+            self.pool,
+            ttl=float(os.getenv('CITY_REGISTRY_TTL', 3600))
+        )
     
     def get_connection(self):
-        """Create and return database connection"""
+        """Create and return a new, unpooled database connection"""
         return psycopg2.connect(**self.connection_params)
     
+    def connection(self):
+        """Check out a pooled connection: `with db.connection() as connection:`"""
+        return self.pool.connection()
+    
+    def pool_stats(self):
+        """Return connection pool counters (checkouts, waits, max wait time...)"""
+        return self.pool.stats()
+    
     def get_city_id(self, city_name):
         """Get city_id from city name"""
-        connection = self.get_connection()
-        cursor = connection.cursor()
-        
-        cursor.execute(
-            "SELECT city_id FROM cities WHERE city_name = %s",
-            (city_name,)
-        )
-        result = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
-        return result[0] if result else None
+        return self.city_registry.get_id(city_name)
+    
+    def get_city_name(self, city_id):
+        """Get city name from city_id"""
+        return self.city_registry.get_name(city_id)
+    
+    def refresh_cities(self):
+        """Reload the city registry after the cities table changes"""
+        self.city_registry.refresh()
     
     def insert_air_quality_data(self, city_name, aqi, pm25, pm10, no2=None, so2=None, co=None, o3=None, source='manual'):
         """Insert air quality measurement"""
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
             city_id = self.get_city_id(city_name)
             
             if not city_id:
                 print(f"City {city_name} not found in database")
                 return False
             
-            insert_query = """
-                INSERT INTO air_quality 
-                (city_id, timestamp, aqi, pm25, pm10, no2, so2, co, o3, data_source)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (city_id, timestamp) DO NOTHING;
-            """
-            
-            cursor.execute(insert_query, (
-                city_id,
-                datetime.now(),
-                aqi,
-                pm25,
-                pm10,
-                no2,
-                so2,
-                co,
-                o3,
-                source
-            ))
+            row = (city_id, datetime.now(), aqi, pm25, pm10, no2, so2, co, o3, source)
             
-            connection.commit()
-            cursor.close()
-            connection.close()
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                
+                self._bulk_insert_air_quality_rows(cursor, [row])
+                self._update_latest_air_quality(cursor, [row])
+                
+                connection.commit()
+                cursor.close()
             
             print(f"✓ Air quality data inserted for {city_name}")
             return True
-            
+        
         except Exception as e:
             print(f"❌ Error inserting data: {e}")
             return False
@@ -84,68 +158,353 @@ class DatabaseOperations:
     def insert_weather_data(self, city_name, temperature, humidity, wind_speed, pressure):
         """Insert weather data"""
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
             city_id = self.get_city_id(city_name)
             
-            insert_query = """
-                INSERT INTO weather 
-                (city_id, timestamp, temperature, humidity, wind_speed, pressure)
-                VALUES (%s, %s, %s, %s, %s, %s);
-            """
+            if not city_id:
+                print(f"City {city_name} not found in database")
+                return False
             
-            cursor.execute(insert_query, (
-                city_id,
-                datetime.now(),
-                temperature,
-                humidity,
-                wind_speed,
-                pressure
-            ))
+            row = (city_id, datetime.now(), temperature, humidity, wind_speed, pressure)
             
-            connection.commit()
-            cursor.close()
-            connection.close()
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                
+                self._bulk_upsert_weather_rows(cursor, [row])
+                self._update_latest_weather(cursor, [row])
+                
+                connection.commit()
+                cursor.close()
             
             print(f"✓ Weather data inserted for {city_name}")
             return True
-            
+        
         except Exception as e:
             print(f"❌ Error inserting weather data: {e}")
             return False
     
-    def get_latest_aqi(self, city_name):
-        """Get latest AQI for a city"""
-        connection = self.get_connection()
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
+    def _normalize_readings(self, readings, source):
+        """Resolve cities and split readings into air quality and weather rows"""
+        if hasattr(readings, 'to_dict'):
+            readings = readings.to_dict('records')
         
-        city_id = self.get_city_id(city_name)
+        air_quality_rows = []
+        weather_rows = []
+        unknown = 0
         
-        query = """
-            SELECT * FROM air_quality
-            WHERE city_id = %s
-            ORDER BY timestamp DESC
-            LIMIT 1;
+        for reading in readings:
+            city_id = _to_db_value(reading.get('city_id')) or self.get_city_id(reading.get('city'))
+            if not city_id:
+                unknown += 1
+                continue
+            
+            timestamp = reading.get('timestamp') or datetime.now()
+            if hasattr(timestamp, 'to_pydatetime'):
+                timestamp = timestamp.to_pydatetime()
+            
+            # DataFrame rows carry NaN rather than None for missing values
+            aqi = _to_db_value(reading.get('aqi'))
+            if aqi is not None:
+                air_quality_rows.append(
+                    (int(city_id), timestamp, int(round(aqi)))
+                    + tuple(_to_db_value(reading.get(field)) for field in AIR_QUALITY_FIELDS[1:])
+                    + (reading.get('data_source', source),)
+                )
+            
+            if _to_db_value(reading.get('temperature')) is not None:
+                weather_rows.append(
+                    (int(city_id), timestamp)
+                    + tuple(_to_db_value(reading.get(field)) for field in WEATHER_FIELDS)
+                )
+        
+        return air_quality_rows, weather_rows, unknown
+    
+    def _lock_readings_for_write(self, cursor):
+        """Hold the shared readings write lock until the transaction ends"""
+        cursor.execute("SELECT pg_advisory_xact_lock_shared(%s);", (READINGS_WRITE_LOCK_ID,))
+    
+    def _bulk_insert_air_quality_rows(self, cursor, rows, page_size=1000):
+        """Multi-row insert into air_quality; returns (inserted, skipped)"""
+        if not rows:
+            return 0, 0
+        
+        self._lock_readings_for_write(cursor)
+        insert_query = """
+            INSERT INTO air_quality 
+            (city_id, timestamp, aqi, pm25, pm10, no2, so2, co, o3, data_source)
+            VALUES %s
+            ON CONFLICT (city_id, timestamp) DO NOTHING
+            RETURNING 1;
+        """
+        inserted = len(execute_values(cursor, insert_query, rows, page_size=page_size, fetch=True))
+        return inserted, len(rows) - inserted
+    
+    def _bulk_upsert_weather_rows(self, cursor, rows, page_size=1000):
+        """Multi-row upsert into weather; returns (inserted, updated, skipped)"""
+        if not rows:
+            return 0, 0, 0
+        
+        # One statement can't update a row twice; the last reading per key wins
+        unique_rows = list({(row[0], row[1]): row for row in rows}.values())
+        
+        insert_query = f"""
+            INSERT INTO weather 
+            (city_id, timestamp, temperature, humidity, wind_speed, pressure)
+            VALUES %s
+            {WEATHER_UPSERT};
         """
+        flags = execute_values(cursor, insert_query, unique_rows, page_size=page_size, fetch=True)
+        inserted = sum(1 for (flag,) in flags if flag)
+        updated = len(flags) - inserted
+        return inserted, updated, len(rows) - inserted - updated
+    
+    def _newest_per_city(self, rows):
+        """Keep the row with the latest timestamp for each city_id"""
+        newest = {}
+        for row in rows:
+            if row[0] not in newest or row[1] > newest[row[0]][1]:
+                newest[row[0]] = row
+        return list(newest.values())
+    
+    def _update_latest_air_quality(self, cursor, rows):
+        """Move latest_readings forward with air quality rows"""
+        if not rows:
+            return
+        
+        execute_values(cursor, f"""
+            INSERT INTO latest_readings ({', '.join(LATEST_AIR_QUALITY_COLUMNS)})
+            VALUES %s
+            {LATEST_AIR_QUALITY_UPSERT};
+        """, self._newest_per_city(rows))
+    
+    def _update_latest_weather(self, cursor, rows):
+        """Move latest_readings forward with weather rows"""
+        if not rows:
+            return
+        
+        execute_values(cursor, f"""
+            INSERT INTO latest_readings ({', '.join(LATEST_WEATHER_COLUMNS)})
+            VALUES %s
+            {LATEST_WEATHER_UPSERT};
+        """, self._newest_per_city(rows))
+    
+    def insert_readings_batch(self, readings, source='manual'):
+        """Insert many readings (list of dicts or DataFrame) in one transaction
+        
+        Each reading needs `city` or `city_id` and may carry `timestamp`,
+        air quality fields (aqi, pm25, ...) and/or weather fields
+        (temperature, humidity, ...). Returns inserted/skipped counts per
+        table; weather rows that already existed with other values are
+        updated and counted separately.
+        """
+        result = {
+            'air_quality': {'inserted': 0, 'skipped': 0},
+            'weather': {'inserted': 0, 'updated': 0, 'skipped': 0},
+            'unknown_cities': 0
+        }
+        
+        try:
+            air_quality_rows, weather_rows, unknown = self._normalize_readings(readings, source)
+            result['unknown_cities'] = unknown
+            
+            if not air_quality_rows and not weather_rows:
+                return result
+            
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                
+                inserted, skipped = self._bulk_insert_air_quality_rows(cursor, air_quality_rows)
+                result['air_quality'] = {'inserted': inserted, 'skipped': skipped}
+                
+                inserted, updated, skipped = self._bulk_upsert_weather_rows(cursor, weather_rows)
+                result['weather'] = {'inserted': inserted, 'updated': updated, 'skipped': skipped}
+                
+                self._update_latest_air_quality(cursor, air_quality_rows)
+                self._update_latest_weather(cursor, weather_rows)
+                
+                connection.commit()
+                cursor.close()
+            
+            return result
         
-        cursor.execute(query, (city_id,))
-        result = cursor.fetchone()
+        except Exception as e:
+            print(f"❌ Error inserting batch: {e}")
+            return None
+    
+    def bulk_insert_air_quality(self, readings, source='manual'):
+        """Insert many air quality readings; weather fields are ignored"""
+        if hasattr(readings, 'to_dict'):
+            readings = readings.to_dict('records')
         
-        cursor.close()
-        connection.close()
+        readings = [{k: v for k, v in reading.items() if k not in WEATHER_FIELDS} for reading in readings]
+        result = self.insert_readings_batch(readings, source)
+        return result['air_quality'] if result else None
+    
+    def bulk_insert_weather(self, readings):
+        """Insert many weather readings; air quality fields are ignored"""
+        if hasattr(readings, 'to_dict'):
+            readings = readings.to_dict('records')
+        
+        readings = [{k: v for k, v in reading.items() if k not in AIR_QUALITY_FIELDS} for reading in readings]
+        result = self.insert_readings_batch(readings)
+        return result['weather'] if result else None
+    
+    def copy_readings(self, frame, source='backfill'):
+        """Stream a DataFrame of readings into Postgres with COPY
+        
+        `frame` needs city_id and timestamp columns plus the air quality
+        and weather fields. Rows go through temp staging tables so the
+        usual ON CONFLICT rules still apply. Returns the same counts as
+        insert_readings_batch.
+        """
+        air_quality_columns = ('city_id', 'timestamp') + AIR_QUALITY_FIELDS + ('data_source',)
+        weather_columns = ('city_id', 'timestamp') + WEATHER_FIELDS
+        
+        if 'data_source' not in frame.columns:
+            frame = frame.assign(data_source=source)
+        
+        result = {
+            'air_quality': {'inserted': 0, 'skipped': 0},
+            'weather': {'inserted': 0, 'updated': 0, 'skipped': 0},
+            'unknown_cities': 0
+        }
+        
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            
+            # Session-local staging tables, emptied automatically on commit
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS staging_air_quality (
+                    city_id INTEGER, timestamp TIMESTAMP, aqi INTEGER,
+                    pm25 DECIMAL(10, 2), pm10 DECIMAL(10, 2), no2 DECIMAL(10, 2),
+                    so2 DECIMAL(10, 2), co DECIMAL(10, 2), o3 DECIMAL(10, 2),
+                    data_source VARCHAR(50)
+                ) ON COMMIT DELETE ROWS;
+                CREATE TEMP TABLE IF NOT EXISTS staging_weather (
+                    city_id INTEGER, timestamp TIMESTAMP, temperature DECIMAL(5, 2),
+                    humidity INTEGER, wind_speed DECIMAL(5, 2), pressure DECIMAL(7, 2)
+                ) ON COMMIT DELETE ROWS;
+            """)
+            
+            for table, columns in (('air_quality', air_quality_columns), ('weather', weather_columns)):
+                rows = frame.loc[frame[columns[2]].notna(), list(columns)]
+                if rows.empty:
+                    continue
+                # INTEGER staging columns reject "45.0", so round floats first
+                # (like _normalize_readings for AQI); Int64 keeps missing humidity empty
+                if table == 'air_quality':
+                    rows = rows.assign(aqi=rows['aqi'].round().astype('int64'))
+                else:
+                    rows = rows.assign(humidity=rows['humidity'].round().astype('Int64'))
+                
+                buffer = io.StringIO()
+                rows.to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                
+                column_list = ', '.join(columns)
+                cursor.copy_expert(
+                    f"COPY staging_{table} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                
+                if table == 'air_quality':
+                    self._lock_readings_for_write(cursor)
+                    cursor.execute(
+                        f"INSERT INTO air_quality ({column_list}) "
+                        f"SELECT {column_list} FROM staging_air_quality "
+                        f"ON CONFLICT (city_id, timestamp) DO NOTHING;"
+                    )
+                    result[table] = {'inserted': cursor.rowcount, 'skipped': len(rows) - cursor.rowcount}
+                    latest_columns, latest_upsert = LATEST_AIR_QUALITY_COLUMNS, LATEST_AIR_QUALITY_UPSERT
+                else:
+                    cursor.execute(f"""
+                        WITH upserted AS (
+                            INSERT INTO weather ({column_list})
+                            SELECT DISTINCT ON (city_id, timestamp) {column_list}
+                            FROM staging_weather
+                            {WEATHER_UPSERT}
+                        )
+                        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+                        FROM upserted;
+                    """)
+                    inserted, updated = cursor.fetchone()
+                    result[table] = {
+                        'inserted': inserted,
+                        'updated': updated,
+                        'skipped': len(rows) - inserted - updated
+                    }
+                    latest_columns, latest_upsert = LATEST_WEATHER_COLUMNS, LATEST_WEATHER_UPSERT
+                
+                # Staging columns line up with the matching latest_readings columns
+                cursor.execute(f"""
+                    INSERT INTO latest_readings ({', '.join(latest_columns)})
+                    SELECT DISTINCT ON (city_id) {column_list}
+                    FROM staging_{table}
+                    ORDER BY city_id, timestamp DESC
+                    {latest_upsert};
+                """)
+            
+            connection.commit()
+            cursor.close()
+        
+        return result
+    
+    def get_latest_aqi(self, city_name):
+        """Get latest AQI for a city (from latest_readings)"""
+        city_id = self.get_city_id(city_name)
+        
+        if not city_id:
+            return None
+        
+        with self.connection() as connection:
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            
+            query = """
+                SELECT city_id, aqi_timestamp AS timestamp, aqi, pm25, pm10,
+                       no2, so2, co, o3, data_source
+                FROM latest_readings
+                WHERE city_id = %s AND aqi_timestamp IS NOT NULL;
+            """
+            
+            cursor.execute(query, (city_id,))
+            result = cursor.fetchone()
+            
+            cursor.close()
         
         return dict(result) if result else None
     
-    def get_all_cities(self):
-        """Get all cities from database"""
-        connection = self.get_connection()
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
+    def get_latest_readings(self, city_names=None):
+        """Get the latest readings for all (or the named) cities in one query
+        
+        Returns a list of dicts ordered by city name, with the same air
+        quality keys as get_latest_aqi plus city_name and the latest
+        weather values. `aqi` is None for cities with only weather so far.
+        """
+        query = """
+            SELECT c.city_id, c.city_name,
+                   lr.aqi_timestamp AS timestamp, lr.aqi, lr.pm25, lr.pm10,
+                   lr.no2, lr.so2, lr.co, lr.o3, lr.data_source,
+                   lr.weather_timestamp, lr.temperature, lr.humidity,
+                   lr.wind_speed, lr.pressure
+            FROM latest_readings lr
+            JOIN cities c ON lr.city_id = c.city_id
+            WHERE %(names)s::text[] IS NULL OR c.city_name = ANY(%(names)s::text[])
+            ORDER BY c.city_name;
+        """
         
-        cursor.execute("SELECT * FROM cities ORDER BY city_name;")
-        results = cursor.fetchall()
+        names = list(city_names) if city_names is not None else None
         
-        cursor.close()
-        connection.close()
+        with self.connection() as connection:
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(query, {'names': names})
+            results = cursor.fetchall()
+            cursor.close()
         
-        return [dict(row) for row in results]
\ No newline at end of file
+        return [dict(row) for row in results]
+    
+    def get_all_cities(self):
+        """Get all cities (served from the city registry)"""
+        return self.city_registry.all()
+    
+    def get_city_names(self):
+        """Get the names of all cities, ordered by name"""
+        return self.city_registry.names()
\ No newline at end of file
@@ -0,0 +1,362 @@
+import psycopg2
+from dotenv import load_dotenv
+from datetime import date
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.database.partitions import add_months, ensure_partitions, insertable_columns, month_start
+
+load_dotenv('config/.env')
+
+# Serializes concurrent migration runs (any constant unique to this app)
+MIGRATION_LOCK_ID = 420017
+
+def _add_hot_path_indexes(cursor):
+    """Indexes for cross-city time range reads, predictions and alerts"""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_air_quality_timestamp
+            ON air_quality (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_predictions_city_timestamp
+            ON predictions (city_id, prediction_timestamp);
+        CREATE INDEX IF NOT EXISTS idx_alerts_city_sent_at
+            ON alerts (city_id, sent_at);
+    """)
+
+def _weather_unique_city_timestamp(cursor):
+    """Drop duplicate weather rows (keeping the newest) and make (city_id, timestamp) unique"""
+    cursor.execute("""
+        DELETE FROM weather
+        WHERE weather_id IN (
+            SELECT weather_id FROM (
+                SELECT weather_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY city_id, timestamp ORDER BY weather_id DESC
+                       ) AS duplicate_rank
+                FROM weather
+            ) ranked
+            WHERE duplicate_rank > 1
+        );
+    """)
+    print(f"  Removed {cursor.rowcount:,} duplicate weather rows")
+    
+    # The unique index also serves per-city time range reads on weather
+    cursor.execute("""
+        ALTER TABLE weather
+            ADD CONSTRAINT weather_city_id_timestamp_key UNIQUE (city_id, timestamp);
+    """)
+
+def _add_time_bucket_columns(cursor):
+    """Indexed second-resolution time bucket used to join air quality with weather"""
+    for table in ('air_quality', 'weather'):
+        cursor.execute(f"""
+            ALTER TABLE {table}
+                ADD COLUMN IF NOT EXISTS time_bucket TIMESTAMP
+                GENERATED ALWAYS AS (DATE_TRUNC('second', timestamp)) STORED;
+            CREATE INDEX IF NOT EXISTS idx_{table}_city_time_bucket
+                ON {table} (city_id, time_bucket);
+        """)
+
+# Partitioned layouts; the primary key must include the partition key
+PARTITIONED_DDL = {
+    'air_quality': ('measurement_id', """
+        measurement_id INTEGER NOT NULL DEFAULT nextval('air_quality_measurement_id_seq'),
+        city_id INTEGER,
+        timestamp TIMESTAMP NOT NULL,
+        aqi INTEGER,
+        pm25 DECIMAL(10, 2),
+        pm10 DECIMAL(10, 2),
+        no2 DECIMAL(10, 2),
+        so2 DECIMAL(10, 2),
+        co DECIMAL(10, 2),
+        o3 DECIMAL(10, 2),
+        data_source VARCHAR(50),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        time_bucket TIMESTAMP GENERATED ALWAYS AS (DATE_TRUNC('second', timestamp)) STORED,
+        PRIMARY KEY (measurement_id, timestamp),
+        UNIQUE (city_id, timestamp)
+    """),
+    'weather': ('weather_id', """
+        weather_id INTEGER NOT NULL DEFAULT nextval('weather_weather_id_seq'),
+        city_id INTEGER,
+        timestamp TIMESTAMP NOT NULL,
+        temperature DECIMAL(5, 2),
+        humidity INTEGER,
+        wind_speed DECIMAL(5, 2),
+        wind_direction INTEGER,
+        pressure DECIMAL(7, 2),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        time_bucket TIMESTAMP GENERATED ALWAYS AS (DATE_TRUNC('second', timestamp)) STORED,
+        PRIMARY KEY (weather_id, timestamp),
+        CONSTRAINT weather_city_id_timestamp_key UNIQUE (city_id, timestamp)
+    """),
+}
+
+def _partition_readings_by_month(cursor):
+    """Rebuild air_quality and weather as tables range-partitioned by month"""
+    months_ahead = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+    
+    for table, (id_column, columns_ddl) in PARTITIONED_DDL.items():
+        legacy = f"{table}_unpartitioned"
+        sequence = f"{table}_{id_column}_seq"
+        
+        # Move the old table aside, keeping its id sequence alive; its
+        # indexes are dropped so the new table can reuse their names
+        cursor.execute(f"""
+            ALTER TABLE {table} RENAME TO {legacy};
+            ALTER SEQUENCE {sequence} OWNED BY NONE;
+            ALTER TABLE {legacy}
+                DROP CONSTRAINT IF EXISTS {table}_pkey,
+                DROP CONSTRAINT IF EXISTS {table}_city_id_timestamp_key;
+            DROP INDEX IF EXISTS idx_{table}_timestamp, idx_{table}_city_time_bucket;
+        """)
+        
+        cursor.execute(f"""
+            CREATE TABLE {table} ({columns_ddl}) PARTITION BY RANGE (timestamp);
+            ALTER SEQUENCE {sequence} OWNED BY {table}.{id_column};
+            CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+        """)
+        
+        cursor.execute(f"SELECT MIN(timestamp), MAX(timestamp) FROM {legacy};")
+        first, last = cursor.fetchone()
+        this_month = month_start(date.today())
+        first = month_start(first) if first else this_month
+        last = max(month_start(last) if last else this_month, add_months(this_month, months_ahead))
+        
+        created = ensure_partitions(cursor, table, first, last)
+        print(f"  {table}: {len(created)} monthly partitions ({first:%Y-%m} to {last:%Y-%m})")
+        
+        columns = ', '.join(insertable_columns(cursor, legacy))
+        
+        cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy};")
+        print(f"  {table}: copied {cursor.rowcount:,} rows")
+        
+        # Indexes and the foreign key are cheaper to build once the data is in
+        cursor.execute(f"""
+            DROP TABLE {legacy};
+            ALTER TABLE {table}
+                ADD CONSTRAINT {table}_city_id_fkey FOREIGN KEY (city_id) REFERENCES cities(city_id);
+            CREATE INDEX idx_{table}_timestamp_brin ON {table} USING brin (timestamp);
+            CREATE INDEX idx_{table}_city_time_bucket ON {table} (city_id, time_bucket);
+        """)
+
+def _create_latest_readings(cursor):
+    """One row per city with its newest air quality and weather values"""
+    cursor.execute("""
+        CREATE TABLE latest_readings (
+            city_id INTEGER PRIMARY KEY REFERENCES cities(city_id),
+            aqi_timestamp TIMESTAMP,
+            aqi INTEGER,
+            pm25 DECIMAL(10, 2),
+            pm10 DECIMAL(10, 2),
+            no2 DECIMAL(10, 2),
+            so2 DECIMAL(10, 2),
+            co DECIMAL(10, 2),
+            o3 DECIMAL(10, 2),
+            data_source VARCHAR(50),
+            weather_timestamp TIMESTAMP,
+            temperature DECIMAL(5, 2),
+            humidity INTEGER,
+            wind_speed DECIMAL(5, 2),
+            pressure DECIMAL(7, 2),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    
+    # Seed from history; each LATERAL lookup is one backwards index probe
+    cursor.execute("""
+        INSERT INTO latest_readings
+            (city_id, aqi_timestamp, aqi, pm25, pm10, no2, so2, co, o3, data_source)
+        SELECT c.city_id, aq.timestamp, aq.aqi, aq.pm25, aq.pm10,
+               aq.no2, aq.so2, aq.co, aq.o3, aq.data_source
+        FROM cities c
+        CROSS JOIN LATERAL (
+            SELECT * FROM air_quality
+            WHERE air_quality.city_id = c.city_id
+            ORDER BY timestamp DESC
+            LIMIT 1
+        ) aq;
+        
+        INSERT INTO latest_readings
+            (city_id, weather_timestamp, temperature, humidity, wind_speed, pressure)
+        SELECT c.city_id, w.timestamp, w.temperature, w.humidity, w.wind_speed, w.pressure
+        FROM cities c
+        CROSS JOIN LATERAL (
+            SELECT * FROM weather
+            WHERE weather.city_id = c.city_id
+            ORDER BY timestamp DESC
+            LIMIT 1
+        ) w
+        ON CONFLICT (city_id) DO UPDATE SET
+            weather_timestamp = EXCLUDED.weather_timestamp,
+            temperature = EXCLUDED.temperature,
+            humidity = EXCLUDED.humidity,
+            wind_speed = EXCLUDED.wind_speed,
+            pressure = EXCLUDED.pressure;
+    """)
+    print(f"  Seeded latest readings for {cursor.rowcount} cities")
+
+def _create_rollups(cursor):
+    """Hourly and daily AQI/pollutant rollups plus the watermark that drives them"""
+    for table in ('air_quality_hourly', 'air_quality_daily'):
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                city_id INTEGER NOT NULL REFERENCES cities(city_id),
+                metric VARCHAR(10) NOT NULL,
+                bucket TIMESTAMP NOT NULL,
+                min_value DOUBLE PRECISION,
+                max_value DOUBLE PRECISION,
+                mean_value DOUBLE PRECISION,
+                p95_value DOUBLE PRECISION,
+                sample_count INTEGER NOT NULL,
+                PRIMARY KEY (city_id, metric, bucket)
+            );
+        """)
+    
+    # Rollups are built by RollupManager.refresh(), starting from id 0
+    cursor.execute("""
+        CREATE TABLE rollup_watermarks (
+            name VARCHAR(50) PRIMARY KEY,
+            last_id BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO rollup_watermarks (name) VALUES ('air_quality');
+    """)
+
+def _create_backtest_results(cursor):
+    """Walk-forward backtest runs and the error of every fold and horizon"""
+    cursor.execute("""
+        CREATE TABLE backtest_runs (
+            run_id SERIAL PRIMARY KEY,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            range_start TIMESTAMP NOT NULL,
+            range_end TIMESTAMP NOT NULL,
+            step_hours INTEGER NOT NULL,
+            training_rows INTEGER NOT NULL,
+            horizons INTEGER[] NOT NULL,
+            folds INTEGER NOT NULL,
+            wall_seconds DOUBLE PRECISION
+        );
+        
+        CREATE TABLE backtest_results (
+            run_id INTEGER NOT NULL REFERENCES backtest_runs(run_id) ON DELETE CASCADE,
+            city_id INTEGER NOT NULL REFERENCES cities(city_id),
+            origin TIMESTAMP NOT NULL,
+            horizon_hours INTEGER NOT NULL,
+            training_rows INTEGER NOT NULL,
+            test_rows INTEGER NOT NULL,
+            mae DOUBLE PRECISION NOT NULL,
+            rmse DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (run_id, city_id, origin, horizon_hours)
+        );
+    """)
+
+# (version, name, migration) in the order they must run. Never edit or
+# renumber an applied migration; append a new one instead.
+MIGRATIONS = [
+    (1, 'hot path indexes', _add_hot_path_indexes),
+    (2, 'unique weather per city and timestamp', _weather_unique_city_timestamp),
+    (3, 'time bucket join columns', _add_time_bucket_columns),
+    (4, 'monthly partitions for readings', _partition_readings_by_month),
+    (5, 'latest readings per city', _create_latest_readings),
+    (6, 'hourly and daily rollups', _create_rollups),
+    (7, 'backtest results', _create_backtest_results),
+]
+
+def _ensure_migrations_table(connection):
+    """Create the schema_migrations bookkeeping table"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    connection.commit()
+    cursor.close()
+
+def applied_versions(connection):
+    """Return the set of migration versions already applied"""
+    _ensure_migrations_table(connection)
+    
+    cursor = connection.cursor()
+    cursor.execute("SELECT version FROM schema_migrations;")
+    versions = {row[0] for row in cursor.fetchall()}
+    connection.commit()
+    cursor.close()
+    return versions
+
+def apply_migrations(connection, target=None):
+    """Apply pending migrations in order, each in its own transaction
+    
+    Stops after `target` if given. Returns the versions applied; raises
+    (after rolling back the failed migration) if one fails.
+    """
+    _ensure_migrations_table(connection)
+    applied = []
+    
+    for version, name, migrate in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        
+        cursor = connection.cursor()
+        try:
+            # Another process may be migrating; wait for it, then re-check
+            cursor.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_ID,))
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s;", (version,))
+            if cursor.fetchone():
+                connection.commit()
+                continue
+            
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                (version, name)
+            )
+            connection.commit()
+            applied.append(version)
+            print(f"✓ Migration {version:03d} applied: {name}")
+        except Exception:
+            connection.rollback()
+            print(f"❌ Migration {version:03d} failed: {name}")
+            raise
+        finally:
+            cursor.close()
+    
+    return applied
+
+def get_connection():
+    """Connect with the settings from config/.env"""
+    return psycopg2.connect(
+        host=os.getenv('DB_HOST'),
+        port=os.getenv('DB_PORT'),
+        database=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD')
+    )
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument('--status', action='store_true', help="list migrations without applying them")
+    parser.add_argument('--target', type=int, help="stop after this version")
+    args = parser.parse_args()
+    
+    connection = get_connection()
+    
+    try:
+        if args.status:
+            applied = applied_versions(connection)
+            for version, name, _ in MIGRATIONS:
+                mark = "✓" if version in applied else " "
+                print(f"[{mark}] {version:03d} {name}")
+            return
+        
+        versions = apply_migrations(connection, target=args.target)
+        print(f"✅ {len(versions)} migration(s) applied" if versions else "✅ Schema is up to date")
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
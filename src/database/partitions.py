@@ -0,0 +1,185 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.database.db_operations import DatabaseOperations
+from datetime import date
+import re
+
+# Tables partitioned by month on timestamp
+PARTITIONED_TABLES = ('air_quality', 'weather')
+
+def month_start(value):
+    """First day of the month containing a date or datetime"""
+    return date(value.year, value.month, 1)
+
+def add_months(value, months):
+    """Shift the first day of a month by a number of months"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table, month):
+    """Name of the partition holding `month`, e.g. air_quality_y2024m03"""
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+def insertable_columns(cursor, table):
+    """Columns of a table that can be written (excludes generated columns)"""
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position;
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+def create_monthly_partition(cursor, table, month):
+    """Create the partition for one month if missing; returns True if created
+    
+    Rows for that month already sitting in the DEFAULT partition are moved
+    into the new partition, since Postgres refuses to create it otherwise.
+    """
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s);", (name,))
+    if cursor.fetchone()[0]:
+        return False
+    
+    start, end = month, add_months(month, 1)
+    default = f"{table}_default"
+    
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE timestamp >= %s AND timestamp < %s);",
+        (start, end)
+    )
+    stranded = cursor.fetchone()[0]
+    
+    if stranded:
+        columns = ', '.join(insertable_columns(cursor, table))
+        cursor.execute(f"""
+            CREATE TEMP TABLE stranded_rows ON COMMIT DROP AS
+            SELECT {columns} FROM {default} WHERE timestamp >= %s AND timestamp < %s;
+            DELETE FROM {default} WHERE timestamp >= %s AND timestamp < %s;
+        """, (start, end, start, end))
+    
+    cursor.execute(
+        f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s);",
+        (start, end)
+    )
+    
+    if stranded:
+        cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM stranded_rows;")
+        cursor.execute("DROP TABLE stranded_rows;")
+    
+    return True
+
+def ensure_partitions(cursor, table, first_month, last_month):
+    """Create monthly partitions covering first_month..last_month; returns names created"""
+    created = []
+    month = month_start(first_month)
+    last_month = month_start(last_month)
+    
+    while month <= last_month:
+        if create_monthly_partition(cursor, table, month):
+            created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    
+    return created
+
+def list_partitions(cursor, table):
+    """Return [(partition name, month)] for a table's monthly partitions, oldest first"""
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s;
+    """, (table,))
+    
+    pattern = re.compile(rf"^{table}_y(\d{{4}})m(\d{{2}})$")
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    
+    return sorted(partitions, key=lambda partition: partition[1])
+
+class PartitionManager:
+    """Create upcoming monthly partitions and retire old ones"""
+    
+    def __init__(self, db=None, months_ahead=None, retention_months=None, drop_expired=None):
+        self.db = db or DatabaseOperations()
+        
+        self.months_ahead = months_ahead if months_ahead is not None \
+            else int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+        # 0 keeps all history
+        self.retention_months = retention_months if retention_months is not None \
+            else int(os.getenv('DATA_RETENTION_MONTHS', 0))
+        self.drop_expired = drop_expired if drop_expired is not None \
+            else os.getenv('DATA_RETENTION_DROP', 'false').lower() == 'true'
+    
+    def ensure_partitions(self, today=None):
+        """Make sure this month and the next `months_ahead` months have partitions"""
+        this_month = month_start(today or date.today())
+        created = []
+        
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            for table in PARTITIONED_TABLES:
+                created += ensure_partitions(
+                    cursor, table, this_month, add_months(this_month, self.months_ahead)
+                )
+            connection.commit()
+            cursor.close()
+        
+        for name in created:
+            print(f"✓ Created partition {name}")
+        
+        return created
+    
+    def apply_retention(self, today=None):
+        """Detach (or drop) partitions older than the retention window
+        
+        Detached partitions stay in the database as plain tables, so old
+        data can be archived or re-attached. Returns the names retired.
+        """
+        if not self.retention_months:
+            return []
+        
+        cutoff = add_months(month_start(today or date.today()), -self.retention_months)
+        retired = []
+        
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            for table in PARTITIONED_TABLES:
+                for name, month in list_partitions(cursor, table):
+                    if month >= cutoff:
+                        break
+                    
+                    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name};")
+                    if self.drop_expired:
+                        cursor.execute(f"DROP TABLE {name};")
+                    retired.append(name)
+            
+            connection.commit()
+            cursor.close()
+        
+        action = "Dropped" if self.drop_expired else "Detached"
+        for name in retired:
+            print(f"✓ {action} partition {name}")
+        
+        return retired
+    
+    def run_maintenance(self, today=None):
+        """Create upcoming partitions and apply retention"""
+        try:
+            created = self.ensure_partitions(today)
+            retired = self.apply_retention(today)
+            return {'created': created, 'retired': retired}
+        except Exception as e:
+            print(f"❌ Partition maintenance failed: {e}")
+            return None
+
+if __name__ == "__main__":
+    manager = PartitionManager()
+    result = manager.run_maintenance()
+    if result is not None:
+        print(f"✅ Partitions: {len(result['created'])} created, {len(result['retired'])} retired")
@@ -0,0 +1,276 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.database.db_operations import DatabaseOperations, AIR_QUALITY_FIELDS, READINGS_WRITE_LOCK_ID
+from datetime import datetime, timedelta
+import pandas as pd
+import time
+
+# Rollup table and bucket width, finest first
+RESOLUTIONS = {
+    'hourly': ('air_quality_hourly', 'hour', timedelta(hours=1)),
+    'daily': ('air_quality_daily', 'day', timedelta(days=1)),
+}
+
+# Unpivots one air_quality row into (metric, value) pairs
+METRIC_VALUES = ', '.join(f"('{field}', aq.{field}::float8)" for field in AIR_QUALITY_FIELDS)
+
+class RollupManager:
+    """Maintain and read hourly/daily AQI and pollutant rollups
+    
+    refresh() only looks at air_quality rows with a measurement_id above
+    the stored watermark. Every hour and day bucket those rows fall in is
+    recomputed from the raw rows, so late or duplicate data never skews
+    the stored min/max/mean/count/p95.
+    
+    Ids are handed out when rows are inserted, not when they commit, so the
+    watermark only moves up to the highest id once writers in flight have
+    finished (see settled_id()). That relies on every writer going through
+    DatabaseOperations, which holds the readings write lock; rows inserted
+    by other means with a concurrent refresh running can be missed.
+    """
+    
+    def __init__(self, db=None, batch_size=None, raw_max_span=None, max_points=None):
+        self.db = db or DatabaseOperations()
+        self.batch_size = batch_size or int(os.getenv('ROLLUP_BATCH_SIZE', 500000))
+        # Ranges up to this span are read from raw rows
+        self.raw_max_span = raw_max_span or timedelta(hours=float(os.getenv('ROLLUP_RAW_MAX_HOURS', 48)))
+        self.max_points = max_points or int(os.getenv('ROLLUP_MAX_POINTS', 500))
+    
+    def _refresh_resolution(self, cursor, resolution, touched, low, high):
+        """Recompute the touched buckets of one rollup table from raw rows"""
+        table, unit, _ = RESOLUTIONS[resolution]
+        cursor.execute(f"""
+            INSERT INTO {table}
+                (city_id, metric, bucket, min_value, max_value, mean_value, p95_value, sample_count)
+            SELECT aq.city_id, m.metric, DATE_TRUNC('{unit}', aq.timestamp),
+                   MIN(m.value), MAX(m.value), AVG(m.value),
+                   PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY m.value),
+                   COUNT(*)
+            FROM air_quality aq
+            JOIN {touched} t
+                ON t.city_id = aq.city_id AND t.bucket = DATE_TRUNC('{unit}', aq.timestamp)
+            CROSS JOIN LATERAL (VALUES {METRIC_VALUES}) AS m (metric, value)
+            WHERE aq.timestamp >= %s AND aq.timestamp < %s
+                AND m.value IS NOT NULL
+            GROUP BY aq.city_id, m.metric, DATE_TRUNC('{unit}', aq.timestamp)
+            ON CONFLICT (city_id, metric, bucket) DO UPDATE SET
+                min_value = EXCLUDED.min_value,
+                max_value = EXCLUDED.max_value,
+                mean_value = EXCLUDED.mean_value,
+                p95_value = EXCLUDED.p95_value,
+                sample_count = EXCLUDED.sample_count;
+        """, (low, high))
+        return cursor.rowcount
+    
+    def settled_id(self):
+        """Highest air_quality id below which no open transaction can still add rows
+        
+        Waits for writers holding the readings write lock to finish; writers
+        starting later take ids above the returned one.
+        """
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT pg_advisory_xact_lock(%s);", (READINGS_WRITE_LOCK_ID,))
+            cursor.execute("SELECT COALESCE(MAX(measurement_id), 0) FROM air_quality;")
+            settled = cursor.fetchone()[0]
+            connection.commit()
+            cursor.close()
+        return settled
+    
+    def _refresh_batch(self, cursor, settled):
+        """Roll up the next batch of rows up to id `settled`; returns rows processed (0 when caught up)"""
+        # Row lock on the watermark serializes concurrent refreshes
+        cursor.execute("""
+            SELECT last_id FROM rollup_watermarks
+            WHERE name = 'air_quality'
+            FOR UPDATE;
+        """)
+        last_id = cursor.fetchone()[0]
+        
+        cursor.execute("""
+            SELECT MAX(measurement_id), COUNT(*) FROM (
+                SELECT measurement_id FROM air_quality
+                WHERE measurement_id > %s AND measurement_id <= %s
+                ORDER BY measurement_id
+                LIMIT %s
+            ) batch;
+        """, (last_id, settled, self.batch_size))
+        next_id, rows = cursor.fetchone()
+        
+        if not rows:
+            return 0
+        
+        cursor.execute("""
+            CREATE TEMP TABLE touched_hours ON COMMIT DROP AS
+            SELECT DISTINCT city_id, DATE_TRUNC('hour', timestamp) AS bucket
+            FROM air_quality
+            WHERE measurement_id > %s AND measurement_id <= %s;
+            
+            CREATE TEMP TABLE touched_days ON COMMIT DROP AS
+            SELECT DISTINCT city_id, DATE_TRUNC('day', bucket) AS bucket
+            FROM touched_hours;
+            
+            ANALYZE touched_hours;
+            ANALYZE touched_days;
+        """, (last_id, next_id))
+        
+        cursor.execute("SELECT MIN(bucket), MAX(bucket) FROM touched_hours;")
+        first_hour, last_hour = cursor.fetchone()
+        
+        self._refresh_resolution(cursor, 'hourly', 'touched_hours', first_hour, last_hour + timedelta(hours=1))
+        self._refresh_resolution(
+            cursor, 'daily', 'touched_days',
+            datetime.combine(first_hour.date(), datetime.min.time()),
+            datetime.combine(last_hour.date(), datetime.min.time()) + timedelta(days=1)
+        )
+        
+        cursor.execute("""
+            UPDATE rollup_watermarks
+            SET last_id = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE name = 'air_quality';
+        """, (next_id,))
+        
+        return rows
+    
+    def refresh(self, verbose=True):
+        """Roll up every air_quality row added since the last refresh
+        
+        Works through new rows in batches of `batch_size`, one transaction
+        each, so a large backfill can be caught up gradually. Returns the
+        number of raw rows processed, or None on error.
+        """
+        started = time.perf_counter()
+        processed = 0
+        
+        try:
+            settled = self.settled_id()
+            while True:
+                with self.db.connection() as connection:
+                    cursor = connection.cursor()
+                    rows = self._refresh_batch(cursor, settled)
+                    connection.commit()
+                    cursor.close()
+                
+                if not rows:
+                    break
+                
+                processed += rows
+                if verbose and rows == self.batch_size:
+                    print(f"  Rolled up {processed:,} rows...")
+        
+        except Exception as e:
+            print(f"❌ Error refreshing rollups: {e}")
+            return None
+        
+        if verbose and processed:
+            print(f"✓ Rollups refreshed: {processed:,} new rows in {time.perf_counter() - started:.2f}s")
+        
+        return processed
+    
+    def choose_resolution(self, start, end):
+        """Pick the resolution for a time range
+        
+        Short ranges read raw rows; otherwise the finest rollup that keeps
+        the series within `max_points` buckets.
+        """
+        span = end - start
+        if span <= self.raw_max_span:
+            return 'raw'
+        
+        for resolution, (_, _, width) in RESOLUTIONS.items():
+            if span / width <= self.max_points:
+                return resolution
+        
+        return 'daily'
+    
+    def get_series(self, city_name, start=None, end=None, metrics=('aqi',), resolution=None):
+        """Get a time series for a city at the resolution that fits the range
+        
+        Returns a DataFrame with a timestamp column and, per metric, the
+        mean (named after the metric) plus _min, _max, _p95 and _count
+        columns. The resolution used is in `df.attrs['resolution']`.
+        """
+        end = end or datetime.now()
+        start = start or end - timedelta(days=30)
+        resolution = resolution or self.choose_resolution(start, end)
+        city_id = self.db.get_city_id(city_name)
+        metrics = [metric for metric in metrics if metric in AIR_QUALITY_FIELDS]
+        
+        if resolution == 'raw':
+            query = f"""
+                SELECT timestamp, {', '.join(metrics)}
+                FROM air_quality
+                WHERE city_id = %s AND timestamp >= %s AND timestamp < %s
+                ORDER BY timestamp;
+            """
+            with self.db.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (city_id, start, end))
+                rows = cursor.fetchall()
+                cursor.close()
+            
+            df = pd.DataFrame(rows, columns=['timestamp'] + metrics)
+            for metric in metrics:
+                df[metric] = df[metric].astype(float)
+                for suffix in ('min', 'max', 'p95'):
+                    df[f'{metric}_{suffix}'] = df[metric]
+                df[f'{metric}_count'] = df[metric].notna().astype(int)
+        else:
+            table = RESOLUTIONS[resolution][0]
+            query = f"""
+                SELECT bucket, metric, mean_value, min_value, max_value, p95_value, sample_count
+                FROM {table}
+                WHERE city_id = %s AND metric = ANY(%s) AND bucket >= %s AND bucket < %s
+                ORDER BY bucket;
+            """
+            with self.db.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (city_id, metrics, start, end))
+                rows = cursor.fetchall()
+                cursor.close()
+            
+            long = pd.DataFrame(rows, columns=['timestamp', 'metric', 'mean', 'min', 'max', 'p95', 'count'])
+            df = pd.DataFrame({'timestamp': sorted(long['timestamp'].unique())})
+            for metric in metrics:
+                values = long[long['metric'] == metric].drop(columns='metric').rename(columns={
+                    'mean': metric,
+                    'min': f'{metric}_min',
+                    'max': f'{metric}_max',
+                    'p95': f'{metric}_p95',
+                    'count': f'{metric}_count'
+                })
+                df = df.merge(values, on='timestamp', how='left')
+        
+        df.attrs['resolution'] = resolution
+        return df
+    
+    def summarize_cities(self, hours=24, metric='aqi'):
+        """Per-city min/mean/max/sample count over the last `hours`, from hourly rollups"""
+        query = """
+            SELECT c.city_name,
+                   MIN(h.min_value) AS min_value,
+                   SUM(h.mean_value * h.sample_count) / SUM(h.sample_count) AS mean_value,
+                   MAX(h.max_value) AS max_value,
+                   MAX(h.p95_value) AS worst_hour_p95,
+                   SUM(h.sample_count) AS sample_count
+            FROM air_quality_hourly h
+            JOIN cities c ON h.city_id = c.city_id
+            WHERE h.metric = %s AND h.bucket >= %s
+            GROUP BY c.city_name
+            ORDER BY c.city_name;
+        """
+        since = (datetime.now() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+        
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, (metric, since))
+            rows = cursor.fetchall()
+            cursor.close()
+        
+        columns = ['city_name', 'min', 'mean', 'max', 'worst_hour_p95', 'count']
+        return [dict(zip(columns, row)) for row in rows]
+
+if __name__ == "__main__":
+    RollupManager().refresh()
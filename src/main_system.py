@@ -8,6 +8,8 @@ from src.data_analysis import DataAnalyzer
 from src.models.aqi_predictor import AQIPredictor
 from src.alerts.alert_system import AlertSystem
 from src.alerts.email_alerts import EmailAlerts
+from src.database.partitions import PartitionManager
+from src.database.rollups import RollupManager
 from datetime import datetime
 import time
 import schedule
@@ -21,8 +23,10 @@ class AirPollutionSystem:
         self.simulated_collector = SimulatedDataCollector()
         self.analyzer = DataAnalyzer()
         self.predictor = AQIPredictor()
-        self.alert_system = AlertSystem()
+        self.alert_system = AlertSystem(predictor=self.predictor)
         self.email_alerts = EmailAlerts()
+        self.partition_manager = PartitionManager(db=self.analyzer.db)
+        self.rollups = RollupManager(db=self.analyzer.db)
         
         print("=" * 70)
         print("🌍 AIR POLLUTION MONITORING SYSTEM - INITIALIZED")
@@ -44,7 +48,9 @@ class AirPollutionSystem:
                     print(f"✅ Collected real data for {collected} cities")
                     return True
                 else:
-                    print("⚠️ Real API failed, using simulated data")
+                    breaker = self.weather_collector.breaker.stats()
+                    print(f"⚠️ Real API failed (circuit {breaker['state']}, "
+                          f"{breaker['trips']} trips), using simulated data")
                     self.simulated_collector.collect_all_data()
                     return True
             except Exception as e:
@@ -62,14 +68,8 @@ class AirPollutionSystem:
         """Analyze data and send alerts if needed"""
         print(f"\n📊 [{datetime.now().strftime('%H:%M:%S')}] Analyzing data...")
         
-        # Check for alerts
-        alerts = []
-        cities = self.analyzer.db.get_all_cities()
-        
-        for city in cities:
-            alert = self.alert_system.check_city_alerts(city['city_name'])
-            if alert:
-                alerts.append(alert)
+        # Check for alerts (one query for all cities)
+        alerts = self.alert_system.check_all_alerts()
         
         if alerts:
             print(f"🚨 {len(alerts)} alert(s) detected!")
@@ -91,16 +91,21 @@ class AirPollutionSystem:
         """Generate ML predictions"""
         print(f"\n🔮 [{datetime.now().strftime('%H:%M:%S')}] Generating predictions...")
         
-        cities = ['Delhi', 'Mumbai', 'Kolkata']  # Predict for major cities
+        try:
+            predictions = self.predictor.predict_batch()
+        except Exception as e:
+            print(f"❌ Prediction failed: {e}")
+            return
         
-        for city in cities:
-            try:
-                prediction = self.predictor.predict_next_aqi(city)
-                if prediction:
-                    trend = "↑" if prediction['change'] > 0 else "↓"
-                    print(f"  {city}: {prediction['current_aqi']} → {prediction['predicted_aqi']} {trend}")
-            except:
-                pass
+        for prediction in predictions.to_dict('records'):
+            trend = "↑" if prediction['change'] > 0 else "↓"
+            fallback = " (EWMA fallback)" if prediction['served_by'] == 'ewma_fallback' else ""
+            print(f"  {prediction['city']}: {prediction['current_aqi']} → {prediction['predicted_aqi']} {trend}{fallback}")
+    
+    def maintain_database(self):
+        """Create upcoming partitions and retire expired ones"""
+        print(f"\n🗄️  [{datetime.now().strftime('%H:%M:%S')}] Partition maintenance...")
+        self.partition_manager.run_maintenance()
     
     def run_cycle(self):
         """Run one complete monitoring cycle"""
@@ -108,8 +113,9 @@ class AirPollutionSystem:
         print(f"🔄 STARTING MONITORING CYCLE")
         print("="*70)
         
-        # Step 1: Collect data
+        # Step 1: Collect data and roll up the new readings
         self.collect_data()
+        self.rollups.refresh()
         
         # Step 2: Analyze and send alerts
         self.analyze_and_alert()
@@ -135,10 +141,12 @@ class AirPollutionSystem:
         print("Press Ctrl+C to stop\n")
         
         # Run immediately
+        self.maintain_database()
         self.run_cycle()
         
         # Schedule regular runs
         schedule.every(interval_minutes).minutes.do(self.run_cycle)
+        schedule.every().day.at("02:00").do(self.maintain_database)
         
         # Keep running
         try:
@@ -2,28 +2,343 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from src.database.db_operations import DatabaseOperations
+from src.database.db_operations import DatabaseOperations, AIR_QUALITY_FIELDS, WEATHER_FIELDS
+from src.models.model_registry import ModelRegistry
+from src.models.model_store import save_flat, as_flat
+from src.models.compaction import compact_forest, print_compaction_report
+from src.models.training_worker import TrainingWorker
+from src.preprocessing.features import FeatureStore, FEATURE_COLUMNS
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import copy
 import pickle
+import time
 from datetime import datetime, timedelta
 
+# Newest readings per city used for training; retraining cost stays
+# constant however much history a city has
+TRAINING_LIMIT = int(os.getenv('TRAINING_WINDOW', 200))
+
+# Retraining strategy: 'window' refits on the newest TRAINING_LIMIT rows,
+# 'warm_start' adds WARM_START_TREES trees fitted on rows past the watermark.
+# Warm start needs the sklearn forest, so it only applies to models trained
+# by this process; models loaded from disk (flat format) are refitted on
+# the window instead.
+RETRAIN_STRATEGY = os.getenv('RETRAIN_STRATEGY', 'window')
+WARM_START_TREES = int(os.getenv('WARM_START_TREES', 20))
+# A forest that would grow past this is refitted on the window instead
+MAX_TREES = int(os.getenv('MAX_TREES', 200))
+
+# Saved model predictions are served from: 'full', or 'compact' (a smaller
+# variant saved next to it after training, see src/models/compaction.py)
+MODEL_VARIANT = os.getenv('MODEL_VARIANT', 'full')
+
+# Rows needed to compute lag-1 and rolling-3 features
+INFERENCE_WINDOW = 3
+
+# How far back from a city's latest reading the window is looked for first;
+# a literal lower bound lets Postgres prune partitions while planning
+INFERENCE_LOOKBACK = timedelta(days=1)
+
+# Newest readings with weather for one city, newest first
+INFERENCE_QUERY = """
+    SELECT aq.timestamp, aq.aqi, aq.pm25, aq.pm10, aq.no2, aq.so2, aq.co, aq.o3,
+           w.temperature, w.humidity, w.wind_speed, w.pressure
+    FROM air_quality aq
+    JOIN LATERAL (
+        SELECT temperature, humidity, wind_speed, pressure
+        FROM weather
+        WHERE weather.city_id = aq.city_id
+            AND weather.time_bucket = aq.time_bucket
+            AND weather.timestamp >= aq.time_bucket
+            AND weather.timestamp < aq.time_bucket + INTERVAL '1 second'
+            AND (%(since)s::timestamp IS NULL OR weather.timestamp >= %(since)s)
+        LIMIT 1
+    ) w ON TRUE
+    WHERE aq.city_id = %(city_id)s
+        AND (%(since)s::timestamp IS NULL OR aq.timestamp >= %(since)s)
+    ORDER BY aq.timestamp DESC
+    LIMIT %(limit)s;
+"""
+
+INFERENCE_COLUMNS = ('timestamp',) + AIR_QUALITY_FIELDS + WEATHER_FIELDS
+
+# Newest readings with weather for many cities at once, each bounded by its
+# own latest reading; `since` is the lowest of those bounds, as a literal
+BATCH_INFERENCE_QUERY = """
+    SELECT lr.city_id, r.*
+    FROM latest_readings lr
+    CROSS JOIN LATERAL (
+        SELECT aq.timestamp, aq.aqi, aq.pm25, aq.pm10, aq.no2, aq.so2, aq.co, aq.o3,
+               w.temperature, w.humidity, w.wind_speed, w.pressure
+        FROM air_quality aq
+        JOIN LATERAL (
+            SELECT temperature, humidity, wind_speed, pressure
+            FROM weather
+            WHERE weather.city_id = aq.city_id
+                AND weather.time_bucket = aq.time_bucket
+                AND weather.timestamp >= aq.time_bucket
+                AND weather.timestamp < aq.time_bucket + INTERVAL '1 second'
+                AND weather.timestamp >= %(since)s
+            LIMIT 1
+        ) w ON TRUE
+        WHERE aq.city_id = lr.city_id
+            AND aq.timestamp >= lr.aqi_timestamp - %(lookback)s
+            AND aq.timestamp >= %(since)s
+        ORDER BY aq.timestamp DESC
+        LIMIT %(limit)s
+    ) r
+    WHERE lr.city_id = ANY(%(city_ids)s)
+    ORDER BY lr.city_id, r.timestamp DESC;
+"""
+
+def add_features(df):
+    """Add time, lag and rolling features to readings sorted oldest first"""
+    # Create time-based features
+    df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
+    df['day_of_week'] = pd.to_datetime(df['timestamp']).dt.dayofweek
+    
+    # Create lag features (previous values)
+    df['aqi_lag_1'] = df['aqi'].shift(1)
+    df['pm25_lag_1'] = df['pm25'].shift(1)
+    df['pm10_lag_1'] = df['pm10'].shift(1)
+    
+    # Create rolling averages
+    df['aqi_rolling_3'] = df['aqi'].rolling(window=3).mean()
+    df['pm25_rolling_3'] = df['pm25'].rolling(window=3).mean()
+    
+    # Drop rows with NaN (from lag features)
+    return df.dropna()
+
+def build_features(rows, feature_columns):
+    """Feature vector for the newest of `rows` (dicts, newest first)
+    
+    Computes the same values as prepare_data() does for its last row, but
+    from INFERENCE_WINDOW rows without a DataFrame. Returns None when there
+    are too few rows or a needed value is missing.
+    """
+    if len(rows) < INFERENCE_WINDOW:
+        return None
+    
+    window = rows[:INFERENCE_WINDOW]
+    latest, previous = window[0], window[1]
+    
+    if any(row['aqi'] is None or row['pm25'] is None for row in window):
+        return None
+    
+    values = dict(latest)
+    values['hour'] = latest['timestamp'].hour
+    values['day_of_week'] = latest['timestamp'].weekday()
+    values['aqi_lag_1'] = previous['aqi']
+    values['pm25_lag_1'] = previous['pm25']
+    values['pm10_lag_1'] = previous['pm10']
+    values['aqi_rolling_3'] = sum(float(row['aqi']) for row in window) / INFERENCE_WINDOW
+    values['pm25_rolling_3'] = sum(float(row['pm25']) for row in window) / INFERENCE_WINDOW
+    
+    features = [values[column] for column in feature_columns]
+    if any(value is None for value in features):
+        return None
+    
+    return [float(value) for value in features]
+
+# Smoothing factor of the EWMA used while a city has no model
+FALLBACK_ALPHA = 0.5
+
+def ewma_forecast(windows, alpha=FALLBACK_ALPHA):
+    """Next-value forecast per row of `windows` (AQI, newest first, NaN padded)"""
+    values = np.asarray(windows, dtype=float)
+    weights = alpha * (1 - alpha) ** np.arange(values.shape[1])
+    present = ~np.isnan(values)
+    return np.nansum(values * weights, axis=1) / (present * weights).sum(axis=1)
+
+def model_path(city_name, models_dir='data/models', variant='full'):
+    """Path of a city's saved model (metadata file of the flat format)"""
+    suffix = '_compact' if variant == 'compact' else ''
+    return os.path.join(models_dir, f'aqi_model_{city_name.lower()}{suffix}.json')
+
+def legacy_model_path(city_name, models_dir='data/models'):
+    """Path of a city's pickled model, as saved before the flat format"""
+    return os.path.join(models_dir, f'aqi_model_{city_name.lower()}.pkl')
+
+def find_model_path(city_name, models_dir='data/models', variant='full'):
+    """Path of the model a city is served from, or None if it has none
+    
+    The compact variant falls back to the full model while it doesn't exist.
+    """
+    paths = [model_path(city_name, models_dir), legacy_model_path(city_name, models_dir)]
+    if variant == 'compact':
+        paths.insert(0, model_path(city_name, models_dir, variant))
+    
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+def split_data(df):
+    """Train/test split of prepared data, shared by fitting and compaction
+    
+    The newest 20% of readings are held out, so the test score never
+    benefits from training on later readings.
+    """
+    return train_test_split(df[FEATURE_COLUMNS], df['aqi'], test_size=0.2, shuffle=False)
+
+def new_forest(n_jobs=-1):
+    """Unfitted forest with the settings every city model uses"""
+    return RandomForestRegressor(
+        n_estimators=100,
+        max_depth=10,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+
+def fit_model(df, n_jobs=-1):
+    """Split, fit and evaluate a forest on prepared data; returns model and metrics"""
+    X_train, X_test, y_train, y_test = split_data(df)
+    
+    model = new_forest(n_jobs)
+    model.fit(X_train, y_train)
+    
+    result = {'model': model, 'train_size': len(X_train), 'test_size': len(X_test)}
+    for split, X_split, y_split in (('train', X_train, y_train), ('test', X_test, y_test)):
+        predicted = model.predict(X_split)
+        result[f'{split}_mae'] = mean_absolute_error(y_split, predicted)
+        result[f'{split}_rmse'] = np.sqrt(mean_squared_error(y_split, predicted))
+        result[f'{split}_r2'] = r2_score(y_split, predicted)
+    
+    return result
+
+def build_artifact(city_name, fit, df):
+    """Saved form of a fitted model; `watermark` is the newest reading it saw"""
+    return {
+        'model': fit['model'],
+        'feature_columns': list(FEATURE_COLUMNS),
+        'city': city_name,
+        'trained_date': datetime.now(),
+        'watermark': pd.Timestamp(df['timestamp'].max()).to_pydatetime(),
+        'training_rows': len(df),
+        'performance': {
+            'test_mae': fit['test_mae'],
+            'test_rmse': fit['test_rmse'],
+            'test_r2': fit['test_r2']
+        }
+    }
+
+def build_compact_artifact(artifact, df):
+    """Compact variant of an artifact, chosen on the test split of `df`
+    
+    Returns the artifact and the compaction report.
+    """
+    X_train, X_test, _, y_test = split_data(df)
+    chosen, forest, report = compact_forest(artifact['model'], X_train, X_test, y_test)
+    
+    entry = next(entry for entry in report if entry['variant'] == chosen)
+    compact = dict(artifact, model=forest, variant=chosen)
+    compact['performance'] = dict(artifact['performance'], compact_mae=entry['mae'])
+    return compact, report
+
+def save_artifact(artifact, path):
+    """Save an artifact atomically, so readers never see a partial file
+    
+    .pkl paths get the legacy pickle, anything else the flat format.
+    """
+    if not path.endswith('.pkl'):
+        save_flat(artifact, path)
+        return
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(artifact, f)
+    os.replace(temp_path, path)
+
+def process_peak_rss_mb():
+    """Peak resident memory of this process so far, or None where unsupported
+    
+    The high-water mark covers the whole life of the process, not one job.
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return None
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def train_city_job(city_name, df, models_dir, n_jobs, variant='full'):
+    """Fit and save one city's model; run in a worker process by train_all"""
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    
+    fit = fit_model(df, n_jobs=n_jobs)
+    artifact = build_artifact(city_name, fit, df)
+    save_artifact(artifact, model_path(city_name, models_dir))
+    if variant == 'compact':
+        save_artifact(build_compact_artifact(artifact, df)[0], model_path(city_name, models_dir, variant))
+    
+    return {
+        'city': city_name,
+        'samples': len(df),
+        'wall_seconds': time.perf_counter() - wall_started,
+        'cpu_seconds': time.process_time() - cpu_started,
+        'process_peak_rss_mb': process_peak_rss_mb(),
+        'test_mae': fit['test_mae']
+    }
+
 class AQIPredictor:
     """Machine Learning model to predict AQI"""
     
-    def __init__(self):
+    def __init__(self, registry=None, models_dir=None, variant=None):
         self.db = DatabaseOperations()
+        self.models_dir = models_dir or os.getenv('MODELS_DIR', 'data/models')
+        self.variant = variant or MODEL_VARIANT
+        # Per-city models, loaded lazily and reloaded when the file changes
+        self.registry = registry or ModelRegistry()
+        # Cross-city feature frames, cached on disk
+        self.features = FeatureStore(db=self.db)
+        # Missing or stale models are trained off the request path
+        self.trainer = TrainingWorker(self._train_in_background)
+        self._background_predictor = None
+        # 0 disables age-based retraining
+        self.max_model_age = timedelta(hours=float(os.getenv('MODEL_MAX_AGE_HOURS', 0)))
         self.model = None
         self.feature_columns = None
     
-    def prepare_data(self, city_name, limit=100):
-        """Prepare data for training"""
-        connection = self.db.get_connection()
+    def prepare_data(self, city_name, limit=100, newest=False, after=None):
+        """Prepare data for training (the oldest `limit` readings, or the newest)
         
-        query = """
+        With `after`, the oldest `limit` readings later than that timestamp;
+        the two readings before them are read too, for their lag features.
+        """
+        if after is None:
+            readings = f"""
+                SELECT * FROM air_quality
+                WHERE city_id = %(city_id)s
+                ORDER BY timestamp {'DESC' if newest else 'ASC'}
+                LIMIT %(limit)s
+            """
+        else:
+            readings = """
+                (SELECT * FROM air_quality
+                 WHERE city_id = %(city_id)s AND timestamp > %(after)s
+                 ORDER BY timestamp ASC
+                 LIMIT %(limit)s)
+                UNION ALL
+                (SELECT * FROM air_quality
+                 WHERE city_id = %(city_id)s AND timestamp <= %(after)s
+                 ORDER BY timestamp DESC
+                 LIMIT 2)
+            """
+        
+        query = f"""
             SELECT 
                 aq.timestamp,
                 aq.aqi,
@@ -37,38 +352,30 @@ class AQIPredictor:
                 w.humidity,
                 w.wind_speed,
                 w.pressure
-            FROM air_quality aq
-            JOIN weather w ON aq.city_id = w.city_id 
-                AND DATE_TRUNC('second', aq.timestamp) = DATE_TRUNC('second', w.timestamp)
-            WHERE aq.city_id = (SELECT city_id FROM cities WHERE city_name = %s)
-            ORDER BY aq.timestamp ASC
-            LIMIT %s;
+            FROM ({readings}) aq
+            JOIN LATERAL (
+                SELECT temperature, humidity, wind_speed, pressure
+                FROM weather
+                WHERE weather.city_id = aq.city_id
+                    AND weather.time_bucket = aq.time_bucket
+                    -- Bounds on the partition key let Postgres probe one partition per row
+                    AND weather.timestamp >= aq.time_bucket
+                    AND weather.timestamp < aq.time_bucket + INTERVAL '1 second'
+                LIMIT 1
+            ) w ON TRUE
+            ORDER BY aq.timestamp ASC;
         """
         
-        df = pd.read_sql(query, connection, params=(city_name, limit))
-        connection.close()
+        city_id = self.db.get_city_id(city_name)
+        
+        with self.db.connection() as connection:
+            df = pd.read_sql(query, connection, params={'city_id': city_id, 'limit': limit, 'after': after})
         
         if df.empty:
             print(f"No data found for {city_name}")
             return None
         
-        # Create time-based features
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        df['day_of_week'] = pd.to_datetime(df['timestamp']).dt.dayofweek
-        
-        # Create lag features (previous values)
-        df['aqi_lag_1'] = df['aqi'].shift(1)
-        df['pm25_lag_1'] = df['pm25'].shift(1)
-        df['pm10_lag_1'] = df['pm10'].shift(1)
-        
-        # Create rolling averages
-        df['aqi_rolling_3'] = df['aqi'].rolling(window=3).mean()
-        df['pm25_rolling_3'] = df['pm25'].rolling(window=3).mean()
-        
-        # Drop rows with NaN (from lag features)
-        df = df.dropna()
-        
-        return df
+        return add_features(df)
     
     def train_model(self, city_name='Delhi'):
         """Train the prediction model"""
@@ -79,7 +386,7 @@ class AQIPredictor:
         
         # Prepare data
         print("📊 Preparing data...")
-        df = self.prepare_data(city_name, limit=200)
+        df = self.prepare_data(city_name, limit=TRAINING_LIMIT, newest=True)
         
         if df is None or len(df) < 10:
             print("❌ Not enough data to train model!")
@@ -88,67 +395,28 @@ class AQIPredictor:
         print(f"✓ Loaded {len(df)} samples")
         print()
         
-        # Define features and target
-        self.feature_columns = [
-            'pm25', 'pm10', 'no2', 'so2', 'co', 'o3',
-            'temperature', 'humidity', 'wind_speed', 'pressure',
-            'hour', 'day_of_week',
-            'aqi_lag_1', 'pm25_lag_1', 'pm10_lag_1',
-            'aqi_rolling_3', 'pm25_rolling_3'
-        ]
-        
-        X = df[self.feature_columns]
-        y = df['aqi']
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        print(f"📈 Training set: {len(X_train)} samples")
-        print(f"📉 Test set: {len(X_test)} samples")
-        print()
-        
         # Train model
         print("🔄 Training Random Forest model...")
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        
-        self.model.fit(X_train, y_train)
+        fit = fit_model(df)
+        self.model = fit['model']
+        self.feature_columns = list(FEATURE_COLUMNS)
         print("✓ Model trained successfully!")
         print()
         
+        print(f"📈 Training set: {fit['train_size']} samples")
+        print(f"📉 Test set: {fit['test_size']} samples")
+        print()
+        
         # Evaluate model
         print("📊 Model Performance:")
         print("-" * 70)
         
-        # Training set performance
-        train_pred = self.model.predict(X_train)
-        train_mae = mean_absolute_error(y_train, train_pred)
-        train_rmse = np.sqrt(mean_squared_error(y_train, train_pred))
-        train_r2 = r2_score(y_train, train_pred)
-        
-        print(f"Training Set:")
-        print(f"  MAE (Mean Absolute Error): {train_mae:.2f}")
-        print(f"  RMSE (Root Mean Squared Error): {train_rmse:.2f}")
-        print(f"  R² Score: {train_r2:.4f}")
-        print()
-        
-        # Test set performance
-        test_pred = self.model.predict(X_test)
-        test_mae = mean_absolute_error(y_test, test_pred)
-        test_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
-        test_r2 = r2_score(y_test, test_pred)
-        
-        print(f"Test Set:")
-        print(f"  MAE (Mean Absolute Error): {test_mae:.2f}")
-        print(f"  RMSE (Root Mean Squared Error): {test_rmse:.2f}")
-        print(f"  R² Score: {test_r2:.4f}")
-        print()
+        for label, split in (("Training Set", 'train'), ("Test Set", 'test')):
+            print(f"{label}:")
+            print(f"  MAE (Mean Absolute Error): {fit[f'{split}_mae']:.2f}")
+            print(f"  RMSE (Root Mean Squared Error): {fit[f'{split}_rmse']:.2f}")
+            print(f"  R² Score: {fit[f'{split}_r2']:.4f}")
+            print()
         
         # Feature importance
         feature_importance = pd.DataFrame({
@@ -163,23 +431,9 @@ class AQIPredictor:
         print()
         
         # Save model
-        os.makedirs('data/models', exist_ok=True)
-        model_path = f'data/models/aqi_model_{city_name.lower()}.pkl'
-        
-        with open(model_path, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'feature_columns': self.feature_columns,
-                'city': city_name,
-                'trained_date': datetime.now(),
-                'performance': {
-                    'test_mae': test_mae,
-                    'test_rmse': test_rmse,
-                    'test_r2': test_r2
-                }
-            }, f)
-        
-        print(f"💾 Model saved: {model_path}")
+        path = self.publish_model(city_name, build_artifact(city_name, fit, df), df)
+        
+        print(f"💾 Model saved: {path}")
         print()
         print("=" * 70)
         print("✅ MODEL TRAINING COMPLETE!")
@@ -187,52 +441,371 @@ class AQIPredictor:
         
         return True
     
+    def publish_model(self, city_name, artifact, df):
+        """Save a newly fitted artifact, plus its compact variant if that is
+        what's served, and cache them; returns the full model's path"""
+        path = model_path(city_name, self.models_dir)
+        save_artifact(artifact, path)
+        
+        # Serve the new model without loading it again
+        self.registry.put(os.path.realpath(path), path, artifact)
+        
+        if self.variant == 'compact':
+            self.compact_model(city_name, artifact, df)
+        
+        return path
+    
+    def compact_model(self, city_name, artifact=None, df=None):
+        """Save the compact variant of a city's model and print how it compares
+        
+        Defaults to the saved full model, evaluated on the newest readings.
+        Returns the compaction report, or None if there is no model.
+        """
+        if artifact is None:
+            artifact = self.get_model(city_name, variant='full')
+            if artifact is None:
+                print(f"❌ No saved model found for {city_name}")
+                return None
+        if df is None:
+            df = self.prepare_data(city_name, limit=TRAINING_LIMIT, newest=True)
+        
+        compact, report = build_compact_artifact(artifact, df)
+        
+        path = model_path(city_name, self.models_dir, 'compact')
+        save_artifact(compact, path)
+        self.registry.put(os.path.realpath(path), path, compact)
+        
+        print(f"🗜️  Compact model for {city_name}: {compact['variant']}")
+        print_compaction_report(report, compact['variant'])
+        return report
+    
+    def retrain_model(self, city_name, strategy=None):
+        """Bring a city's model up to date with readings past its watermark
+        
+        Cities without a model, or with a legacy one that has no watermark,
+        get a full train_model(). Otherwise the readings past the watermark
+        are fetched, oldest first and at most TRAINING_LIMIT of them. With
+        the 'window' strategy the model is refitted on the newest
+        TRAINING_LIMIT readings; with 'warm_start' the forest keeps its trees
+        and gains WARM_START_TREES new ones fitted on the readings past the
+        watermark, and a longer backlog is worked through over several calls
+        (while the sklearn forest is still in memory; flat-format models
+        loaded from disk are refitted). Returns True if the model is current.
+        """
+        strategy = strategy or RETRAIN_STRATEGY
+        artifact = self.get_model(city_name, variant='full')
+        
+        if artifact is None or artifact.get('watermark') is None:
+            return self.train_model(city_name)
+        
+        watermark = artifact['watermark']
+        recent = self.prepare_data(city_name, limit=TRAINING_LIMIT, after=watermark)
+        
+        if recent is None or recent.empty:
+            print(f"✓ {city_name} model is up to date ({watermark:%Y-%m-%d %H:%M})")
+            return True
+        
+        df = self.prepare_data(city_name, limit=TRAINING_LIMIT, newest=True)
+        if df is None or len(df) < 10:
+            print(f"❌ Not enough data to retrain {city_name}")
+            return False
+        
+        # Error of the current model on readings it has never seen
+        recent_mae = mean_absolute_error(recent['aqi'], artifact['model'].predict(recent[FEATURE_COLUMNS]))
+        trees = artifact['model'].n_estimators
+        
+        # Models loaded from the flat format can't grow; they are refitted
+        can_grow = isinstance(artifact['model'], RandomForestRegressor)
+        
+        if strategy == 'warm_start' and can_grow and trees + WARM_START_TREES <= MAX_TREES and len(recent) >= 2:
+            # Fit a copy; the registry keeps serving the current model meanwhile
+            model = copy.deepcopy(artifact['model'])
+            model.set_params(warm_start=True, n_estimators=trees + WARM_START_TREES)
+            model.fit(recent[FEATURE_COLUMNS], recent['aqi'])
+            
+            updated = dict(artifact, model=model, trained_date=datetime.now(),
+                           watermark=pd.Timestamp(recent['timestamp'].max()).to_pydatetime(),
+                           training_rows=artifact.get('training_rows', 0) + len(recent))
+            updated['performance'] = dict(artifact['performance'])
+            method = f"added {WARM_START_TREES} trees ({model.n_estimators} total)"
+        else:
+            updated = build_artifact(city_name, fit_model(df), df)
+            method = f"refitted on the newest {len(df)} rows"
+        
+        updated['performance']['recent_mae'] = recent_mae
+        
+        self.publish_model(city_name, updated, df)
+        
+        print(f"✓ {city_name}: {len(recent)} new rows, {method} "
+              f"(MAE on them before the update: {recent_mae:.2f})")
+        return True
+    
+    def prepare_training_data(self, city_names=None, limit=TRAINING_LIMIT):
+        """Training data for many cities from one query: {city_name: DataFrame}"""
+        df = self.features.get_features(city_names, limit=limit)
+        
+        return {
+            city_name: group.drop(columns=['city_id', 'city_name']).reset_index(drop=True)
+            for city_name, group in df.groupby('city_name', sort=True, observed=True)
+        }
+    
+    def train_all(self, city_names=None, workers=None):
+        """Train every city's model in parallel and report the cost per city
+        
+        Data for all cities is pulled in one query and split in memory.
+        Cities are fitted in a process pool (`workers` processes, default
+        TRAIN_WORKERS or one per core); cores left over when there are
+        fewer cities than cores go to each forest's own threads. Each fit
+        is small, so spreading cities over processes scales better than
+        spreading one fit's trees. Returns the per-city report; its memory
+        column is the peak RSS of the process that fitted the city, which
+        pool workers (or, with one process, this one) carry across cities.
+        """
+        started = time.perf_counter()
+        cpus = os.cpu_count() or 1
+        
+        print("=" * 70)
+        print("🤖 TRAINING MODELS FOR ALL CITIES")
+        print("=" * 70)
+        
+        data = self.prepare_training_data(city_names)
+        print(f"✓ Loaded {sum(len(df) for df in data.values()):,} samples for {len(data)} cities "
+              f"in {time.perf_counter() - started:.2f}s")
+        
+        for city_name in sorted(set(city_names or self.db.get_city_names()) - set(data)):
+            print(f"❌ {city_name}: no data")
+        
+        trainable = {city_name: df for city_name, df in data.items() if len(df) >= 10}
+        for city_name in sorted(set(data) - set(trainable)):
+            print(f"❌ {city_name}: not enough data to train model")
+        
+        if not trainable:
+            return []
+        
+        outer = min(workers or int(os.getenv('TRAIN_WORKERS', 0)) or cpus, len(trainable))
+        inner = max(1, cpus // outer)
+        print(f"Processes: {outer} | Threads per forest: {inner}")
+        print()
+        
+        report = []
+        if outer == 1:
+            for city_name, df in trainable.items():
+                report.append(train_city_job(city_name, df, self.models_dir, inner, self.variant))
+        else:
+            with ProcessPoolExecutor(max_workers=outer) as executor:
+                futures = [
+                    executor.submit(train_city_job, city_name, df, self.models_dir, inner, self.variant)
+                    for city_name, df in trainable.items()
+                ]
+                for future in as_completed(futures):
+                    try:
+                        report.append(future.result())
+                    except Exception as e:
+                        print(f"❌ Training failed: {e}")
+        
+        report.sort(key=lambda row: row['city'])
+        elapsed = time.perf_counter() - started
+        
+        print(f"{'City':<15} {'Samples':>8} {'Wall (s)':>10} {'CPU (s)':>10} {'Process peak RSS (MB)':>22} {'Test MAE':>10}")
+        print("-" * 80)
+        for row in report:
+            peak = row['process_peak_rss_mb']
+            print(f"{row['city']:<15} {row['samples']:>8} {row['wall_seconds']:>10.2f} {row['cpu_seconds']:>10.2f} "
+                  f"{f'{peak:.1f}' if peak is not None else 'n/a':>22} {row['test_mae']:>10.2f}")
+        print("-" * 80)
+        
+        cpu_total = sum(row['cpu_seconds'] for row in report)
+        print(f"✅ Trained {len(report)} models in {elapsed:.2f}s wall, {cpu_total:.2f}s CPU "
+              f"({len(report) / elapsed * 3600:,.0f} models/hour)")
+        print("=" * 70)
+        
+        return report
+    
+    def get_model(self, city_name, variant=None):
+        """Return a city's saved model artifact from the registry, or None"""
+        path = find_model_path(city_name, self.models_dir, variant or self.variant)
+        if path is None:
+            return None
+        
+        # Keyed by the resolved file, so cities symlinked to one model share it
+        artifact, loaded = self.registry.lookup(os.path.realpath(path), path)
+        
+        if loaded:
+            print(f"✓ Model loaded for {city_name}")
+        
+        return artifact
+    
+    def is_stale(self, artifact, latest_reading=None):
+        """Whether a model is older than MODEL_MAX_AGE_HOURS and has readings to learn from
+        
+        A model whose watermark already covers `latest_reading` (the city's
+        newest reading) isn't stale however old it is: retraining would
+        find nothing new.
+        """
+        trained = artifact.get('trained_date')
+        if not self.max_model_age or trained is None or datetime.now() - trained <= self.max_model_age:
+            return False
+        
+        watermark = artifact.get('watermark')
+        return watermark is None or latest_reading is None or latest_reading > watermark
+    
+    def _train_in_background(self, city_name):
+        """Training job run by the worker thread, with its own predictor state"""
+        if self._background_predictor is None:
+            self._background_predictor = AQIPredictor(registry=self.registry, models_dir=self.models_dir,
+                                                      variant=self.variant)
+        return self._background_predictor.retrain_model(city_name)
+    
     def load_model(self, city_name='Delhi'):
         """Load a saved model"""
-        model_path = f'data/models/aqi_model_{city_name.lower()}.pkl'
+        artifact = self.get_model(city_name)
         
-        if not os.path.exists(model_path):
+        if artifact is None:
             print(f"❌ No saved model found for {city_name}")
             return False
         
-        with open(model_path, 'rb') as f:
-            data = pickle.load(f)
-            self.model = data['model']
-            self.feature_columns = data['feature_columns']
-        
-        print(f"✓ Model loaded for {city_name}")
+        self.model = artifact['model']
+        self.feature_columns = artifact['feature_columns']
         return True
     
-    def predict_next_aqi(self, city_name='Delhi'):
-        """Predict next AQI value"""
-        if self.model is None:
-            if not self.load_model(city_name):
-                print("Training new model...")
-                self.train_model(city_name)
+    def fetch_inference_rows(self, city_name):
+        """Newest INFERENCE_WINDOW readings joined with weather, newest first"""
+        params = {'city_id': self.db.get_city_id(city_name), 'since': None, 'limit': INFERENCE_WINDOW}
         
-        # Get latest data
-        df = self.prepare_data(city_name, limit=10)
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute("SELECT aqi_timestamp FROM latest_readings WHERE city_id = %s;", (params['city_id'],))
+            latest = cursor.fetchone()
+            if latest and latest[0]:
+                params['since'] = latest[0] - INFERENCE_LOOKBACK
+            
+            cursor.execute(INFERENCE_QUERY, params)
+            rows = cursor.fetchall()
+            
+            # Weather gaps can push the window further back; search all history
+            if len(rows) < INFERENCE_WINDOW and params['since'] is not None:
+                cursor.execute(INFERENCE_QUERY, dict(params, since=None))
+                rows = cursor.fetchall()
+            
+            cursor.close()
         
-        if df is None or len(df) == 0:
-            print("❌ No data available for prediction")
-            return None
+        return [dict(zip(INFERENCE_COLUMNS, row)) for row in rows]
+    
+    def fetch_inference_rows_batch(self, city_ids):
+        """Newest INFERENCE_WINDOW rows for many cities in one query: {city_id: rows}"""
+        windows = {city_id: [] for city_id in city_ids}
         
-        # Get the latest row
-        latest = df.iloc[-1]
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute(
+                "SELECT MIN(aqi_timestamp) FROM latest_readings WHERE city_id = ANY(%s);",
+                (list(city_ids),)
+            )
+            oldest = cursor.fetchone()[0]
+            
+            if oldest is not None:
+                cursor.execute(BATCH_INFERENCE_QUERY, {
+                    'city_ids': list(city_ids),
+                    'since': oldest - INFERENCE_LOOKBACK,
+                    'lookback': INFERENCE_LOOKBACK,
+                    'limit': INFERENCE_WINDOW
+                })
+                for row in cursor.fetchall():
+                    windows[row[0]].append(dict(zip(INFERENCE_COLUMNS, row[1:])))
+            
+            cursor.close()
         
-        # Prepare features
-        features = latest[self.feature_columns].values.reshape(1, -1)
+        return windows
+    
+    def predict_batch(self, city_names=None):
+        """Predict the next AQI for many cities at once
+        
+        Features for every city come from one query. Cities are grouped by
+        model and each model predicts its whole group in one call. Cities
+        whose model is missing (or stale) are queued for background
+        training; until a model exists they get an EWMA forecast over the
+        latest readings. Nothing is trained here. Returns a DataFrame with
+        one row per predicted city; `served_by` says which predictor
+        answered.
+        """
+        city_names = city_names or self.db.get_city_names()
+        city_ids = {city: self.db.get_city_id(city) for city in city_names}
+        city_ids = {city: city_id for city, city_id in city_ids.items() if city_id}
+        
+        windows = self.fetch_inference_rows_batch(list(city_ids.values()))
+        
+        groups = {}     # id(model) -> (artifact, [(city, rows, features)])
+        fallback = []   # (city, rows)
+        for city, city_id in city_ids.items():
+            rows = windows[city_id]
+            if len(rows) < INFERENCE_WINDOW:
+                # Weather gaps pushed the window past the lookback
+                rows = self.fetch_inference_rows(city)
+            if not rows or rows[0]['aqi'] is None:
+                continue
+            
+            artifact = self.get_model(city)
+            if (artifact is None or self.is_stale(artifact, rows[0]['timestamp'])) and self.trainer.request(city):
+                print(f"🛠️  Queued {city} for background training")
+            
+            features = build_features(rows, artifact['feature_columns']) if artifact else None
+            if features is None:
+                fallback.append((city, rows))
+                continue
+            
+            group = groups.setdefault(id(artifact['model']), (artifact, []))
+            group[1].append((city, rows, features))
         
-        # Make prediction
-        predicted_aqi = self.model.predict(features)[0]
+        predicted_at = datetime.now()
+        predictions = []
         
-        return {
-            'city': city_name,
-            'current_aqi': int(latest['aqi']),
-            'predicted_aqi': int(predicted_aqi),
-            'change': int(predicted_aqi - latest['aqi']),
-            'timestamp': datetime.now()
-        }
+        def add(city, rows, predicted_aqi, served_by, model_city=None):
+            current_aqi = rows[0]['aqi']
+            predictions.append({
+                'city': city,
+                'current_aqi': int(current_aqi),
+                'predicted_aqi': int(predicted_aqi),
+                'change': int(predicted_aqi - current_aqi),
+                'reading_timestamp': rows[0]['timestamp'],
+                'served_by': served_by,
+                'model_city': model_city,
+                'timestamp': predicted_at
+            })
+        
+        for artifact, members in groups.values():
+            predicted = as_flat(artifact['model']).predict(np.array([features for _, _, features in members]))
+            for (city, rows, _), predicted_aqi in zip(members, predicted):
+                add(city, rows, predicted_aqi, 'model', artifact.get('city'))
+        
+        if fallback:
+            aqi = np.full((len(fallback), INFERENCE_WINDOW), np.nan)
+            for index, (_, rows) in enumerate(fallback):
+                values = [row['aqi'] for row in rows[:INFERENCE_WINDOW]]
+                aqi[index, :len(values)] = [np.nan if value is None else value for value in values]
+            
+            for (city, rows), predicted_aqi in zip(fallback, ewma_forecast(aqi)):
+                add(city, rows, predicted_aqi, 'ewma_fallback')
+        
+        df = pd.DataFrame(predictions, columns=[
+            'city', 'current_aqi', 'predicted_aqi', 'change',
+            'reading_timestamp', 'served_by', 'model_city', 'timestamp'
+        ])
+        
+        # Same order as requested
+        order = {city: position for position, city in enumerate(city_ids)}
+        return df.sort_values('city', key=lambda cities: cities.map(order)).reset_index(drop=True)
+    
+    def predict_next_aqi(self, city_name='Delhi'):
+        """Predict next AQI value (see predict_batch)"""
+        df = self.predict_batch([city_name])
+        
+        if df.empty:
+            print("❌ No data available for prediction")
+            return None
+        
+        return df.to_dict('records')[0]
     
     def predict_all_cities(self):
         """Predict AQI for all cities"""
@@ -241,32 +814,27 @@ class AQIPredictor:
         print("=" * 70)
         print()
         
-        cities = ['Delhi', 'Mumbai', 'Kolkata', 'Chennai', 
-                 'Bangalore', 'Hyderabad', 'Pune', 'Ahmedabad']
+        cities = self.db.get_city_names()
         
-        predictions = []
+        try:
+            df = self.predict_batch(cities)
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            return []
+        
+        predictions = df.to_dict('records')
+        by_city = {prediction['city']: prediction for prediction in predictions}
         
         for city in cities:
             print(f"Predicting for {city}...", end=" ")
+            prediction = by_city.get(city)
             
-            try:
-                # Train model if not exists
-                model_path = f'data/models/aqi_model_{city.lower()}.pkl'
-                if not os.path.exists(model_path):
-                    self.train_model(city)
-                else:
-                    self.load_model(city)
-                
-                prediction = self.predict_next_aqi(city)
-                
-                if prediction:
-                    predictions.append(prediction)
-                    trend = "↑" if prediction['change'] > 0 else "↓" if prediction['change'] < 0 else "→"
-                    print(f"Current: {prediction['current_aqi']} → Predicted: {prediction['predicted_aqi']} {trend}")
-                else:
-                    print("❌ Failed")
-            except Exception as e:
-                print(f"❌ Error: {str(e)}")
+            if prediction:
+                trend = "↑" if prediction['change'] > 0 else "↓" if prediction['change'] < 0 else "→"
+                fallback = " (EWMA fallback)" if prediction['served_by'] == 'ewma_fallback' else ""
+                print(f"Current: {prediction['current_aqi']} → Predicted: {prediction['predicted_aqi']} {trend}{fallback}")
+            else:
+                print("❌ Failed")
         
         print()
         print("=" * 70)
@@ -280,6 +848,12 @@ class AQIPredictor:
             change_str = f"{pred['change']:+d}"
             print(f"{pred['city']:<15} {pred['current_aqi']:<15} {pred['predicted_aqi']:<15} {change_str:<10} {trend}")
         
+        stats = self.registry.stats()
+        print(f"Model cache: {stats['hits']} hits, {stats['loads'] + stats['reloads']} loads "
+              f"({stats['avg_load_ms']:.1f} ms avg), {stats['evictions']} evictions")
+        pending = self.trainer.pending()
+        if pending:
+            print(f"Training in background: {', '.join(sorted(pending))}")
         print("=" * 70)
         print("✅ PREDICTIONS COMPLETE!")
         print("=" * 70)
@@ -289,12 +863,15 @@ class AQIPredictor:
 if __name__ == "__main__":
     predictor = AQIPredictor()
     
-    # Train model for Delhi
-    print("\n🎯 Step 1: Training model for Delhi\n")
-    predictor.train_model('Delhi')
+    # Train models for every city
+    print("\n🎯 Step 1: Training models for all cities\n")
+    predictor.train_all()
     
     print("\n" + "="*70 + "\n")
     
     # Make predictions for all cities
     print("🎯 Step 2: Making predictions for all cities\n")
-    predictor.predict_all_cities()
\ No newline at end of file
+    predictor.predict_all_cities()
+    
+    # Let models queued for missing cities finish before exiting
+    predictor.trainer.wait()
\ No newline at end of file
@@ -0,0 +1,312 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.database.db_operations import DatabaseOperations
+from src.models.aqi_predictor import new_forest, TRAINING_LIMIT
+from src.models.model_store import as_flat
+from src.preprocessing.features import FeatureStore, FEATURE_COLUMNS
+from psycopg2.extras import execute_values
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+# Lead times, in hours after the last reading before a fold's origin, at
+# which its model is scored
+HORIZONS = (1, 6, 24, 72)
+
+# Known ahead of time, so they follow the forecast target; every other
+# input stays at its value at the origin
+CALENDAR_COLUMNS = [FEATURE_COLUMNS.index('hour'), FEATURE_COLUMNS.index('day_of_week')]
+
+# Hours between consecutive origins
+STEP_HOURS = 24
+
+# Earliest timestamp any requested city needs for full training windows
+# (plus two readings for lag features) before the backtest range; cities
+# with less history contribute all of it
+HISTORY_START_QUERY = """
+    SELECT MIN(COALESCE(history.timestamp, first.timestamp))
+    FROM cities c
+    LEFT JOIN LATERAL (
+        SELECT timestamp FROM air_quality
+        WHERE air_quality.city_id = c.city_id AND air_quality.timestamp < %(start)s
+        ORDER BY timestamp DESC
+        OFFSET %(readings)s
+        LIMIT 1
+    ) history ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT MIN(timestamp) AS timestamp FROM air_quality
+        WHERE air_quality.city_id = c.city_id
+    ) first ON TRUE
+    WHERE %(names)s::text[] IS NULL OR c.city_name = ANY(%(names)s);
+"""
+
+def make_folds(df, origins, horizons, training_rows):
+    """Training and test arrays for every city and origin
+    
+    `df` is a feature frame sorted by city and time, as returned by
+    FeatureStore.get_features(). A fold trains on the `training_rows`
+    newest readings before its origin and forecasts the readings up to the
+    longest horizon after the last of them. Test inputs only use what was
+    known at the origin: the last reading's features, with hour and day of
+    week set to the target's. Origins with less history than the training
+    window, or no readings after them, are skipped.
+    """
+    longest = np.timedelta64(max(horizons), 'h')
+    folds = []
+    
+    for city_id, group in df.groupby('city_id', sort=True, observed=True):
+        timestamps = group['timestamp'].to_numpy()
+        X = group[FEATURE_COLUMNS].to_numpy(np.float32)
+        y = group['aqi'].to_numpy(np.float64)
+        
+        for origin in origins:
+            origin = pd.Timestamp(origin).to_datetime64()
+            cutoff = timestamps.searchsorted(origin)
+            if cutoff < training_rows:
+                continue
+            
+            last_seen = timestamps[cutoff - 1]
+            stop = timestamps.searchsorted(last_seen + longest, side='right')
+            if stop == cutoff:
+                continue
+            
+            X_test = np.repeat(X[cutoff - 1:cutoff], stop - cutoff, axis=0)
+            X_test[:, CALENDAR_COLUMNS] = X[cutoff:stop, CALENDAR_COLUMNS]
+            
+            folds.append({
+                'city_id': int(city_id),
+                'origin': pd.Timestamp(origin).to_pydatetime(),
+                'X_train': X[cutoff - training_rows:cutoff],
+                'y_train': y[cutoff - training_rows:cutoff],
+                'X_test': X_test,
+                'y_test': y[cutoff:stop],
+                'lead_hours': (timestamps[cutoff:stop] - last_seen) / np.timedelta64(1, 'h')
+            })
+    
+    return folds
+
+def backtest_fold_job(fold, horizons, n_jobs=1):
+    """Fit one fold's model and score it per horizon; run in a worker process
+    
+    A horizon of h hours scores the readings with a lead time in (h - 1, h],
+    i.e. the hourly reading h hours after the last one the model saw.
+    """
+    model = new_forest(n_jobs).fit(fold['X_train'], fold['y_train'])
+    errors = as_flat(model).predict(fold['X_test']) - fold['y_test']
+    lead = fold['lead_hours']
+    
+    results = []
+    for horizon in horizons:
+        within = errors[(lead > horizon - 1) & (lead <= horizon)]
+        if len(within) == 0:
+            continue
+        results.append({
+            'city_id': fold['city_id'],
+            'origin': fold['origin'],
+            'horizon_hours': horizon,
+            'training_rows': len(fold['y_train']),
+            'test_rows': len(within),
+            'mae': float(np.abs(within).mean()),
+            'rmse': float(np.sqrt(np.mean(within ** 2)))
+        })
+    return results
+
+class Backtester:
+    """Walk-forward (rolling origin) evaluation of the city models
+    
+    Origins are spaced `step_hours` apart over the last `days` of data,
+    starting at the beginning of the range: features are loaded from far
+    enough before it to fill the first training windows. At each origin
+    every city gets a fresh model trained, as in production, on its newest
+    `training_rows` readings before the origin. It then forecasts each
+    horizon from the inputs known at the origin, so the error grows with
+    lead time as it would in production; no fold sees its own future.
+    Folds are fitted in a process pool from one cached feature frame, and
+    per-fold MAE/RMSE are stored in backtest_results.
+    """
+    
+    def __init__(self, db=None, features=None):
+        self.db = db or DatabaseOperations()
+        self.features = features or FeatureStore(db=self.db)
+    
+    def latest_timestamp(self):
+        """Timestamp of the newest reading, or None"""
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT MAX(timestamp) FROM air_quality;")
+            latest = cursor.fetchone()[0]
+            cursor.close()
+        return latest
+    
+    def history_start(self, start, training_rows, city_names=None):
+        """Where to load features from so origins from `start` have full training windows"""
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(HISTORY_START_QUERY, {
+                'start': start,
+                'readings': training_rows + 1,
+                'names': list(city_names) if city_names else None
+            })
+            history_start = cursor.fetchone()[0]
+            cursor.close()
+        return min(history_start, start) if history_start else start
+    
+    def plan(self, city_names=None, days=90, horizons=HORIZONS, step_hours=STEP_HOURS,
+             training_rows=TRAINING_LIMIT):
+        """(folds, range start, range end) for a backtest over the last `days`"""
+        end = self.latest_timestamp()
+        if end is None:
+            return [], None, None
+        
+        start = end - timedelta(days=days)
+        df = self.features.get_features(city_names, start=self.history_start(start, training_rows, city_names))
+        
+        # The last origin still has every horizon ahead of it
+        origins = pd.date_range(pd.Timestamp(start).ceil('h'), end - timedelta(hours=max(horizons)),
+                                freq=f'{step_hours}h')
+        return make_folds(df, origins, horizons, training_rows), start, end
+    
+    def run(self, city_names=None, days=90, horizons=HORIZONS, step_hours=STEP_HOURS,
+            training_rows=TRAINING_LIMIT, workers=None, save=True):
+        """Backtest every city and report the error per horizon
+        
+        Folds go to `workers` processes (default TRAIN_WORKERS or one per
+        core). Returns {'run_id', 'results'}; run_id is None unless saved.
+        """
+        started = time.perf_counter()
+        cpus = os.cpu_count() or 1
+        horizons = tuple(sorted(horizons))
+        
+        print("=" * 70)
+        print("🔁 WALK-FORWARD BACKTEST")
+        print("=" * 70)
+        
+        folds, start, end = self.plan(city_names, days, horizons, step_hours, training_rows)
+        if not folds:
+            print("❌ Not enough data to backtest")
+            return {'run_id': None, 'results': []}
+        
+        outer = min(workers or int(os.getenv('TRAIN_WORKERS', 0)) or cpus, len(folds))
+        inner = max(1, cpus // outer)
+        print(f"Range: {start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M} | Origins every {step_hours}h")
+        print(f"✓ {len(folds)} folds for {len({fold['city_id'] for fold in folds})} cities "
+              f"in {time.perf_counter() - started:.2f}s | Processes: {outer}")
+        
+        results = []
+        if outer == 1:
+            for fold in folds:
+                results.extend(backtest_fold_job(fold, horizons, inner))
+        else:
+            with ProcessPoolExecutor(max_workers=outer) as executor:
+                futures = [executor.submit(backtest_fold_job, fold, horizons, inner) for fold in folds]
+                for future in as_completed(futures):
+                    try:
+                        results.extend(future.result())
+                    except Exception as e:
+                        print(f"❌ Fold failed: {e}")
+        
+        results.sort(key=lambda row: (row['city_id'], row['origin'], row['horizon_hours']))
+        elapsed = time.perf_counter() - started
+        
+        run_id = None
+        if save:
+            run_id = self.save_results({
+                'range_start': start,
+                'range_end': end,
+                'step_hours': step_hours,
+                'training_rows': training_rows,
+                'horizons': list(horizons),
+                'folds': len(folds),
+                'wall_seconds': elapsed
+            }, results)
+        
+        self.print_summary(results, horizons)
+        print(f"✅ Backtested {len(folds)} folds in {elapsed:.2f}s"
+              + (f" (run {run_id})" if run_id is not None else ""))
+        print("=" * 70)
+        
+        return {'run_id': run_id, 'results': results}
+    
+    def save_results(self, run, results):
+        """Store a run and its per-fold errors; returns the run_id"""
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT INTO backtest_runs
+                    (range_start, range_end, step_hours, training_rows, horizons, folds, wall_seconds)
+                VALUES (%(range_start)s, %(range_end)s, %(step_hours)s, %(training_rows)s,
+                        %(horizons)s, %(folds)s, %(wall_seconds)s)
+                RETURNING run_id;
+            """, run)
+            run_id = cursor.fetchone()[0]
+            
+            execute_values(cursor, """
+                INSERT INTO backtest_results
+                    (run_id, city_id, origin, horizon_hours, training_rows, test_rows, mae, rmse)
+                VALUES %s;
+            """, [
+                (run_id, row['city_id'], row['origin'], row['horizon_hours'],
+                 row['training_rows'], row['test_rows'], row['mae'], row['rmse'])
+                for row in results
+            ], page_size=1000)
+            connection.commit()
+            cursor.close()
+        return run_id
+    
+    def get_results(self, run_id):
+        """Per-fold results of a stored run, with city names"""
+        query = """
+            SELECT c.city_name, r.origin, r.horizon_hours, r.training_rows, r.test_rows, r.mae, r.rmse
+            FROM backtest_results r
+            JOIN cities c ON r.city_id = c.city_id
+            WHERE r.run_id = %s
+            ORDER BY c.city_name, r.origin, r.horizon_hours;
+        """
+        with self.db.connection() as connection:
+            return pd.read_sql(query, connection, params=(run_id,))
+    
+    def print_summary(self, results, horizons):
+        """Mean MAE per city and horizon, and MAE/RMSE per horizon over all scored readings"""
+        df = pd.DataFrame(results)
+        if df.empty:
+            return
+        
+        by_city = df.pivot_table(index='city_id', columns='horizon_hours', values='mae', aggfunc='mean')
+        header = ''.join(f"{f'MAE {horizon}h':>12}" for horizon in horizons)
+        print(f"{'City':<15}{header}")
+        print("-" * 70)
+        for city_id, row in by_city.iterrows():
+            values = ''.join(f"{row.get(horizon, np.nan):>12.2f}" for horizon in horizons)
+            print(f"{self.db.get_city_name(city_id):<15}{values}")
+        print("-" * 70)
+        
+        # Pooled over every scored reading, weighting folds by their test rows
+        df['abs_error'] = df['mae'] * df['test_rows']
+        df['squared_error'] = df['rmse'] ** 2 * df['test_rows']
+        overall = df.groupby('horizon_hours')[['abs_error', 'squared_error', 'test_rows']].sum()
+        for horizon, row in overall.iterrows():
+            print(f"Horizon {horizon:>3}h: MAE {row['abs_error'] / row['test_rows']:.2f} | "
+                  f"RMSE {np.sqrt(row['squared_error'] / row['test_rows']):.2f}")
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the AQI models")
+    parser.add_argument('--cities', nargs='+', help="cities to backtest (default: all)")
+    parser.add_argument('--days', type=int, default=90, help="days of history to backtest over")
+    parser.add_argument('--horizons', type=int, nargs='+', default=list(HORIZONS), help="horizons in hours")
+    parser.add_argument('--step-hours', type=int, default=STEP_HOURS, help="hours between origins")
+    parser.add_argument('--training-rows', type=int, default=TRAINING_LIMIT, help="readings per training window")
+    parser.add_argument('--workers', type=int, help="processes (default: one per core)")
+    parser.add_argument('--no-save', action='store_true', help="don't store the results")
+    args = parser.parse_args()
+    
+    Backtester().run(args.cities, args.days, args.horizons, args.step_hours,
+                     args.training_rows, args.workers, save=not args.no_save)
+
+if __name__ == "__main__":
+    main()
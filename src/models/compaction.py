@@ -0,0 +1,120 @@
+import os
+import time
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error
+from src.models.model_store import FlatForest, NODE_DTYPE_32, as_flat
+
+# Largest relative increase in validation MAE a compact model may cost
+COMPACT_TOLERANCE = float(os.getenv('COMPACT_TOLERANCE', 0.02))
+# Stages of the distilled boosting model (0 disables distillation)
+DISTILL_TREES = int(os.getenv('COMPACT_DISTILL_TREES', 0))
+DISTILL_DEPTH = 3
+
+def to_float32(forest):
+    """Copy of a forest with float32 thresholds and leaf values
+    
+    Features are compared as float32, so rounding each threshold down to
+    the nearest float32 keeps every split decision unchanged; only leaf
+    values lose precision.
+    """
+    nodes = np.empty(len(forest.nodes), dtype=NODE_DTYPE_32)
+    for field in ('left', 'right', 'feature', 'value'):
+        nodes[field] = forest.nodes[field]
+    
+    threshold = np.asarray(forest.nodes['threshold'], dtype=np.float64)
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    nodes['threshold'] = rounded
+    
+    return FlatForest(nodes, forest.roots, forest.n_features, forest.bias, forest.scale)
+
+def prune_trees(forest, X_val, y_val, tolerance=COMPACT_TOLERANCE):
+    """Fewest leading trees whose validation MAE is within `tolerance` of all of them"""
+    # Each tree's predictions once; prefix means give every candidate size
+    cumulative = np.cumsum(forest.tree_predictions(X_val), axis=0)
+    sizes = np.arange(1, len(forest.roots) + 1)
+    errors = [mean_absolute_error(y_val, forest.bias + cumulative[size - 1] / size) for size in sizes]
+    
+    limit = errors[-1] * (1 + tolerance)
+    keep = next(size for size, error in zip(sizes, errors) if error <= limit)
+    
+    # Trees are stored back to back, so the first `keep` are a prefix of the nodes
+    end = forest.roots[keep] if keep < len(forest.roots) else len(forest.nodes)
+    return FlatForest(forest.nodes[:end], forest.roots[:keep], forest.n_features, forest.bias)
+
+def distill(forest, X_train, trees=DISTILL_TREES, depth=DISTILL_DEPTH):
+    """Shallow gradient-boosted model fitted to the forest's own predictions"""
+    student = GradientBoostingRegressor(n_estimators=trees, max_depth=depth, random_state=42)
+    student.fit(np.asarray(X_train, dtype=np.float32), forest.predict(X_train))
+    return as_flat(student)
+
+def latency_ms(forest, row, runs=50):
+    """Best single-row prediction time"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        forest.predict(row)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def compare_variants(variants, X_val, y_val):
+    """Size, single-row latency and validation MAE of each named variant
+    
+    The first variant is the baseline for the deltas.
+    """
+    row = np.asarray(X_val, dtype=np.float32)[:1]
+    report = []
+    for name, forest in variants.items():
+        report.append({
+            'variant': name,
+            'trees': forest.n_estimators,
+            'nodes': len(forest.nodes),
+            'bytes': forest.nodes.nbytes,
+            'latency_ms': latency_ms(forest, row),
+            'mae': mean_absolute_error(y_val, forest.predict(X_val))
+        })
+    
+    baseline = report[0]
+    for entry in report:
+        entry['size_ratio'] = entry['bytes'] / baseline['bytes']
+        entry['mae_delta'] = entry['mae'] - baseline['mae']
+    return report
+
+def compact_forest(model, X_train, X_val, y_val, tolerance=COMPACT_TOLERANCE, distill_trees=DISTILL_TREES):
+    """Smallest compact variant within `tolerance` of the full model's validation MAE
+    
+    Candidates are the pruned forest and, if distill_trees > 0, a distilled
+    boosting model, both with float32 nodes. The older half of the
+    validation rows picks the pruned size and the variant; the report is
+    measured on the newer half, so its deltas aren't scored on the rows
+    they were chosen by. Returns (name, forest, report); the pruned forest
+    is used when nothing else qualifies.
+    """
+    X_val = np.asarray(X_val, dtype=np.float32)
+    y_val = np.asarray(y_val)
+    half = len(y_val) // 2
+    X_select, y_select = X_val[:half], y_val[:half]
+    X_holdout, y_holdout = X_val[half:], y_val[half:]
+    
+    full = as_flat(model)
+    variants = {'full': full, 'float32': to_float32(full)}
+    variants['pruned float32'] = to_float32(prune_trees(full, X_select, y_select, tolerance))
+    if distill_trees:
+        variants['distilled float32'] = to_float32(distill(full, X_train, distill_trees))
+    
+    limit = mean_absolute_error(y_select, full.predict(X_select)) * (1 + tolerance)
+    candidates = [name for name in list(variants)[2:]
+                  if mean_absolute_error(y_select, variants[name].predict(X_select)) <= limit]
+    chosen = min(candidates or ['pruned float32'], key=lambda name: variants[name].nodes.nbytes)
+    
+    return chosen, variants[chosen], compare_variants(variants, X_holdout, y_holdout)
+
+def print_compaction_report(report, chosen):
+    """Print the table returned by compare_variants"""
+    print(f"  {'Variant':<20} {'Trees':>6} {'Size (KB)':>10} {'Latency (ms)':>13} {'MAE':>7} {'ΔMAE':>7}")
+    for entry in report:
+        marker = '→' if entry['variant'] == chosen else ' '
+        print(f"{marker} {entry['variant']:<20} {entry['trees']:>6} {entry['bytes'] / 1024:>10.1f} "
+              f"{entry['latency_ms']:>13.2f} {entry['mae']:>7.2f} {entry['mae_delta']:>+7.2f}")
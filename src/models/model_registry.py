@@ -0,0 +1,104 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+from src.models.model_store import load_artifact
+
+class ModelRegistry:
+    """LRU cache of loaded model artifacts, keyed by the caller
+    
+    AQIPredictor keys entries by the artifact's resolved path, so cities
+    (or variants) served by the same file share one entry. Each artifact
+    is loaded at most once and reused until its file changes;
+    a file's version is its (mtime_ns, size) pair, checked with one stat()
+    per lookup. When more than `capacity` models are cached, the least
+    recently used one is evicted.
+    """
+    
+    def __init__(self, capacity=None, loader=None):
+        self.capacity = capacity or int(os.getenv('MODEL_CACHE_SIZE', 32))
+        self.loader = loader or load_artifact
+        
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (version, artifact)
+        
+        self.counters = {'hits': 0, 'misses': 0, 'loads': 0, 'reloads': 0, 'evictions': 0}
+        self.load_seconds = 0.0
+    
+    @staticmethod
+    def file_version(path):
+        """Version stamp of an artifact file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _store(self, key, version, artifact):
+        """Insert an entry as most recently used, evicting beyond capacity"""
+        self._entries[key] = (version, artifact)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+    
+    def lookup(self, key, path):
+        """Return (artifact, loaded_from_disk), or (None, False) if the file is missing"""
+        version = self.file_version(path)
+        if version is None:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None, False
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[1], False
+            
+            self.counters['misses'] += 1
+            stale = entry is not None
+        
+        # Load outside the lock so other cities aren't blocked
+        started = time.perf_counter()
+        artifact = self.loader(path)
+        elapsed = time.perf_counter() - started
+        
+        with self._lock:
+            self.counters['reloads' if stale else 'loads'] += 1
+            self.load_seconds += elapsed
+            self._store(key, version, artifact)
+        
+        return artifact, True
+    
+    def get(self, key, path):
+        """Return the artifact for `key`, loading it from `path` if needed"""
+        return self.lookup(key, path)[0]
+    
+    def put(self, key, path, artifact):
+        """Cache an artifact that was just written to `path`"""
+        version = self.file_version(path)
+        with self._lock:
+            self._store(key, version, artifact)
+    
+    def invalidate(self, key=None):
+        """Drop one cached artifact, or all of them"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def stats(self):
+        """Return hit/miss/load counters, hit rate and load time"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+            stats['load_seconds'] = self.load_seconds
+        
+        lookups = stats['hits'] + stats['misses']
+        loads = stats['loads'] + stats['reloads']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['avg_load_ms'] = stats['load_seconds'] * 1000 / loads if loads else 0.0
+        return stats
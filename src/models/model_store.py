@@ -0,0 +1,240 @@
+import glob
+import json
+import os
+import pickle
+import threading
+import uuid
+import weakref
+from datetime import datetime
+import numpy as np
+
+# Bumped whenever the on-disk layout changes; version 1 files lack bias/scale
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+
+# One record per tree node, every tree of a forest back to back. Child
+# indices are absolute positions in the array; leaves have both children
+# set to LEAF, like sklearn's TREE_LEAF.
+NODE_DTYPE = np.dtype([
+    ('left', '<i4'),
+    ('right', '<i4'),
+    ('feature', '<i4'),
+    ('threshold', '<f8'),
+    ('value', '<f8')
+])
+LEAF = -1
+
+# Compact variant: 20 instead of 28 bytes per node, same tree walks
+# (see compaction.to_float32)
+NODE_DTYPE_32 = np.dtype([
+    ('left', '<i4'),
+    ('right', '<i4'),
+    ('feature', '<i4'),
+    ('threshold', '<f4'),
+    ('value', '<f4')
+])
+
+# Artifact fields stored as ISO strings in the metadata file
+DATETIME_FIELDS = ('trained_date', 'watermark')
+
+class FlatForest:
+    """Tree ensemble evaluated from a flat node array
+    
+    `nodes` is a NODE_DTYPE (or NODE_DTYPE_32) array, usually memory-mapped
+    from the artifact file, and `roots` the index of each tree's root node.
+    A prediction is bias + scale * (sum of leaf values): a random forest
+    has bias 0 and scale 1/trees, gradient boosting its initial estimate
+    and learning rate. predict() gives the same results as the sklearn
+    model it was exported from.
+    """
+    
+    def __init__(self, nodes, roots, n_features, bias=0.0, scale=None):
+        self.nodes = nodes
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.n_features = n_features
+        self.bias = bias
+        self.scale = 1.0 / len(self.roots) if scale is None else scale
+        
+        # Field views of the node array (no copies; np.memmap indexing is slower)
+        fields = np.asarray(nodes)
+        self._left, self._right = fields['left'], fields['right']
+        self._feature, self._threshold = fields['feature'], fields['threshold']
+        self._value = fields['value']
+    
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+    
+    def tree_predictions(self, X):
+        """Leaf value reached in each tree: array of shape (trees, rows)
+        
+        All trees are walked at once, one level per step: every (tree, row)
+        pair moves to a child until all of them sit on a leaf, so a call
+        costs a few array operations per level of depth rather than per tree.
+        """
+        # sklearn compares float32 features with float64 thresholds
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features)
+        rows = np.arange(len(X))
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        
+        while True:
+            left_child = self._left[node]
+            at_leaf = left_child == LEAF
+            if at_leaf.all():
+                break
+            # Leaves have feature 0, so the lookup is safe; their result is discarded
+            goes_left = X[rows, self._feature[node]] <= self._threshold[node]
+            node = np.where(at_leaf, node, np.where(goes_left, left_child, self._right[node]))
+        
+        return self._value[node].astype(np.float64)
+    
+    def predict(self, X):
+        """Ensemble prediction for each row of X"""
+        return self.bias + self.scale * self.tree_predictions(X).sum(axis=0)
+
+def flatten_forest(model):
+    """(nodes, roots, bias, scale) of a fitted RandomForestRegressor or
+    GradientBoostingRegressor"""
+    if isinstance(model, FlatForest):
+        return model.nodes, model.roots, model.bias, model.scale
+    
+    # Boosting keeps one tree per stage in a (stages, 1) array
+    trees = [estimator.tree_ for estimator in np.ravel(model.estimators_)]
+    nodes = np.zeros(sum(tree.node_count for tree in trees), dtype=NODE_DTYPE)
+    roots = np.zeros(len(trees), dtype=np.int64)
+    
+    offset = 0
+    for index, tree in enumerate(trees):
+        block = nodes[offset:offset + tree.node_count]
+        leaf = tree.children_left == LEAF
+        block['left'] = np.where(leaf, LEAF, tree.children_left + offset)
+        block['right'] = np.where(leaf, LEAF, tree.children_right + offset)
+        # Leaves get feature 0 so evaluators can index with it unconditionally
+        block['feature'] = np.where(leaf, 0, tree.feature)
+        block['threshold'] = tree.threshold
+        block['value'] = tree.value[:, 0, 0]
+        roots[index] = offset
+        offset += tree.node_count
+    
+    if hasattr(model, 'learning_rate'):
+        # init='zero' leaves the string 'zero' in place of an initial estimator
+        if isinstance(model.init_, str):
+            bias = 0.0
+        else:
+            bias = float(model.init_.predict(np.zeros((1, model.n_features_in_)))[0])
+        return nodes, roots, bias, float(model.learning_rate)
+    return nodes, roots, 0.0, 1.0 / len(trees)
+
+# FlatForest per sklearn model converted by as_flat, dropped with the model
+_flat_views = weakref.WeakKeyDictionary()
+_flat_views_lock = threading.Lock()
+
+def as_flat(model):
+    """FlatForest for a fitted sklearn ensemble (or the forest itself)
+    
+    Each sklearn model is converted once; models trained in this process
+    are then served by the same evaluator as models loaded from disk.
+    """
+    if isinstance(model, FlatForest):
+        return model
+    
+    with _flat_views_lock:
+        forest = _flat_views.get(model)
+        if forest is None:
+            nodes, roots, bias, scale = flatten_forest(model)
+            forest = _flat_views[model] = FlatForest(nodes, roots, model.n_features_in_, bias, scale)
+    return forest
+
+def _json_default(value):
+    """Encode datetimes and numpy scalars in metadata"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Can't store {type(value).__name__} in model metadata")
+
+def _write_atomically(path, write):
+    """Write through a temp file and rename, so readers never see a partial file"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        write(f)
+    os.replace(temp_path, path)
+
+def save_flat(artifact, path):
+    """Save an artifact as a node array plus a JSON metadata file at `path`
+    
+    The node array goes to a new uniquely named .npy file first; replacing
+    the metadata file then switches readers over in one step. Node files
+    it no longer references are removed afterwards.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    
+    nodes, roots, bias, scale = flatten_forest(artifact['model'])
+    nodes_file = f"{stem}.{uuid.uuid4().hex[:12]}.npy"
+    _write_atomically(os.path.join(directory, nodes_file), lambda f: np.save(f, nodes))
+    
+    metadata = {key: value for key, value in artifact.items() if key != 'model'}
+    metadata.update({
+        'format_version': FORMAT_VERSION,
+        'nodes': nodes_file,
+        'roots': [int(root) for root in roots],
+        'n_features': len(artifact['feature_columns']),
+        'bias': bias,
+        'scale': scale
+    })
+    encoded = json.dumps(metadata, default=_json_default, indent=2).encode()
+    _write_atomically(path, lambda f: f.write(encoded))
+    
+    # Only files older than ours, so a concurrent save's new file survives;
+    # processes that already mapped an old file keep their pages after unlink
+    written = os.stat(os.path.join(directory, nodes_file)).st_mtime_ns
+    for old_file in glob.glob(os.path.join(glob.escape(directory or '.'), f"{glob.escape(stem)}.*.npy")):
+        try:
+            if os.path.basename(old_file) != nodes_file and os.stat(old_file).st_mtime_ns < written:
+                os.remove(old_file)
+        except OSError:
+            pass
+
+def read_metadata(path):
+    """Artifact metadata without loading the model"""
+    with open(path) as f:
+        metadata = json.load(f)
+    
+    if metadata.get('format_version') not in READABLE_VERSIONS:
+        raise ValueError(f"{path}: unsupported model format {metadata.get('format_version')}")
+    
+    for key in DATETIME_FIELDS:
+        if metadata.get(key) is not None:
+            metadata[key] = datetime.fromisoformat(metadata[key])
+    return metadata
+
+def load_flat(path, mmap_mode='r', attempts=3):
+    """Load a flat artifact; the node array is memory-mapped unless mmap_mode is None"""
+    # Node files are named relative to the real metadata file, so symlinks work
+    directory = os.path.dirname(os.path.realpath(path))
+    
+    for attempt in range(attempts):
+        metadata = read_metadata(path)
+        try:
+            nodes = np.load(os.path.join(directory, metadata['nodes']), mmap_mode=mmap_mode)
+            break
+        except FileNotFoundError:
+            # Replaced by a concurrent save between the two reads
+            if attempt == attempts - 1:
+                raise
+    
+    artifact = {key: value for key, value in metadata.items()
+                if key not in ('nodes', 'roots', 'n_features', 'bias', 'scale')}
+    artifact['model'] = FlatForest(nodes, metadata['roots'], metadata['n_features'],
+                                   metadata.get('bias', 0.0), metadata.get('scale'))
+    return artifact
+
+def load_artifact(path):
+    """Load a flat artifact, or a legacy pickled one by its .pkl extension"""
+    if path.endswith('.pkl'):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    return load_flat(path)
@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+
+class TrainingWorker:
+    """Train models on a background thread, one city at a time
+    
+    request() only enqueues; a city already queued or being trained is
+    not queued twice. The thread is started on the first request, so
+    processes that never need training never start one.
+    """
+    
+    def __init__(self, train, name='model-training'):
+        self.train = train   # callable(city_name) -> truthy on success
+        self.name = name
+        
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._thread = None
+        
+        self.counters = {'requested': 0, 'trained': 0, 'failed': 0}
+        self.train_seconds = 0.0
+    
+    def _ensure_started(self):
+        """Start the worker thread if it isn't running"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+    
+    def request(self, city_name):
+        """Queue a city for training; returns False if it is already pending"""
+        with self._lock:
+            if city_name in self._pending:
+                return False
+            self._pending.add(city_name)
+            self.counters['requested'] += 1
+            self._ensure_started()
+        
+        self._queue.put(city_name)
+        return True
+    
+    def pending(self):
+        """Cities queued or being trained"""
+        with self._lock:
+            return set(self._pending)
+    
+    def _run(self):
+        """Worker loop"""
+        while True:
+            city_name = self._queue.get()
+            started = time.perf_counter()
+            
+            try:
+                succeeded = bool(self.train(city_name))
+            except Exception as e:
+                print(f"❌ Background training failed for {city_name}: {e}")
+                succeeded = False
+            
+            with self._lock:
+                self.counters['trained' if succeeded else 'failed'] += 1
+                self.train_seconds += time.perf_counter() - started
+                self._pending.discard(city_name)
+            
+            self._queue.task_done()
+    
+    def wait(self, timeout=None):
+        """Block until the queue is empty; returns False on timeout"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        
+        return True
+    
+    def stats(self):
+        """Return request/train counters and queue length"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['pending'] = len(self._pending)
+            stats['train_seconds'] = self.train_seconds
+        return stats
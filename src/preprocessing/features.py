@@ -0,0 +1,204 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.database.db_operations import DatabaseOperations
+import hashlib
+import glob
+import json
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = [
+    'pm25', 'pm10', 'no2', 'so2', 'co', 'o3',
+    'temperature', 'humidity', 'wind_speed', 'pressure',
+    'hour', 'day_of_week',
+    'aqi_lag_1', 'pm25_lag_1', 'pm10_lag_1',
+    'aqi_rolling_3', 'pm25_rolling_3'
+]
+
+# Bumped whenever the features change, so older cache files are never reused
+FEATURE_VERSION = 1
+
+# Readings joined with weather for many cities in one statement. The
+# per-city subquery is bounded by {bounds} and, for training windows,
+# {limit} (the newest rows); readings come back oldest first per city.
+# Values are cast to real: models compare features as float32 anyway.
+READINGS_QUERY = """
+    SELECT
+        c.city_id,
+        c.city_name,
+        aq.timestamp,
+        aq.aqi::real AS aqi,
+        aq.pm25::real AS pm25,
+        aq.pm10::real AS pm10,
+        aq.no2::real AS no2,
+        aq.so2::real AS so2,
+        aq.co::real AS co,
+        aq.o3::real AS o3,
+        w.temperature::real AS temperature,
+        w.humidity::real AS humidity,
+        w.wind_speed::real AS wind_speed,
+        w.pressure::real AS pressure
+    FROM cities c
+    CROSS JOIN LATERAL (
+        SELECT * FROM air_quality
+        WHERE air_quality.city_id = c.city_id {bounds}
+        ORDER BY timestamp DESC
+        {limit}
+    ) aq
+    JOIN LATERAL (
+        SELECT temperature, humidity, wind_speed, pressure
+        FROM weather
+        WHERE weather.city_id = aq.city_id
+            AND weather.time_bucket = aq.time_bucket
+            AND weather.timestamp >= aq.time_bucket
+            AND weather.timestamp < aq.time_bucket + INTERVAL '1 second'
+        LIMIT 1
+    ) w ON TRUE
+    WHERE %(names)s::text[] IS NULL OR c.city_name = ANY(%(names)s)
+    ORDER BY c.city_id, aq.timestamp ASC;
+"""
+
+def add_city_features(df):
+    """Time, lag and rolling features for many cities in one pass
+    
+    `df` holds readings sorted by city_id, then timestamp. Lags and the
+    3-reading rolling means are per-city shifts of the whole frame, so the
+    result matches add_features() run on each city separately. Rows without
+    a full set of features are dropped.
+    """
+    if df.empty:
+        # read_sql can't infer column types without rows
+        df = df.astype({column: 'float64' for column in df.columns if column not in ('city_name', 'timestamp')})
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+    
+    by_city = df.groupby('city_id', sort=False)
+    previous = by_city[['aqi', 'pm25', 'pm10']].shift(1)
+    earlier = by_city[['aqi', 'pm25']].shift(2)
+    
+    df['hour'] = df['timestamp'].dt.hour.astype(np.int8)
+    df['day_of_week'] = df['timestamp'].dt.dayofweek.astype(np.int8)
+    
+    df['aqi_lag_1'] = previous['aqi']
+    df['pm25_lag_1'] = previous['pm25']
+    df['pm10_lag_1'] = previous['pm10']
+    
+    df['aqi_rolling_3'] = (df['aqi'] + previous['aqi'] + earlier['aqi']) / 3
+    df['pm25_rolling_3'] = (df['pm25'] + previous['pm25'] + earlier['pm25']) / 3
+    
+    return df.dropna(subset=FEATURE_COLUMNS + ['aqi']).reset_index(drop=True)
+
+def compact_dtypes(df):
+    """Downcast a feature frame: float32 values, smallest int ids, categorical names"""
+    floats = df.select_dtypes('float64').columns
+    df[floats] = df[floats].astype(np.float32)
+    df['city_id'] = pd.to_numeric(df['city_id'], downcast='integer')
+    df['city_name'] = df['city_name'].astype('category')
+    return df
+
+class FeatureStore:
+    """Feature matrices for many cities, built in one query and one pass
+    
+    get_features() returns one frame with a row per usable reading:
+    city_id, city_name, timestamp, aqi and FEATURE_COLUMNS. Frames are
+    cached under `cache_dir`, keyed by the request and the highest
+    air_quality/weather ids, so they are rebuilt as soon as readings are
+    added. Weather rows updated in place don't change the ids; clear the
+    cache after such corrections.
+    """
+    
+    def __init__(self, db=None, cache_dir=None):
+        self.db = db or DatabaseOperations()
+        self.cache_dir = cache_dir or os.getenv('FEATURE_CACHE_DIR', 'data/processed')
+        self.counters = {'hits': 0, 'misses': 0}
+    
+    def watermark(self):
+        """Highest air_quality and weather ids"""
+        with self.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT (SELECT MAX(measurement_id) FROM air_quality),
+                       (SELECT MAX(weather_id) FROM weather);
+            """)
+            watermark = tuple(value or 0 for value in cursor.fetchone())
+            cursor.close()
+        return watermark
+    
+    def load_readings(self, city_names=None, start=None, end=None, limit=None):
+        """Readings with weather for the requested cities, sorted by city and time"""
+        # Literal bounds let Postgres skip partitions outside the range
+        bounds = ''
+        if start is not None:
+            bounds += " AND air_quality.timestamp >= %(start)s"
+        if end is not None:
+            bounds += " AND air_quality.timestamp < %(end)s"
+        
+        query = READINGS_QUERY.format(bounds=bounds, limit='LIMIT %(limit)s' if limit else '')
+        
+        with self.db.connection() as connection:
+            return pd.read_sql(query, connection, params={
+                'names': list(city_names) if city_names else None,
+                'start': start,
+                'end': end,
+                'limit': limit
+            })
+    
+    def build_features(self, city_names=None, start=None, end=None, limit=None):
+        """Feature frame straight from the database, without the cache"""
+        return compact_dtypes(add_city_features(self.load_readings(city_names, start, end, limit)))
+    
+    def _cache_paths(self, city_names, start, end, limit):
+        """(path for the current data, glob matching every version of this request)"""
+        request = json.dumps({
+            'version': FEATURE_VERSION,
+            'cities': sorted(city_names) if city_names else None,
+            'start': str(start) if start is not None else None,
+            'end': str(end) if end is not None else None,
+            'limit': limit
+        }, sort_keys=True)
+        key = hashlib.sha1(request.encode()).hexdigest()[:16]
+        
+        readings_id, weather_id = self.watermark()
+        pattern = os.path.join(self.cache_dir, f"features_{key}_*.pkl")
+        return os.path.join(self.cache_dir, f"features_{key}_{readings_id}_{weather_id}.pkl"), pattern
+    
+    def get_features(self, city_names=None, start=None, end=None, limit=None, use_cache=True):
+        """Feature frame for the requested cities
+        
+        start/end bound reading timestamps (end exclusive); limit keeps the
+        newest `limit` readings per city.
+        """
+        if not use_cache:
+            return self.build_features(city_names, start, end, limit)
+        
+        path, pattern = self._cache_paths(city_names, start, end, limit)
+        if os.path.exists(path):
+            self.counters['hits'] += 1
+            return pd.read_pickle(path)
+        
+        self.counters['misses'] += 1
+        df = self.build_features(city_names, start, end, limit)
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_pickle(temp_path)
+        os.replace(temp_path, path)
+        
+        # Frames built from older data can't be hit again
+        for old_path in glob.glob(pattern):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        
+        return df
+    
+    def clear_cache(self):
+        """Remove every cached feature frame; returns how many were removed"""
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, "features_*.pkl")):
+            os.remove(path)
+            removed += 1
+        return removed
@@ -3,9 +3,10 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.database.db_operations import DatabaseOperations
+from src.database.rollups import RollupManager
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime
+from datetime import datetime, timedelta
 import pandas as pd
 
 class DataVisualizer:
@@ -13,23 +14,24 @@ class DataVisualizer:
     
     def __init__(self):
         self.db = DatabaseOperations()
+        self.rollups = RollupManager(db=self.db)
         sns.set_style("whitegrid")
         plt.rcParams['figure.figsize'] = (12, 6)
     
     def get_aqi_trends(self, city_name, limit=50):
         """Get AQI trends for a city"""
-        connection = self.db.get_connection()
-        
         query = """
             SELECT timestamp, aqi, pm25, pm10
             FROM air_quality
-            WHERE city_id = (SELECT city_id FROM cities WHERE city_name = %s)
+            WHERE city_id = %s
             ORDER BY timestamp DESC
             LIMIT %s;
         """
         
-        df = pd.read_sql(query, connection, params=(city_name, limit))
-        connection.close()
+        city_id = self.db.get_city_id(city_name)
+        
+        with self.db.connection() as connection:
+            df = pd.read_sql(query, connection, params=(city_id, limit))
         
         # Reverse to show oldest to newest
         df = df.iloc[::-1].reset_index(drop=True)
@@ -67,18 +69,44 @@ class DataVisualizer:
         
         plt.show()
     
+    def plot_aqi_history(self, city_name='Delhi', days=30):
+        """Plot mean AQI with its min-max band over the last `days`, from rollups"""
+        end = datetime.now()
+        df = self.rollups.get_series(city_name, start=end - timedelta(days=days), end=end)
+        
+        if df.empty:
+            print(f"No data found for {city_name}")
+            return
+        
+        resolution = df.attrs['resolution']
+        
+        plt.figure(figsize=(14, 6))
+        
+        plt.fill_between(df['timestamp'], df['aqi_min'], df['aqi_max'], alpha=0.2, color='#e74c3c', label='Min-Max')
+        plt.plot(df['timestamp'], df['aqi'], linewidth=2, color='#e74c3c', label=f'Mean AQI ({resolution})')
+        plt.plot(df['timestamp'], df['aqi_p95'], linewidth=1, linestyle='--', color='#8e44ad', label='95th percentile')
+        
+        plt.title(f'AQI History ({days} days) - {city_name}', fontsize=16, fontweight='bold')
+        plt.xlabel('Date', fontsize=12)
+        plt.ylabel('AQI Value', fontsize=12)
+        plt.legend(loc='upper right')
+        plt.grid(True, alpha=0.3)
+        
+        os.makedirs('data/visualizations', exist_ok=True)
+        plt.savefig(f'data/visualizations/aqi_history_{city_name.lower()}.png', dpi=300, bbox_inches='tight')
+        print(f"✓ Saved: data/visualizations/aqi_history_{city_name.lower()}.png")
+        
+        plt.show()
+    
     def plot_all_cities_comparison(self):
         """Compare current AQI across all cities"""
-        cities = self.db.get_all_cities()
-        
         city_names = []
         aqi_values = []
         colors = []
         
-        for city in cities:
-            latest = self.db.get_latest_aqi(city['city_name'])
-            if latest:
-                city_names.append(city['city_name'])
+        for latest in self.db.get_latest_readings():
+            if latest['aqi'] is not None:
+                city_names.append(latest['city_name'])
                 aqi_values.append(latest['aqi'])
                 
                 # Color code by category
@@ -159,20 +187,18 @@ class DataVisualizer:
     
     def plot_correlation_heatmap(self):
         """Plot correlation between pollutants and weather"""
-        connection = self.db.get_connection()
-        
         query = """
             SELECT 
                 aq.aqi, aq.pm25, aq.pm10, aq.no2, aq.so2, aq.co, aq.o3,
                 w.temperature, w.humidity, w.wind_speed, w.pressure
             FROM air_quality aq
             JOIN weather w ON aq.city_id = w.city_id 
-                AND DATE_TRUNC('minute', aq.timestamp) = DATE_TRUNC('minute', w.timestamp)
+                AND aq.time_bucket = w.time_bucket
             LIMIT 100;
         """
         
-        df = pd.read_sql(query, connection)
-        connection.close()
+        with self.db.connection() as connection:
+            df = pd.read_sql(query, connection)
         
         if df.empty:
             print("No data found for correlation analysis")
@@ -223,6 +249,10 @@ class DataVisualizer:
         self.plot_correlation_heatmap()
         print()
         
+        print("6. Creating 30-day AQI history for Delhi...")
+        self.plot_aqi_history('Delhi', days=30)
+        print()
+        
         print("=" * 70)
         print("✅ ALL VISUALIZATIONS GENERATED!")
         print("📁 Location: data/visualizations/")
@@ -0,0 +1,87 @@
+import sys
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import split_data
+from src.models.backtest import Backtester, make_folds, backtest_fold_job, CALENDAR_COLUMNS
+from src.preprocessing.features import FeatureStore, FEATURE_COLUMNS
+
+def synthetic_features(cities=2, hours=120):
+    """Hourly feature frame shaped like FeatureStore.get_features()"""
+    rng = np.random.default_rng(5)
+    frames = []
+    for city_id in range(1, cities + 1):
+        frame = pd.DataFrame(rng.normal(100, 20, size=(hours, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        frame.insert(0, 'city_id', city_id)
+        frame.insert(1, 'timestamp', pd.date_range(datetime(2026, 1, 1), periods=hours, freq='h'))
+        frame['aqi'] = frame['pm25'] * 1.5
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+def test_backtest():
+    """Test walk-forward folds and stored backtest results"""
+    
+    print("\n🧪 Testing Walk-Forward Backtest\n")
+    
+    # Test 1: Folds train only on the past and test on the horizon after the origin
+    df = synthetic_features()
+    origins = pd.date_range(datetime(2026, 1, 1), periods=5, freq='24h')
+    folds = make_folds(df, origins, horizons=(1, 24), training_rows=20)
+    assert len(folds) == 2 * 4   # the first origin has no history
+    for fold in folds:
+        assert len(fold['y_train']) == 20 and len(fold['y_test']) == 24
+        assert list(fold['lead_hours']) == list(range(1, 25))
+        city = df[df['city_id'] == fold['city_id']]
+        history = city[city['timestamp'] < fold['origin']]
+        assert np.allclose(fold['y_train'], history['aqi'].tail(20))
+        
+        # Test inputs are the last reading before the origin; only the calendar moves
+        frozen = np.delete(fold['X_test'], CALENDAR_COLUMNS, axis=1)
+        assert (frozen == np.delete(fold['X_train'][-1:], CALENDAR_COLUMNS, axis=1)).all()
+        future = city[city['timestamp'] >= fold['origin']].head(24)
+        assert (fold['X_test'][:, FEATURE_COLUMNS.index('hour')] == future['hour'].to_numpy(np.float32)).all()
+    print(f"✓ {len(folds)} folds, none trained on or fed from its own future")
+    
+    # Test 2: Each horizon scores the reading at that lead time
+    results = backtest_fold_job(folds[0], horizons=(1, 24))
+    assert [row['test_rows'] for row in results] == [1, 1]
+    assert all(row['rmse'] >= row['mae'] > 0 for row in results)
+    print(f"✓ Fold scored per horizon: MAE {results[0]['mae']:.2f} (1h), {results[1]['mae']:.2f} (24h)")
+    
+    # Test 3: The training test split holds out the newest readings
+    X_train, X_test, _, _ = split_data(df[df['city_id'] == 1])
+    assert X_train.index.max() < X_test.index.min()
+    print("✓ Time-ordered train/test split")
+    
+    # Test 4: A parallel run over the database stores every fold's errors
+    backtester = Backtester()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        backtester.features = FeatureStore(backtester.db, cache_dir=cache_dir)
+        run = backtester.run(['Delhi', 'Mumbai'], days=14, horizons=(24, 1), step_hours=72,
+                             training_rows=100, workers=2)
+    
+    try:
+        assert run['run_id'] is not None and run['results']
+        stored = backtester.get_results(run['run_id'])
+        assert len(stored) == len(run['results'])
+        assert set(stored['city_name']) == {'Delhi', 'Mumbai'}
+        assert set(stored['horizon_hours']) == {1, 24}
+        first_origin = pd.Timestamp(backtester.latest_timestamp() - pd.Timedelta(days=14)).ceil('h')
+        assert (stored.groupby('city_name')['origin'].min() == first_origin).all()
+        assert np.allclose(sorted(stored['mae']), sorted(row['mae'] for row in run['results']))
+        print(f"✓ Run {run['run_id']}: {len(stored)} fold results stored")
+    finally:
+        with backtester.db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM backtest_runs WHERE run_id = %s;", (run['run_id'],))
+            connection.commit()
+            cursor.close()
+    
+    print("\n✅ Backtest tests passed!")
+
+if __name__ == "__main__":
+    test_backtest()
@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+import requests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_collection.circuit_breaker import CircuitBreaker, parse_retry_after
+from src.data_collection.weather_collector import WeatherCollector
+from src.data_collection.stub_weather_server import StubWeatherServer
+
+class FakeClock:
+    """Manually advanced clock for breaker timing"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def test_circuit_breaker():
+    """Test breaker state transitions and fast fallback"""
+    
+    print("\n🧪 Testing Circuit Breaker\n")
+    
+    # Test 1: Trips after consecutive failures
+    clock = FakeClock()
+    breaker = CircuitBreaker('test', failure_threshold=3, base_backoff=10, jitter=0, clock=clock)
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+    print(f"✓ Opened after 3 failures ({breaker.stats()['trips']} trip)")
+    
+    # Test 2: Half-open allows a single probe; a failed probe doubles the backoff
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request() and not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.retry_in() == 20
+    print(f"✓ Failed probe reopened for {breaker.retry_in():.0f}s")
+    
+    # Test 3: A successful probe closes the circuit
+    clock.now += 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    print("✓ Successful probe closed the circuit")
+    
+    # Test 4: Retry-After is honoured
+    breaker.record_failure(retry_after=120)
+    assert breaker.retry_in() == 120
+    assert parse_retry_after('30') == 30.0
+    print("✓ Retry-After extends the open period")
+    
+    # Test 5: An open circuit short-circuits the collection cycle
+    with StubWeatherServer(latency=0.1, failure_rate=1.0, retry_after=60) as stub:
+        collector = WeatherCollector(base_url=stub.url, max_workers=2)
+        collector.api_key = 'stub-key'
+        cities = [f"Station {i}" for i in range(8)]
+        
+        collector.fetch_all(cities)
+        assert collector.breaker.state == CircuitBreaker.OPEN
+        
+        served = stub.requests_served
+        started = time.perf_counter()
+        results = collector.fetch_all(cities)
+        elapsed = time.perf_counter() - started
+        
+        assert not any(results.values()) and stub.requests_served == served
+        print(f"✓ Open circuit skipped the API in {elapsed * 1000:.1f} ms")
+    
+    # Test 6: A probe that fails locally frees the probe slot
+    clock = FakeClock()
+    collector.breaker = CircuitBreaker('probe', failure_threshold=1, base_backoff=10, jitter=0, clock=clock)
+    collector.breaker.record_failure()
+    clock.now += 10
+    
+    def redirect_loop(*args, **kwargs):
+        raise requests.exceptions.TooManyRedirects("redirect loop")
+    collector.session.get = redirect_loop
+    assert collector.fetch_weather('Station 0', use_cache=False) is None
+    assert collector.breaker.state == CircuitBreaker.HALF_OPEN and collector.breaker.allow_request()
+    print("✓ Probe slot released after a non-connection error")
+    
+    print("\n✅ Circuit breaker tests completed!")
+
+if __name__ == "__main__":
+    test_circuit_breaker()
@@ -0,0 +1,72 @@
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, fit_model, split_data, model_path
+from src.models.compaction import as_flat, to_float32, prune_trees, distill, compact_forest, COMPACT_TOLERANCE
+from src.models.model_store import NODE_DTYPE_32, load_artifact
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error
+
+def test_compaction():
+    """Test float32, pruned and distilled model variants"""
+    
+    print("\n🧪 Testing Model Compaction\n")
+    
+    predictor = AQIPredictor()
+    df = predictor.prepare_data('Delhi', limit=200, newest=True)
+    X_train, X_test, y_train, y_test = split_data(df)
+    model = fit_model(df)['model']
+    full = as_flat(model)
+    
+    # Test 1: float32 nodes keep every split decision
+    compact = to_float32(full)
+    assert compact.nodes.dtype == NODE_DTYPE_32 and compact.nodes.nbytes < full.nodes.nbytes
+    assert np.allclose(compact.predict(X_test), model.predict(X_test), rtol=1e-6)
+    print(f"✓ float32: {compact.nodes.nbytes / full.nodes.nbytes:.0%} of the size, same predictions")
+    
+    # Test 2: Pruning keeps the leading trees, within tolerance on validation data
+    pruned = prune_trees(full, X_test, y_test)
+    kept = pruned.n_estimators
+    first_trees = np.mean([tree.predict(X_test.to_numpy(np.float32)) for tree in model.estimators_[:kept]], axis=0)
+    assert np.allclose(pruned.predict(X_test), first_trees)
+    full_mae = mean_absolute_error(y_test, full.predict(X_test))
+    assert mean_absolute_error(y_test, pruned.predict(X_test)) <= full_mae * (1 + COMPACT_TOLERANCE)
+    print(f"✓ Pruned to {kept} trees")
+    
+    # Test 3: A distilled boosting model evaluates like sklearn's
+    student = distill(full, X_train, trees=30)
+    reference = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=42)
+    reference.fit(X_train.to_numpy(np.float32), full.predict(X_train))
+    assert student.n_estimators == 30
+    assert np.allclose(student.predict(X_test), reference.predict(X_test.to_numpy(np.float32)))
+    print(f"✓ Distilled into {student.n_estimators} stages ({len(student.nodes)} nodes)")
+    
+    # Test 4: The pruned size is chosen on the older validation rows and reported on the newer
+    chosen, forest, report = compact_forest(model, X_train, X_test, y_test)
+    half = len(y_test) // 2
+    assert chosen == 'pruned float32'
+    assert forest.n_estimators == prune_trees(full, X_test.iloc[:half], y_test.iloc[:half]).n_estimators
+    assert np.isclose(report[0]['mae'], mean_absolute_error(y_test.iloc[half:], model.predict(X_test.iloc[half:])))
+    print(f"✓ Chose {forest.n_estimators} trees, ΔMAE {report[2]['mae_delta']:+.2f} on held-out rows")
+    
+    # Test 5: The compact variant is saved next to the full model and served
+    with tempfile.TemporaryDirectory() as models_dir:
+        predictor = AQIPredictor(models_dir=models_dir, variant='compact')
+        assert predictor.train_model('Delhi')
+        assert os.path.exists(model_path('Delhi', models_dir))
+        
+        saved = load_artifact(model_path('Delhi', models_dir, 'compact'))
+        assert saved['model'].nodes.dtype == NODE_DTYPE_32 and saved['variant'] == 'pruned float32'
+        
+        served = predictor.get_model('Delhi')
+        assert served['variant'] == saved['variant']
+        assert predictor.predict_next_aqi('Delhi')['served_by'] == 'model'
+        print(f"✓ Compact model saved and served ({saved['model'].n_estimators} trees)")
+    
+    print("\n✅ Compaction tests passed!")
+
+if __name__ == "__main__":
+    test_compaction()
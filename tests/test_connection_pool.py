@@ -0,0 +1,76 @@
+import sys
+import os
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.db_operations import DatabaseOperations
+from src.database.connection_pool import ConnectionPool, PoolError
+
+def test_connection_pool():
+    """Test pooled connection checkout, reuse and limits"""
+    
+    print("=" * 50)
+    print("Testing Connection Pool")
+    print("=" * 50)
+    
+    db = DatabaseOperations()
+    
+    # Test 1: All DatabaseOperations instances share one pool
+    print("\n1. Testing: Shared pool")
+    assert DatabaseOperations().pool is db.pool
+    print("✓ Pool is shared across instances")
+    
+    # Test 2: Connections are reused instead of reopened
+    print("\n2. Testing: Connection reuse")
+    pool = ConnectionPool(db.connection_params, min_size=1, max_size=2)
+    for _ in range(5):
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1;")
+            assert cursor.fetchone()[0] == 1
+    
+    stats = pool.stats()
+    assert stats['checkouts'] == 5
+    assert stats['connections_created'] == 1
+    print(f"✓ 5 checkouts served by {stats['connections_created']} connection")
+    
+    # Test 3: Broken connections are discarded and replaced
+    print("\n3. Testing: Health check")
+    with pool.connection() as connection:
+        connection.close()
+    with pool.connection() as connection:
+        assert not connection.closed
+    print(f"✓ Replaced broken connection ({pool.stats()['connections_created']} created)")
+    
+    # Test 4: Checkout blocks at max_size and times out
+    print("\n4. Testing: Bounded size")
+    small = ConnectionPool(db.connection_params, min_size=0, max_size=1, timeout=0.2)
+    held = small.getconn()
+    try:
+        small.getconn()
+        assert False, "checkout should time out when the pool is exhausted"
+    except PoolError:
+        print("✓ Checkout timed out with pool exhausted")
+    
+    # Test 5: Waiters are woken when a connection is returned
+    print("\n5. Testing: Waiting for a connection")
+    small.timeout = 5
+    threading.Timer(0.1, small.putconn, args=(held,)).start()
+    with small.connection():
+        pass
+    
+    stats = small.stats()
+    assert stats['waits'] >= 1
+    print(f"✓ Waited {stats['max_wait_time']:.3f}s for a free connection")
+    
+    pool.closeall()
+    small.closeall()
+    
+    print("\n" + "=" * 50)
+    print("✅ All pool tests completed!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    test_connection_pool()
@@ -4,7 +4,9 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.database.db_operations import DatabaseOperations
+from src.database.db_operations import DatabaseOperations, AIR_QUALITY_FIELDS, WEATHER_FIELDS
+from datetime import datetime, timedelta
+import pandas as pd
 
 def test_database_operations():
     """Test all database operations"""
@@ -66,6 +68,104 @@ def test_database_operations():
         print(f"  PM10: {latest['pm10']}")
         print(f"  Timestamp: {latest['timestamp']}")
     
+    # Test 6: Batch insert
+    print("\n6. Testing: Batch insert")
+    timestamp = datetime.now()
+    readings = [
+        {'city': city['city_name'], 'timestamp': timestamp, 'aqi': 150, 'pm25': 75,
+         'pm10': 105, 'temperature': 30.0, 'humidity': 50, 'wind_speed': 8.0, 'pressure': 1012}
+        for city in cities
+    ]
+    result = db.insert_readings_batch(readings, source='test')
+    print(f"✓ Inserted {result['air_quality']['inserted']} AQI / {result['weather']['inserted']} weather rows")
+    
+    # Re-inserting the same timestamps is skipped for air quality
+    result = db.insert_readings_batch(readings, source='test')
+    assert result['air_quality']['skipped'] == len(cities)
+    print(f"✓ Skipped {result['air_quality']['skipped']} duplicate AQI rows")
+    
+    # Weather is upserted: unchanged rows are left alone, changed rows updated
+    assert result['weather']['inserted'] == 0
+    assert result['weather']['skipped'] == len(cities)
+    for reading in readings:
+        reading['temperature'] = 31.5
+    result = db.insert_readings_batch(readings, source='test')
+    assert result['weather']['updated'] == len(cities)
+    print(f"✓ Updated {result['weather']['updated']} weather rows in place")
+    
+    # DataFrame rows carry NaN for missing values
+    frame = pd.DataFrame([
+        {'city': 'Delhi', 'timestamp': timestamp, 'aqi': float('nan'), 'temperature': 30.0},
+        {'city': 'Delhi', 'timestamp': timestamp, 'aqi': 152.7, 'temperature': float('nan')}
+    ])
+    air_quality_rows, weather_rows, _ = db._normalize_readings(frame, 'test')
+    assert [row[2] for row in air_quality_rows] == [153]
+    assert [row[2] for row in weather_rows] == [30.0]
+    print("✓ NaN readings from a DataFrame are skipped, not inserted")
+    
+    # Test 7: latest_readings follows the newest reading and never moves back
+    print("\n7. Testing: Latest readings")
+    city_name = cities[0]['city_name']
+    assert db.get_latest_aqi(city_name)['timestamp'] >= timestamp
+    
+    older = [{'city': city_name, 'timestamp': timestamp - timedelta(days=1), 'aqi': 999}]
+    db.insert_readings_batch(older, source='test')
+    assert db.get_latest_aqi(city_name)['aqi'] != 999
+    print(f"✓ Latest AQI for {city_name} unaffected by an older reading")
+    
+    # Test 8: Latest readings for many cities in one query
+    print("\n8. Testing: Latest readings for all cities")
+    checkouts = db.pool_stats()['checkouts']
+    readings = db.get_latest_readings()
+    assert db.pool_stats()['checkouts'] == checkouts + 1
+    assert {reading['city_name'] for reading in readings} >= {city['city_name'] for city in cities}
+    
+    subset = db.get_latest_readings(['Delhi', 'Mumbai'])
+    assert [reading['city_name'] for reading in subset] == ['Delhi', 'Mumbai']
+    print(f"✓ {len(readings)} cities read with one query")
+    
+    # Test 9: COPY and batch insert store the same rounded AQI and humidity
+    print("\n9. Testing: COPY rounding")
+    copied_at = datetime(2001, 6, 1, 10, 0)
+    city_id = db.get_city_id('Delhi')
+    try:
+        frame = pd.DataFrame([{'city_id': city_id, 'timestamp': copied_at, 'aqi': 152.7}])
+        frame = frame.reindex(columns=['city_id', 'timestamp'] + list(AIR_QUALITY_FIELDS + WEATHER_FIELDS))
+        db.copy_readings(frame, source='test')
+        db.insert_readings_batch([{'city_id': city_id, 'timestamp': copied_at + timedelta(hours=1), 'aqi': 152.7}],
+                                 source='test')
+        with db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT aqi FROM air_quality WHERE city_id = %s AND timestamp IN (%s, %s);",
+                           (city_id, copied_at, copied_at + timedelta(hours=1)))
+            assert [row[0] for row in cursor.fetchall()] == [153, 153]
+            cursor.close()
+        print("✓ 152.7 stored as 153 by both paths")
+        
+        # Float humidity (as read back from pandas) is rounded into the INTEGER column
+        frame = pd.DataFrame([{'city_id': city_id, 'timestamp': copied_at + timedelta(hours=2),
+                               'temperature': 31.5, 'humidity': 45.0},
+                              {'city_id': city_id, 'timestamp': copied_at + timedelta(hours=3),
+                               'temperature': 30.0, 'humidity': float('nan')}])
+        frame = frame.reindex(columns=['city_id', 'timestamp'] + list(AIR_QUALITY_FIELDS + WEATHER_FIELDS))
+        db.copy_readings(frame, source='test')
+        with db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT humidity FROM weather WHERE city_id = %s AND timestamp >= %s "
+                           "AND timestamp < %s ORDER BY timestamp;",
+                           (city_id, copied_at, copied_at + timedelta(days=1)))
+            assert [row[0] for row in cursor.fetchall()] == [45, None]
+            cursor.close()
+        print("✓ Float humidity copied as an integer")
+    finally:
+        with db.connection() as connection:
+            cursor = connection.cursor()
+            for table in ('air_quality', 'weather'):
+                cursor.execute(f"DELETE FROM {table} WHERE city_id = %s AND timestamp >= %s AND timestamp < %s;",
+                               (city_id, copied_at, copied_at + timedelta(days=1)))
+            connection.commit()
+            cursor.close()
+    
     print("\n" + "=" * 50)
     print("✅ All tests completed!")
     print("=" * 50)
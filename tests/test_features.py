@@ -0,0 +1,88 @@
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor
+from src.preprocessing.features import FeatureStore, FEATURE_COLUMNS
+
+CITY = 'Feature Cache Test City'
+
+def test_features():
+    """Test the cross-city feature pipeline and its cache"""
+    
+    print("\n🧪 Testing Cross-City Features\n")
+    
+    predictor = AQIPredictor()
+    db = predictor.db
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = FeatureStore(db, cache_dir=cache_dir)
+        
+        # Test 1: One pass over all cities matches the per-city pipeline
+        df = store.get_features(limit=200)
+        cities = list(df['city_name'].cat.categories)
+        assert sorted(cities) == sorted(db.get_city_names())
+        for city in cities:
+            single = predictor.prepare_data(city, limit=200, newest=True)
+            group = df[df['city_name'] == city]
+            assert (group['timestamp'].to_numpy() == single['timestamp'].to_numpy()).all()
+            assert np.allclose(group[FEATURE_COLUMNS].to_numpy(float), single[FEATURE_COLUMNS].to_numpy(float))
+        print(f"✓ {len(df)} rows for {len(cities)} cities match prepare_data()")
+        
+        # Test 2: Compact dtypes
+        assert all(df[column].dtype == np.float32 for column in FEATURE_COLUMNS if column not in ('hour', 'day_of_week'))
+        assert df['hour'].dtype == np.int8 and df['city_name'].dtype == 'category'
+        print(f"✓ {df.memory_usage(deep=True).sum() / len(df):.0f} bytes per row")
+        
+        # Test 3: Time range, lags never cross from one city into the next
+        end = df['timestamp'].max()
+        window = store.get_features(start=end - timedelta(days=2), end=end)
+        assert window['timestamp'].min() >= end - timedelta(days=2) and window['timestamp'].max() < end
+        first_rows = window.groupby('city_id', observed=True).head(1)
+        assert (first_rows['timestamp'] > end - timedelta(days=2)).all()
+        print(f"✓ Two-day range: {len(window)} rows")
+        
+        # Test 4: No readings gives an empty frame with the same columns
+        for empty in (store.get_features(['No Such City']), store.get_features(start=end + timedelta(days=1))):
+            assert empty.empty and list(empty.columns) == list(df.columns)
+            assert empty['timestamp'].dtype.kind == 'M' and empty['pm25'].dtype == np.float32
+        print("✓ Empty result for unknown cities and ranges past the last reading")
+        
+        # Test 5: Cached until a reading is added
+        assert store.get_features(limit=200).equals(df)
+        assert store.counters == {'hits': 1, 'misses': 4}
+        
+        with db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("INSERT INTO cities (city_name, state) VALUES (%s, 'Test') ON CONFLICT DO NOTHING;", (CITY,))
+            connection.commit()
+            cursor.close()
+        db.refresh_cities()
+        
+        try:
+            db.insert_readings_batch([{
+                'city': CITY, 'timestamp': datetime(2002, 3, 1), 'aqi': 100, 'pm25': 50,
+                'temperature': 25, 'humidity': 50, 'wind_speed': 2, 'pressure': 1010
+            }], source='test')
+            store.get_features(limit=200)
+            assert store.counters['misses'] == 5
+            assert len(os.listdir(cache_dir)) == 4   # one frame per request, older ones removed
+            print("✓ Cache hit, then rebuilt after new readings")
+        finally:
+            with db.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT city_id FROM cities WHERE city_name = %s;", (CITY,))
+                city_id = cursor.fetchone()[0]
+                for table in ('latest_readings', 'air_quality', 'weather', 'cities'):
+                    cursor.execute(f"DELETE FROM {table} WHERE city_id = %s;", (city_id,))
+                connection.commit()
+                cursor.close()
+            db.refresh_cities()
+    
+    print("\n✅ Cross-city feature tests passed!")
+
+if __name__ == "__main__":
+    test_features()
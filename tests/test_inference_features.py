@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+import pandas as pd
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, INFERENCE_WINDOW, add_features, build_features
+from src.preprocessing.features import FEATURE_COLUMNS
+
+def test_inference_features():
+    """Test the latest-window feature builder against the DataFrame pipeline"""
+    
+    print("\n🧪 Testing Inference Features\n")
+    
+    predictor = AQIPredictor()
+    
+    # Test 1: Only the newest rows are fetched, newest first
+    rows = predictor.fetch_inference_rows('Delhi')
+    assert len(rows) == INFERENCE_WINDOW
+    assert rows[0]['timestamp'] > rows[1]['timestamp'] > rows[2]['timestamp']
+    print(f"✓ Fetched {len(rows)} rows, newest {rows[0]['timestamp']}")
+    
+    # Test 2: Same vector as prepare_data's feature engineering
+    features = build_features(rows, FEATURE_COLUMNS)
+    df = pd.DataFrame(rows[::-1])
+    for column in df.columns.drop('timestamp'):
+        df[column] = df[column].astype(float)
+    expected = add_features(df).iloc[-1][FEATURE_COLUMNS].to_numpy(dtype=float)
+    assert np.allclose(features, expected)
+    print("✓ Matches the DataFrame pipeline")
+    
+    # Test 3: Building the vector is sub-millisecond
+    runs = 1000
+    started = time.perf_counter()
+    for _ in range(runs):
+        build_features(rows, FEATURE_COLUMNS)
+    per_call_ms = (time.perf_counter() - started) * 1000 / runs
+    assert per_call_ms < 1
+    print(f"✓ {per_call_ms * 1000:.1f} µs per feature vector")
+    
+    # Test 4: Too little or incomplete data gives no vector
+    assert build_features(rows[:2], FEATURE_COLUMNS) is None
+    incomplete = [dict(rows[0], temperature=None)] + rows[1:]
+    assert build_features(incomplete, FEATURE_COLUMNS) is None
+    print("✓ Short or incomplete windows rejected")
+    
+    # Test 5: Batched inference agrees with one-row predictions
+    cities = [city for city in predictor.db.get_city_names() if predictor.get_model(city) is not None]
+    batch = predictor.predict_batch(cities)
+    assert list(batch['city']) == cities
+    for prediction in batch.to_dict('records'):
+        artifact = predictor.get_model(prediction['city'])
+        features = build_features(predictor.fetch_inference_rows(prediction['city']), artifact['feature_columns'])
+        assert int(artifact['model'].predict(np.array([features]))[0]) == prediction['predicted_aqi']
+        assert prediction['served_by'] == 'model' and prediction['model_city'] == prediction['city']
+    print(f"✓ Batch of {len(batch)} cities matches one-row predictions")
+    
+    print("\n✅ Inference feature tests passed!")
+
+if __name__ == "__main__":
+    test_inference_features()
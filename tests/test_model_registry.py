@@ -0,0 +1,65 @@
+import sys
+import os
+import pickle
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.model_registry import ModelRegistry
+from src.models.aqi_predictor import AQIPredictor, find_model_path
+
+def write_artifact(path, city, mtime):
+    """Pickle a small artifact and pin its mtime"""
+    with open(path, 'wb') as f:
+        pickle.dump({'city': city}, f)
+    os.utime(path, (mtime, mtime))
+
+def test_model_registry():
+    """Test lazy loading, mtime invalidation and LRU eviction"""
+    
+    print("\n🧪 Testing Model Registry\n")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {city: os.path.join(directory, f'{city}.pkl') for city in ('delhi', 'mumbai', 'pune')}
+        for city, path in paths.items():
+            write_artifact(path, city, 1000)
+        
+        registry = ModelRegistry(capacity=2)
+        
+        # Test 1: Each artifact is unpickled once
+        for _ in range(3):
+            assert registry.get('delhi', paths['delhi'])['city'] == 'delhi'
+        stats = registry.stats()
+        assert stats['loads'] == 1 and stats['hits'] == 2
+        print(f"✓ 3 lookups, 1 load ({stats['avg_load_ms']:.2f} ms)")
+        
+        # Test 2: A rewritten file is reloaded
+        write_artifact(paths['delhi'], 'delhi v2', 2000)
+        assert registry.get('delhi', paths['delhi'])['city'] == 'delhi v2'
+        assert registry.stats()['reloads'] == 1
+        print("✓ Changed file reloaded")
+        
+        # Test 3: Least recently used model is evicted
+        registry.get('mumbai', paths['mumbai'])
+        registry.get('delhi', paths['delhi'])
+        registry.get('pune', paths['pune'])
+        stats = registry.stats()
+        assert stats['evictions'] == 1 and stats['entries'] == 2
+        registry.get('delhi', paths['delhi'])
+        assert registry.stats()['hits'] == stats['hits'] + 1
+        print("✓ Mumbai evicted, Delhi kept")
+        
+        # Test 4: Missing file
+        assert registry.get('chennai', os.path.join(directory, 'chennai.pkl')) is None
+        print("✓ Missing model returns None")
+    
+    # Test 5: Each city gets its own saved model
+    predictor = AQIPredictor()
+    cities = [city for city in ('Delhi', 'Mumbai', 'Kolkata') if find_model_path(city)]
+    for city in cities:
+        assert predictor.get_model(city)['city'] == city
+    print(f"✓ {len(cities)} cities served their own model")
+    
+    print("\n✅ Model registry tests passed!")
+
+if __name__ == "__main__":
+    test_model_registry()
@@ -0,0 +1,61 @@
+import sys
+import os
+import shutil
+import tempfile
+import warnings
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import (AQIPredictor, FEATURE_COLUMNS, model_path, legacy_model_path,
+                                      save_artifact)
+from src.models.model_store import FlatForest, load_artifact, read_metadata
+
+def test_model_store():
+    """Test the flat, memory-mapped model format"""
+    
+    print("\n🧪 Testing Flat Model Format\n")
+    
+    # Saved with an older scikit-learn
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    predictor = AQIPredictor()
+    legacy = load_artifact(legacy_model_path('Delhi'))
+    X = predictor.prepare_data('Delhi', limit=200, newest=True)[FEATURE_COLUMNS]
+    
+    with tempfile.TemporaryDirectory() as models_dir:
+        path = model_path('Delhi', models_dir)
+        
+        # Test 1: Same predictions as the pickled sklearn forest
+        save_artifact(legacy, path)
+        artifact = load_artifact(path)
+        assert isinstance(artifact['model'], FlatForest)
+        assert isinstance(artifact['model'].nodes, np.memmap)
+        assert np.allclose(artifact['model'].predict(X), legacy['model'].predict(X), rtol=0, atol=1e-9)
+        print(f"✓ {len(X)} predictions match sklearn, {artifact['model'].n_estimators} trees memory-mapped")
+        
+        # Test 2: Metadata without touching the node array
+        metadata = read_metadata(path)
+        assert metadata['city'] == 'Delhi' and metadata['feature_columns'] == FEATURE_COLUMNS
+        assert metadata['trained_date'] == legacy['trained_date']
+        print(f"✓ Metadata read alone (trained {metadata['trained_date']:%Y-%m-%d})")
+        
+        # Test 3: Saving again switches files and removes the old node array
+        save_artifact(artifact, path)
+        files = set(os.listdir(models_dir))
+        assert files == {'aqi_model_delhi.json', read_metadata(path)['nodes']}
+        assert metadata['nodes'] not in files
+        # The old mapping stays readable after its file is gone
+        assert np.allclose(artifact['model'].predict(X), load_artifact(path)['model'].predict(X))
+        print("✓ Resave replaced the node file, no temp files left")
+        
+        # Test 4: The predictor prefers the flat file and still serves pickles
+        shutil.copy(legacy_model_path('Mumbai'), legacy_model_path('Mumbai', models_dir))
+        predictor = AQIPredictor(models_dir=models_dir)
+        assert isinstance(predictor.get_model('Delhi')['model'], FlatForest)
+        assert not isinstance(predictor.get_model('Mumbai')['model'], FlatForest)
+        print("✓ Flat and legacy pickled models served side by side")
+    
+    print("\n✅ Flat model format tests passed!")
+
+if __name__ == "__main__":
+    test_model_store()
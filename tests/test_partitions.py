@@ -0,0 +1,66 @@
+import sys
+import os
+from datetime import date, datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.db_operations import DatabaseOperations
+from src.database.partitions import PartitionManager, ensure_partitions, list_partitions
+
+def test_partitions():
+    """Test monthly partitions, default partition moves and retention"""
+    
+    print("=" * 50)
+    print("Testing Partitions")
+    print("=" * 50)
+    
+    db = DatabaseOperations()
+    manager = PartitionManager(db=db, months_ahead=2)
+    
+    # Test 1: Current and upcoming months have partitions
+    print("\n1. Testing: Upcoming partitions")
+    manager.ensure_partitions()
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        months = [month for _, month in list_partitions(cursor, 'air_quality')]
+        connection.commit()
+        cursor.close()
+    
+    this_month = date.today().replace(day=1)
+    assert this_month in months
+    print(f"✓ {len(months)} air_quality partitions, latest {months[-1]:%Y-%m}")
+    
+    # Test 2: Rows outside every partition land in DEFAULT and are moved later
+    print("\n2. Testing: Default partition")
+    timestamp = datetime(2000, 1, 15, 12, 0)
+    result = db.insert_readings_batch([{'city': 'Delhi', 'timestamp': timestamp, 'aqi': 123}], source='test')
+    assert result['air_quality']['inserted'] == 1
+    
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        created = ensure_partitions(cursor, 'air_quality', date(2000, 1, 1), date(2000, 1, 1))
+        connection.commit()
+        
+        cursor.execute("SELECT COUNT(*) FROM air_quality_y2000m01;")
+        assert cursor.fetchone()[0] == 1
+        cursor.execute("SELECT COUNT(*) FROM air_quality_default WHERE timestamp = %s;", (timestamp,))
+        assert cursor.fetchone()[0] == 0
+        connection.commit()
+        cursor.close()
+    
+    print(f"✓ Created {created[0]} and moved the stranded row into it")
+    
+    # Test 3: Retention drops partitions older than the window
+    print("\n3. Testing: Retention")
+    retention = PartitionManager(db=db, retention_months=3, drop_expired=True)
+    retired = retention.apply_retention(today=date(2000, 6, 1))
+    assert retired == ['air_quality_y2000m01']
+    print(f"✓ Retired {retired[0]}")
+    
+    print("\n" + "=" * 50)
+    print("✅ All partition tests completed!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    test_partitions()
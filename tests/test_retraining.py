@@ -0,0 +1,108 @@
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, WARM_START_TREES
+
+CITY = 'Retraining Test City'
+START = datetime(2002, 3, 1)
+
+def add_readings(db, first, count, rng):
+    """Insert `count` hourly readings with weather, starting at step `first`"""
+    readings = []
+    for step in range(first, first + count):
+        pm25 = rng.uniform(40, 160)
+        readings.append({
+            'city': CITY, 'timestamp': START + timedelta(hours=step),
+            'aqi': int(pm25 * 1.8), 'pm25': pm25, 'pm10': pm25 * 1.5,
+            'no2': rng.uniform(10, 50), 'so2': rng.uniform(5, 20), 'co': rng.uniform(0.5, 2),
+            'o3': rng.uniform(20, 60), 'temperature': rng.uniform(20, 35),
+            'humidity': rng.randint(30, 80), 'wind_speed': rng.uniform(0, 8), 'pressure': 1010
+        })
+    db.insert_readings_batch(readings, source='test')
+    return START + timedelta(hours=first + count - 1)
+
+def remove_city(db):
+    """Delete the test city and its data"""
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT city_id FROM cities WHERE city_name = %s;", (CITY,))
+        row = cursor.fetchone()
+        if row:
+            for table in ('latest_readings', 'air_quality', 'weather', 'air_quality_hourly', 'air_quality_daily', 'cities'):
+                cursor.execute(f"DELETE FROM {table} WHERE city_id = %s;", (row[0],))
+        connection.commit()
+        cursor.close()
+    db.refresh_cities()
+
+def test_retraining():
+    """Test watermarks, warm-start and windowed retraining"""
+    
+    print("\n🧪 Testing Incremental Retraining\n")
+    
+    rng = random.Random(7)
+    
+    with tempfile.TemporaryDirectory() as models_dir:
+        predictor = AQIPredictor(models_dir=models_dir)
+        db = predictor.db
+        
+        remove_city(db)
+        with db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("INSERT INTO cities (city_name, state) VALUES (%s, 'Test');", (CITY,))
+            connection.commit()
+            cursor.close()
+        db.refresh_cities()
+        
+        try:
+            # Test 1: The artifact records the newest reading used
+            last = add_readings(db, 0, 30, rng)
+            assert predictor.train_model(CITY)
+            artifact = predictor.get_model(CITY)
+            assert artifact['watermark'] == last and artifact['training_rows'] == 28
+            print(f"✓ Watermark {artifact['watermark']}")
+            
+            # Test 2: Nothing new, nothing refitted
+            assert predictor.retrain_model(CITY, strategy='warm_start')
+            assert predictor.get_model(CITY) is artifact
+            print("✓ Up-to-date model left alone")
+            
+            # An old model is only stale once readings past its watermark exist
+            predictor.max_model_age = timedelta(hours=1)
+            old = dict(artifact, trained_date=datetime.now() - timedelta(hours=2))
+            assert not predictor.is_stale(old, last)
+            assert predictor.is_stale(old, last + timedelta(hours=1))
+            predictor.max_model_age = timedelta(0)
+            print("✓ Old model with nothing new isn't queued again")
+            
+            # Test 3: Warm start adds trees fitted on the new rows only
+            last = add_readings(db, 30, 10, rng)
+            assert predictor.retrain_model(CITY, strategy='warm_start')
+            warm = predictor.get_model(CITY)
+            assert warm['model'].n_estimators == artifact['model'].n_estimators + WARM_START_TREES
+            assert warm['watermark'] == last and 'recent_mae' in warm['performance']
+            assert artifact['model'].n_estimators == 100   # the served model was not mutated
+            print(f"✓ Warm start: {warm['model'].n_estimators} trees, watermark {warm['watermark']}")
+            
+            # Test 4: Readings past the watermark are read oldest first, none skipped
+            last = add_readings(db, 40, 5, rng)
+            backlog = predictor.prepare_data(CITY, limit=3, after=warm['watermark'])
+            assert list(backlog['timestamp']) == [warm['watermark'] + timedelta(hours=step) for step in (1, 2, 3)]
+            print(f"✓ Backlog read from the watermark: {len(backlog)} rows with full lag features")
+            
+            # Test 5: Window strategy refits a fresh forest on the newest rows
+            assert predictor.retrain_model(CITY, strategy='window')
+            refit = predictor.get_model(CITY)
+            assert refit['model'].n_estimators == 100 and refit['watermark'] == last
+            print(f"✓ Window refit on {refit['training_rows']} rows, watermark {refit['watermark']}")
+        
+        finally:
+            remove_city(db)
+    
+    print("\n✅ Retraining tests passed!")
+
+if __name__ == "__main__":
+    test_retraining()
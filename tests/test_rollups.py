@@ -0,0 +1,123 @@
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.db_operations import DatabaseOperations
+from src.database.rollups import RollupManager
+
+def fetch_rollup(db, table, bucket):
+    """Return (min, max, mean, count) of Delhi's AQI rollup for one bucket"""
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT min_value, max_value, mean_value, sample_count FROM {table}
+            WHERE city_id = %s AND metric = 'aqi' AND bucket = %s;
+        """, (db.get_city_id('Delhi'), bucket))
+        row = cursor.fetchone()
+        cursor.close()
+    return row
+
+def test_rollups():
+    """Test incremental hourly/daily rollups and resolution selection"""
+    
+    print("=" * 50)
+    print("Testing Rollups")
+    print("=" * 50)
+    
+    db = DatabaseOperations()
+    rollups = RollupManager(db=db)
+    hour = datetime(2001, 1, 1, 10, 0)
+    day = datetime(2001, 1, 1)
+    
+    # Catch up with everything inserted before this test
+    assert rollups.refresh(verbose=False) is not None
+    
+    try:
+        # Test 1: New rows are rolled up into hourly and daily buckets
+        print("\n1. Testing: Incremental refresh")
+        readings = [
+            {'city': 'Delhi', 'timestamp': hour + timedelta(minutes=5), 'aqi': 100, 'pm25': 40},
+            {'city': 'Delhi', 'timestamp': hour + timedelta(minutes=20), 'aqi': 200, 'pm25': 80},
+            {'city': 'Delhi', 'timestamp': hour + timedelta(hours=1, minutes=10), 'aqi': 300, 'pm25': 120},
+        ]
+        db.insert_readings_batch(readings, source='test')
+        assert rollups.refresh(verbose=False) == 3
+        
+        assert fetch_rollup(db, 'air_quality_hourly', hour) == (100, 200, 150, 2)
+        assert fetch_rollup(db, 'air_quality_daily', day) == (100, 300, 200, 3)
+        print("✓ 3 rows rolled up into 2 hours and 1 day")
+        
+        # Test 2: A late row recomputes only its buckets
+        print("\n2. Testing: Late data")
+        db.insert_readings_batch(
+            [{'city': 'Delhi', 'timestamp': hour + timedelta(minutes=40), 'aqi': 400}], source='test'
+        )
+        assert rollups.refresh(verbose=False) == 1
+        assert rollups.refresh(verbose=False) == 0
+        
+        assert fetch_rollup(db, 'air_quality_hourly', hour) == (100, 400, 700 / 3, 3)
+        assert fetch_rollup(db, 'air_quality_daily', day) == (100, 400, 250, 4)
+        print("✓ Late row merged, nothing left to process")
+        
+        # Test 3: Readers pick the coarsest resolution that fits
+        print("\n3. Testing: Resolution selection")
+        assert rollups.choose_resolution(day, day + timedelta(days=1)) == 'raw'
+        assert rollups.choose_resolution(day, day + timedelta(days=10)) == 'hourly'
+        assert rollups.choose_resolution(day, day + timedelta(days=365)) == 'daily'
+        
+        series = rollups.get_series('Delhi', start=day, end=day + timedelta(days=10), metrics=('aqi', 'pm25'))
+        assert series.attrs['resolution'] == 'hourly'
+        assert list(series['aqi_count']) == [3, 1]
+        assert list(series['pm25_count']) == [2, 1]
+        
+        raw = rollups.get_series('Delhi', start=day, end=day + timedelta(days=1))
+        assert raw.attrs['resolution'] == 'raw' and len(raw) == 4
+        print(f"✓ 10 days → {len(series)} hourly points, 1 day → {len(raw)} raw rows")
+        
+        # Test 4: A row committed after a higher id is still rolled up
+        print("\n4. Testing: Concurrent writers")
+        late_hour = hour + timedelta(hours=3)
+        with db.connection() as slow:
+            cursor = slow.cursor()
+            db._bulk_insert_air_quality_rows(cursor, [
+                (db.get_city_id('Delhi'), late_hour, 500, None, None, None, None, None, None, 'test')
+            ])
+            db.insert_readings_batch(
+                [{'city': 'Delhi', 'timestamp': late_hour + timedelta(minutes=10), 'aqi': 100}], source='test'
+            )
+            
+            refreshed = []
+            refresher = threading.Thread(target=lambda: refreshed.append(rollups.refresh(verbose=False)))
+            refresher.start()
+            time.sleep(0.5)
+            assert refresher.is_alive()   # waits for the open transaction
+            slow.commit()
+            cursor.close()
+        refresher.join(timeout=30)
+        
+        assert refreshed == [2]
+        assert fetch_rollup(db, 'air_quality_hourly', late_hour) == (100, 500, 300, 2)
+        print("✓ Refresh waited for the open writer and rolled up both rows")
+    
+    finally:
+        with db.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM air_quality WHERE timestamp >= %s AND timestamp < %s;",
+                           (day, day + timedelta(days=1)))
+            for table in ('air_quality_hourly', 'air_quality_daily'):
+                cursor.execute(f"DELETE FROM {table} WHERE bucket >= %s AND bucket < %s;",
+                               (day, day + timedelta(days=1)))
+            connection.commit()
+            cursor.close()
+    
+    print("\n" + "=" * 50)
+    print("✅ All rollup tests completed!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    test_rollups()
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_collection.simulated_data import SimulatedDataCollector
+import pandas as pd
+import numpy as np
+
+def test_simulation():
+    """Test the vectorized simulation engine (no database needed)"""
+    
+    print("=" * 50)
+    print("Testing Simulation Engine")
+    print("=" * 50)
+    
+    cities = ['Delhi', 'Mumbai', 'Bangalore']
+    timestamps = pd.date_range('2026-01-01', periods=24 * 60, freq='h')
+    
+    # Test 1: Shape and ordering
+    print("\n1. Testing: Output shape")
+    frame = SimulatedDataCollector(seed=7).simulate(timestamps, cities)
+    assert len(frame) == len(timestamps) * len(cities)
+    assert list(frame['city'][:3]) == cities
+    print(f"✓ Generated {len(frame)} readings")
+    
+    # Test 2: Same seed reproduces the same data
+    print("\n2. Testing: Reproducibility")
+    again = SimulatedDataCollector(seed=7).simulate(timestamps, cities)
+    pd.testing.assert_frame_equal(frame, again)
+    print("✓ Seeded runs are identical")
+    
+    # Test 3: Readings are autocorrelated in time
+    print("\n3. Testing: Temporal structure")
+    delhi = frame[frame['city'] == 'Delhi']
+    lag_1 = delhi['aqi'].autocorr(lag=1)
+    assert lag_1 > 0.5
+    print(f"✓ Delhi AQI lag-1 autocorrelation: {lag_1:.2f}")
+    
+    # Test 4: Wind disperses pollution
+    print("\n4. Testing: Weather/pollutant coupling")
+    correlation = np.corrcoef(delhi['wind_speed'], delhi['pm25'])[0, 1]
+    assert correlation < 0
+    print(f"✓ Wind speed vs PM2.5 correlation: {correlation:.2f}")
+    
+    # Test 5: A weather + AQI pair is one simulated tick
+    print("\n5. Testing: Weather and AQI from the same tick")
+    collector = SimulatedDataCollector(seed=7)
+    weather = collector.generate_weather_data('Delhi')
+    aqi = collector.generate_aqi_data('Delhi')
+    reference = SimulatedDataCollector(seed=7)
+    reference.generate_readings('Delhi')
+    assert set(weather) == {'city', 'temperature', 'humidity', 'wind_speed', 'pressure'} and 'pm25' in aqi
+    assert collector.rng.bit_generator.state == reference.rng.bit_generator.state
+    print(f"✓ {weather['wind_speed']} km/h wind with AQI {aqi['aqi']}, one simulation step")
+    
+    print("\n" + "=" * 50)
+    print("✅ All simulation tests completed!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    test_simulation()
@@ -0,0 +1,49 @@
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.aqi_predictor import AQIPredictor, FEATURE_COLUMNS, TRAINING_LIMIT, model_path
+from src.models.model_store import read_metadata
+
+def test_train_all():
+    """Test the one-query, multi-process training pipeline"""
+    
+    print("\n🧪 Testing train_all\n")
+    
+    with tempfile.TemporaryDirectory() as models_dir, tempfile.TemporaryDirectory() as cache_dir:
+        predictor = AQIPredictor(models_dir=models_dir)
+        predictor.features.cache_dir = cache_dir
+        cities = ['Delhi', 'Mumbai']
+        
+        # Test 1: One query returns the same data as the per-city path
+        data = predictor.prepare_training_data(cities)
+        assert sorted(data) == cities
+        single = predictor.prepare_data('Delhi', limit=TRAINING_LIMIT, newest=True)
+        assert np.allclose(data['Delhi'][FEATURE_COLUMNS].to_numpy(float), single[FEATURE_COLUMNS].to_numpy(float))
+        print(f"✓ {sum(len(df) for df in data.values())} samples for {len(data)} cities in one query")
+        
+        # Test 2: Models trained in worker processes and saved atomically
+        report = predictor.train_all(cities, workers=2)
+        assert [row['city'] for row in report] == cities
+        for row in report:
+            assert row['wall_seconds'] > 0 and row['cpu_seconds'] > 0 and row['process_peak_rss_mb'] > 0
+        
+        files = sorted(os.listdir(models_dir))
+        assert [name for name in files if name.endswith('.json')] == ['aqi_model_delhi.json', 'aqi_model_mumbai.json']
+        assert len(files) == 4 and all(name.endswith(('.json', '.npy')) for name in files)
+        for city in cities:
+            artifact = read_metadata(model_path(city, models_dir))
+            assert artifact['city'] == city and artifact['feature_columns'] == FEATURE_COLUMNS
+        print("✓ Artifacts written, no temp files left")
+        
+        # Test 3: The predictor picks up the new models
+        prediction = predictor.predict_next_aqi('Mumbai')
+        assert prediction['served_by'] == 'model' and prediction['model_city'] == 'Mumbai'
+        print("✓ New models serve predictions")
+    
+    print("\n✅ train_all tests passed!")
+
+if __name__ == "__main__":
+    test_train_all()
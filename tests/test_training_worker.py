@@ -0,0 +1,63 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.training_worker import TrainingWorker
+from src.models.aqi_predictor import AQIPredictor, ewma_forecast
+
+def test_training_worker():
+    """Test background training and the EWMA fallback"""
+    
+    print("\n🧪 Testing Background Training\n")
+    
+    # Test 1: Requests are deduplicated while pending
+    release = threading.Event()
+    trained = []
+    
+    def train(city_name):
+        release.wait(5)
+        trained.append(city_name)
+        return city_name != 'Broken'
+    
+    worker = TrainingWorker(train)
+    assert worker.request('Delhi')
+    assert not worker.request('Delhi')
+    assert worker.request('Broken')
+    release.set()
+    assert worker.wait(timeout=5)
+    
+    stats = worker.stats()
+    assert trained == ['Delhi', 'Broken']
+    assert stats['trained'] == 1 and stats['failed'] == 1 and stats['pending'] == 0
+    print("✓ Duplicate request ignored, success and failure counted")
+    
+    # Test 2: EWMA over newest-first windows, ignoring padding
+    forecast = ewma_forecast([[100, 200, 300], [120, np.nan, np.nan]])
+    assert np.allclose(forecast, [(50 + 50 + 37.5) / 0.875, 120])
+    print(f"✓ EWMA forecasts {forecast.round(1).tolist()}")
+    
+    # Test 3: A city without a model gets the fallback now and a model later
+    with tempfile.TemporaryDirectory() as models_dir:
+        predictor = AQIPredictor(models_dir=models_dir)
+        
+        started = time.perf_counter()
+        prediction = predictor.predict_next_aqi('Delhi')
+        elapsed = time.perf_counter() - started
+        
+        assert prediction['served_by'] == 'ewma_fallback'
+        assert 'Delhi' in predictor.trainer.pending()
+        print(f"✓ Fallback served in {elapsed * 1000:.0f} ms while training is queued")
+        
+        assert predictor.trainer.wait(timeout=120)
+        prediction = predictor.predict_next_aqi('Delhi')
+        assert prediction['served_by'] == 'model' and prediction['model_city'] == 'Delhi'
+        print("✓ Trained model serves once ready")
+    
+    print("\n✅ Background training tests passed!")
+
+if __name__ == "__main__":
+    test_training_worker()
@@ -0,0 +1,65 @@
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.model_store import as_flat
+from src.models.compaction import to_float32
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+def synthetic_data(rng, rows=400, features=17):
+    """Feature matrix and a noisy nonlinear target"""
+    X = rng.normal(100, 40, size=(rows, features))
+    y = 2 * X[:, 0] + np.where(X[:, 1] > 100, 30, -30) + X[:, 2] * X[:, 3] / 100 + rng.normal(0, 5, rows)
+    return X, y
+
+def threshold_ties(model, X):
+    """Rows with features set exactly to (float32-rounded) split thresholds"""
+    tree = model.estimators_[0].tree_
+    splits = np.flatnonzero(tree.children_left != -1)
+    ties = X[:len(splits)].copy()
+    ties[np.arange(len(splits)), tree.feature[splits]] = tree.threshold[splits].astype(np.float32)
+    return ties
+
+def test_tree_evaluator():
+    """Test the vectorized evaluator against sklearn"""
+    
+    print("\n🧪 Testing Vectorized Tree Evaluator\n")
+    
+    rng = np.random.default_rng(3)
+    X, y = synthetic_data(rng)
+    X_new = np.vstack([synthetic_data(rng, rows=200)[0], rng.normal(100, 200, size=(50, 17))])
+    
+    # Test 1: Random forest, batches and single rows
+    forest = RandomForestRegressor(n_estimators=60, max_depth=10, random_state=0).fit(X, y)
+    flat = as_flat(forest)
+    X_new = np.vstack([X_new, threshold_ties(forest, X_new)])
+    assert np.allclose(flat.predict(X_new), forest.predict(X_new), rtol=0, atol=1e-9)
+    for row in X_new[:20]:
+        assert np.allclose(flat.predict(row), forest.predict(row.reshape(1, -1)), rtol=0, atol=1e-9)
+    print(f"✓ Random forest: {len(X_new)} rows match sklearn, including split-threshold ties")
+    
+    # Test 2: float32 nodes take the same paths on ties
+    assert np.allclose(to_float32(flat).predict(X_new), forest.predict(X_new), rtol=1e-6)
+    print("✓ float32 nodes match")
+    
+    # Test 3: Gradient boosting, including its initial estimate and learning rate
+    boosting = GradientBoostingRegressor(n_estimators=40, max_depth=3, learning_rate=0.2, random_state=0).fit(X, y)
+    assert np.allclose(as_flat(boosting).predict(X_new), boosting.predict(X_new), rtol=0, atol=1e-9)
+    from_zero = GradientBoostingRegressor(n_estimators=40, max_depth=3, init='zero', random_state=0).fit(X, y)
+    assert np.allclose(as_flat(from_zero).predict(X_new), from_zero.predict(X_new), rtol=0, atol=1e-9)
+    print("✓ Gradient boosting matches, with and without an initial estimate")
+    
+    # Test 4: Trees that are a single leaf
+    constant = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, np.full(len(X), 42.0))
+    assert np.allclose(as_flat(constant).predict(X_new), 42.0)
+    print("✓ Single-leaf trees")
+    
+    # Test 5: Each sklearn model is converted once
+    assert as_flat(forest) is flat and as_flat(flat) is flat
+    print("✓ Conversion cached per model")
+    
+    print("\n✅ Tree evaluator tests passed!")
+
+if __name__ == "__main__":
+    test_tree_evaluator()
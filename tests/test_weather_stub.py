@@ -0,0 +1,80 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_collection.weather_collector import WeatherCollector
+from src.data_collection.response_cache import ResponseCache
+from src.data_collection.stub_weather_server import StubWeatherServer
+
+def test_weather_stub():
+    """Test concurrent weather fetching against the local stub API"""
+    
+    print("\n🧪 Testing Weather Collector against stub API\n")
+    
+    cities = [f"Station {i}" for i in range(16)]
+    
+    with StubWeatherServer(latency=0.2) as stub:
+        collector = WeatherCollector(base_url=stub.url, max_workers=8, cycle_deadline=5)
+        collector.api_key = 'stub-key'
+        
+        # Test 1: Single fetch parses the stub response and persists it to the cache file
+        with tempfile.TemporaryDirectory() as cache_dir:
+            collector.cache.path = os.path.join(cache_dir, 'weather_cache.json')
+            weather = collector.fetch_weather('Delhi', {'q': 'Delhi,IN', 'appid': 'test'})
+            assert weather and 'temperature' in weather
+            assert ResponseCache(path=collector.cache.path).get('Delhi') is not None
+            collector.cache.path = None
+        print(f"✓ Single fetch: {weather['temperature']}°C in {collector.latencies['Delhi'] * 1000:.0f} ms")
+        
+        # Test 2: Fetches run concurrently (16 x 0.2s serially would take 3.2s)
+        started = time.perf_counter()
+        results = collector.fetch_all(cities)
+        elapsed = time.perf_counter() - started
+        
+        assert all(results.values())
+        assert elapsed < 1.5
+        print(f"✓ Fetched {len(cities)} cities in {elapsed:.2f}s with {collector.max_workers} workers")
+        
+        # Test 3: A second cycle is served from the cache without requests
+        served = stub.requests_served
+        results = collector.fetch_all(cities)
+        
+        assert all(weather['source'] == 'cache' for weather in results.values())
+        assert stub.requests_served == served
+        print(f"✓ Cached cycle made no requests ({collector.cache.stats()['hits']} hits)")
+        
+        # Test 4: Expired entries are refetched, and served stale if the upstream fails
+        collector.cache.ttl = 0
+        stub.failure_rate = 1.0
+        weather = collector.fetch_weather(cities[0], {'q': 'Station 0,IN', 'appid': 'test'})
+        
+        assert weather and weather['source'] == 'stale'
+        assert stub.requests_served == served + 1
+        print(f"✓ Served stale observation during outage ({weather['cache_age']:.1f}s old)")
+        stub.failure_rate = 0.0
+        
+        # Test 5: Stragglers are dropped at the cycle deadline
+        stub.latency = 2
+        collector.cycle_deadline = 0.3
+        started = time.perf_counter()
+        results = collector.fetch_all([f"Slow Station {i}" for i in range(4)])
+        elapsed = time.perf_counter() - started
+        
+        # Requests time out at the deadline, so each is either dropped or failed by then
+        assert elapsed < 1 and not any(results.values())
+        print(f"✓ Gave up on 4 slow cities after {elapsed:.2f}s ({len(collector.dropped)} dropped)")
+        
+        # Test 6: Stragglers end at the deadline and can't write into the finished cycle
+        time.sleep(0.5)
+        assert all(collector.latencies[city] is None for city in collector.dropped)
+        assert all(collector.cache.age(city) is None for city in collector.dropped)
+        assert not any(thread.name.startswith('weather') for thread in threading.enumerate())
+        print("✓ Stragglers timed out without touching latencies or the cache")
+    
+    print("\n✅ Stub weather tests completed!")
+
+if __name__ == "__main__":
+    test_weather_stub()